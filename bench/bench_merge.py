@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+합성 클립으로 병합 엔진(ffmpeg 스트림 복사 vs MoviePy 재인코딩)을 비교하는 벤치마크.
+
+    PYTHONPATH=src python bench/bench_merge.py --clips 10 --json bench_merge.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.merge_videos import FFMPEG_BINARY, MERGE_ENGINES
+
+
+def make_synthetic_clips(out_dir: str, count: int, seconds: float, size: str, fps: int, gop: int) -> list[str]:
+    """
+    Veo 출력과 비슷한 형태(h264, B-프레임, 고정 GOP)의 합성 클립을 만듭니다.
+    """
+    paths = []
+    for i in range(count):
+        path = os.path.join(out_dir, f"clip_{i:03d}.mp4")
+        subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+             "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+             "-c:v", "libx264", "-g", str(gop), "-pix_fmt", "yuv420p", path],
+            check=True,
+        )
+        paths.append(path)
+    return paths
+
+
+def _cpu_seconds() -> float:
+    self_ru = resource.getrusage(resource.RUSAGE_SELF)
+    child_ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return self_ru.ru_utime + self_ru.ru_stime + child_ru.ru_utime + child_ru.ru_stime
+
+
+def bench_engine(engine: str, clips: list[str], out_dir: str, trim: int) -> dict:
+    out = os.path.join(out_dir, f"merged_{engine}.mp4")
+    cpu0 = _cpu_seconds()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        MERGE_ENGINES[engine](clips, out, trim)
+    wall = time.perf_counter() - t0
+    return {
+        "engine": engine,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(_cpu_seconds() - cpu0, 3),
+        "output_bytes": os.path.getsize(out),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="병합 엔진 벤치마크 (ffmpeg vs moviepy)")
+    parser.add_argument("--clips", type=int, default=10, help="합성 클립 개수")
+    parser.add_argument("--seconds", type=float, default=4, help="클립 길이(초)")
+    parser.add_argument("--size", default="1280x720", help="해상도")
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument("--gop", type=int, default=48, help="키프레임 간격(프레임)")
+    parser.add_argument("--trim", type=int, default=7, help="클립당 뒤에서 자를 프레임 수")
+    parser.add_argument("--engines", default="ffmpeg,moviepy")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_merge_") as work:
+        clips = make_synthetic_clips(work, args.clips, args.seconds, args.size, args.fps, args.gop)
+        results = [bench_engine(e, clips, work, args.trim) for e in args.engines.split(",")]
+
+    report = {"params": vars(args), "results": results}
+    for r in results:
+        print(f"{r['engine']:>8}: wall {r['wall_s']:7.2f}s  cpu {r['cpu_s']:7.2f}s  out {r['output_bytes'] / 1e6:6.1f}MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+경로 → 영상 파이프라인 벤치마크 (합성 카탈로그 / 합성 TMap 응답 / Veo·GCS 스텁, 네트워크 없음).
+
+단계별로 지연 시간 분포(p50/p95), 처리량, 최대 메모리(tracemalloc)를 측정하고,
+커밋 간 비교할 수 있도록 JSON 으로 저장합니다.
+
+    PYTHONPATH=src python bench/bench_pipeline.py --sizes 1000,10000,100000 --json bench_pipeline.json
+    PYTHONPATH=src python bench/bench_pipeline.py --stages match --sizes 1000000 --compare bench_pipeline.json
+
+단계:
+    load_image_data  폴더 스캔 + 파일명 파싱 (카탈로그를 거치지 않는 기존 경로)
+    catalog_cold     카탈로그 최초 구축 (스캔 + 파싱 + 저장)
+    catalog_warm     저장된 카탈로그 로드 (mmap)
+    index_build      공간 인덱스 구축
+    match            경로 매칭 (_find_best_matches)
+    navigate         TMap 응답 → 경로 보간 (navigate, HTTP 는 스텁)
+    merge            클립 병합 (merge_videos)
+    e2e              navigate → 매칭 → transition 생성(Veo 스텁) → 병합
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+_BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_BENCH_DIR, "..", "src"))
+sys.path.insert(0, _BENCH_DIR)
+
+# Veo 백엔드를 스텁으로 쓰므로 Google Cloud 설정 없이 실행
+os.environ.setdefault("VEO_POLL_MIN_SECONDS", "0.05")
+os.environ.setdefault("VEO_EXPECTED_SECONDS", "0.5")
+
+import utils.interpolate_images as interpolate_module
+import utils.navigate as navigate_module
+from utils.find_matching import _find_best_matches, _load_image_data
+from utils.image_catalog import ImageCatalog
+from utils.merge_videos import MERGE_ENGINE, merge_videos
+from utils.spatial_index import build_index
+
+from bench_merge import make_synthetic_clips
+from synthetic import FakeTmapSession, FakeVeo, SyntheticCity
+
+ALL_STAGES = ["load_image_data", "catalog_cold", "catalog_warm", "index_build", "match", "navigate", "merge", "e2e"]
+
+
+# ---------------------------------------------------------------- 측정
+
+def _quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def measure(fn, repeat: int, warmup: int = 1, setup=None) -> dict:
+    """
+    fn 을 repeat 번 실행해 지연 시간 분포를 재고, 한 번 더 tracemalloc 아래에서 실행해 최대 메모리를 잽니다.
+    setup 이 있으면 매 실행 전에 호출합니다 (측정 시간에서 제외).
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        _quiet(fn)
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        _quiet(fn)
+        times.append(time.perf_counter() - t0)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        _quiet(fn)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    t = np.asarray(times)
+    return {
+        "repeat": repeat,
+        "p50_ms": round(float(np.percentile(t, 50)) * 1e3, 3),
+        "p95_ms": round(float(np.percentile(t, 95)) * 1e3, 3),
+        "mean_ms": round(float(t.mean()) * 1e3, 3),
+        "min_ms": round(float(t.min()) * 1e3, 3),
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def _row(stage: str, size: int, unit: str, items: int, stats: dict, **extra) -> dict:
+    row = {"stage": stage, "size": size, "unit": unit, "items": items, **extra, **stats}
+    row["throughput_per_s"] = round(items / (stats["p50_ms"] / 1e3), 1) if stats["p50_ms"] else None
+    print(
+        f"{stage:>16} size={size:<8} {unit}={items:<8} p50 {stats['p50_ms']:10.2f}ms  p95 {stats['p95_ms']:10.2f}ms  "
+        f"{row['throughput_per_s'] or 0:12.0f}/s  peak {stats['peak_mem_mb']:8.1f}MB"
+        + "".join(f"  {k}={v}" for k, v in extra.items())
+    )
+    return row
+
+
+# ---------------------------------------------------------------- 단계
+
+def bench_catalog(stages, city: SyntheticCity, work: str, repeat: int) -> list[dict]:
+    rows = []
+    folder = os.path.join(work, f"images_{city.n_images}")
+    store = os.path.join(work, f"catalog_{city.n_images}")
+    city.write_folder(folder)
+
+    if "load_image_data" in stages:
+        stats = measure(lambda: _load_image_data(folder), repeat)
+        rows.append(_row("load_image_data", city.n_images, "files", city.n_images, stats))
+
+    if "catalog_cold" in stages:
+        stats = measure(
+            lambda: ImageCatalog(folder, store).load(),
+            repeat,
+            setup=lambda: subprocess.run(["rm", "-rf", store], check=True),
+        )
+        rows.append(_row("catalog_cold", city.n_images, "files", city.n_images, stats))
+
+    if "catalog_warm" in stages:
+        _quiet(lambda: ImageCatalog(folder, store).load())
+        stats = measure(lambda: ImageCatalog(folder, store).load(), repeat)
+        rows.append(_row("catalog_warm", city.n_images, "files", city.n_images, stats))
+
+    subprocess.run(["rm", "-rf", folder, store], check=True)
+    return rows
+
+
+def bench_index_and_match(stages, city: SyntheticCity, route_lengths: list[float], repeat: int) -> list[dict]:
+    rows = []
+    filenames = city.filenames()
+
+    def _build():
+        return build_index(city.lons, city.lats, city.headings, filenames)
+
+    if "index_build" in stages:
+        stats = measure(_build, repeat)
+        rows.append(_row("index_build", city.n_images, "images", city.n_images, stats))
+
+    if "match" in stages:
+        index = _build()
+        for length in route_lengths:
+            path = navigate_module._build_route(city.tmap_features(length), navigate_module.PATH_SPACING_M)["path"]
+            matched = len(_quiet(lambda: _find_best_matches(path, index)))
+            stats = measure(lambda: _find_best_matches(path, index), repeat)
+            rows.append(_row("match", city.n_images, "points", len(path), stats, route_m=length, matched=matched))
+    return rows
+
+
+def bench_navigate(city: SyntheticCity, route_lengths: list[float], repeat: int) -> list[dict]:
+    rows = []
+    original = navigate_module._session
+    try:
+        for length in route_lengths:
+            session = FakeTmapSession(city.tmap_features(length))
+            navigate_module._session = session
+            n_points = len(navigate_module.navigate(("126.93", "37.55"), ("126.94", "37.56"), use_cache=False)["path"])
+            stats = measure(
+                lambda: navigate_module.navigate(("126.93", "37.55"), ("126.94", "37.56"), use_cache=False),
+                repeat,
+            )
+            rows.append(_row("navigate", len(session.features), "points", n_points, stats, route_m=length))
+    finally:
+        navigate_module._session = original
+    return rows
+
+
+def bench_merge(work: str, clips: int, size: str, engine: str, repeat: int) -> list[dict]:
+    clip_dir = os.path.join(work, "clips")
+    os.makedirs(clip_dir, exist_ok=True)
+    paths = make_synthetic_clips(clip_dir, clips, seconds=4, size=size, fps=24, gop=48)
+    out = os.path.join(work, "merged.mp4")
+    stats = measure(lambda: merge_videos(paths, out, engine=engine), repeat)
+    return [_row("merge", clips, "clips", clips, stats, engine=engine, resolution=size)]
+
+
+def _write_route_images(city: SyntheticCity, folder: str, limit: int) -> None:
+    """
+    e2e 용으로 실제로 읽을 수 있는 작은 PNG 이미지를 만듭니다 (Veo 제출 시 이미지를 읽으므로).
+    """
+    from PIL import Image
+
+    os.makedirs(folder, exist_ok=True)
+    for k, name in enumerate(city.filenames()[:limit]):
+        Image.new("RGB", (64, 36), ((k * 37) % 256, (k * 91) % 256, 128)).save(os.path.join(folder, name))
+
+
+def bench_e2e(work: str, route_m: float, veo_latency_s: float, size: str, repeat: int) -> list[dict]:
+    city = SyntheticCity(400, street_len_m=2000.0, seed=1)
+    folder = os.path.join(work, "e2e_images")
+    _write_route_images(city, folder, limit=400)
+    index = _quiet(lambda: ImageCatalog(folder, os.path.join(work, "e2e_catalog")).load().get_index())
+
+    template = make_synthetic_clips(work, 1, seconds=4, size=size, fps=24, gop=48)[0]
+    veo = FakeVeo(template, latency_s=veo_latency_s)
+    veo.install(interpolate_module)
+    session = FakeTmapSession(city.tmap_features(route_m), latency_s=0.05)
+    original = navigate_module._session
+    navigate_module._session = session
+
+    out_dir = os.path.join(work, "e2e_out")
+    state = {"transitions": 0}
+
+    def _run():
+        path = navigate_module.navigate(("126.93", "37.55"), ("126.94", "37.56"), use_cache=False)["path"]
+        images = _find_best_matches(path, index)
+        state["transitions"] = max(0, len(images) - 1)
+        interpolate_module.interpolate_images(
+            [os.path.join(folder, name) for name in images], "route.mp4", out_dir,
+            no_resume=True, backend="veo",
+        )
+
+    def _reset():
+        veo.requests = 0
+
+    try:
+        stats = measure(_run, repeat, warmup=0, setup=_reset)
+    finally:
+        navigate_module._session = original
+    return [_row(
+        "e2e", route_m, "transitions", state["transitions"], stats,
+        veo_latency_s=veo_latency_s, veo_requests=veo.requests,
+    )]
+
+
+# ---------------------------------------------------------------- 보고
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_BENCH_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def _key(r):
+        return (r["stage"], r["size"], r.get("route_m"))
+
+    base = {_key(r): r for r in baseline["results"]}
+    print(f"\n📊 비교: {baseline['meta'].get('git')} → {report['meta'].get('git')} (p50 비율, <1 이면 빨라짐)")
+    for r in report["results"]:
+        b = base.get(_key(r))
+        if not b or not b["p50_ms"]:
+            continue
+        ratio = r["p50_ms"] / b["p50_ms"]
+        print(f"{r['stage']:>16} size={r['size']:<8} {b['p50_ms']:10.2f}ms → {r['p50_ms']:10.2f}ms  x{ratio:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="경로 → 영상 파이프라인 벤치마크")
+    parser.add_argument("--stages", default=",".join(ALL_STAGES), help=f"실행할 단계 (가능: {','.join(ALL_STAGES)})")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="합성 카탈로그 이미지 수 (예: 1000,1000000)")
+    parser.add_argument("--disk_max", type=int, default=100_000, help="이 크기보다 큰 카탈로그는 폴더 스캔 단계를 건너뜀")
+    parser.add_argument("--route_lengths", default="200,1000,5000", help="합성 TMap 경로 길이(미터)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--merge_clips", type=int, default=10)
+    parser.add_argument("--clip_size", default="1280x720", help="합성 클립 해상도")
+    parser.add_argument("--merge_engine", default=MERGE_ENGINE)
+    parser.add_argument("--e2e_route", type=float, default=200, help="e2e 경로 길이(미터)")
+    parser.add_argument("--veo_latency", type=float, default=0.5, help="Veo 스텁 생성 시간(초)")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(ALL_STAGES)
+    if unknown:
+        parser.error(f"알 수 없는 단계: {sorted(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    route_lengths = [float(s) for s in args.route_lengths.split(",") if s]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work:
+        for size in sizes:
+            city = SyntheticCity(size)
+            if size <= args.disk_max and {"load_image_data", "catalog_cold", "catalog_warm"} & set(stages):
+                results += bench_catalog(stages, city, work, args.repeat)
+            if {"index_build", "match"} & set(stages):
+                results += bench_index_and_match(stages, city, route_lengths, args.repeat)
+
+        if "navigate" in stages:
+            results += bench_navigate(SyntheticCity(1000), route_lengths, args.repeat)
+        if "merge" in stages:
+            results += bench_merge(work, args.merge_clips, args.clip_size, args.merge_engine, max(1, args.repeat // 2))
+        if "e2e" in stages:
+            results += bench_e2e(work, args.e2e_route, args.veo_latency, args.clip_size, max(1, args.repeat // 2))
+
+    report = {
+        "meta": {
+            "git": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "params": vars(args),
+        },
+        "results": results,
+    }
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
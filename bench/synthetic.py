@@ -0,0 +1,161 @@
+"""
+벤치마크용 합성 데이터: 이미지 카탈로그, TMap 응답, Veo/GCS 스텁.
+
+    from synthetic import SyntheticCity
+    city = SyntheticCity(100_000)
+    city.filenames()               # "lon, lat, heading.png" 파일명 목록
+    city.tmap_features(1000)       # 약 1km 길이의 TMap 보행자 경로 응답(features)
+"""
+import math
+import os
+import shutil
+import time
+import types
+
+import numpy as np
+
+_M_PER_DEG = 111_320.0
+_LON0, _LAT0 = 126.93, 37.55
+
+
+class SyntheticCity:
+    """
+    직선 도로들 위에 spacing_m 간격으로 로드뷰 이미지가 찍혀 있는 가상의 도시.
+
+    이미지는 도로를 따라 조금씩 흔들린 위치와 진행 방향(heading, 실제 카탈로그와 같은 방위각:
+    북쪽 0°, 시계 방향)을 가지며, 같은 도로를 따라가는 TMap 응답을 만들어 매칭 벤치마크에 씁니다.
+    seed 가 같으면 결과가 같습니다.
+    """
+
+    def __init__(self, n_images: int, spacing_m: float = 5.0, street_len_m: float = 2000.0, seed: int = 0):
+        self.n_images = n_images
+        self.spacing_m = spacing_m
+        self.street_len_m = street_len_m
+        rng = np.random.default_rng(seed)
+
+        per_street = max(1, int(street_len_m // spacing_m))
+        n_streets = max(1, math.ceil(n_images / per_street))
+        # 도로 밀도가 크기와 관계없이 비슷하도록 영역을 넓힌다 (도로당 약 300m x 300m)
+        side_m = math.sqrt(n_streets) * 300.0
+
+        self.street_origin = rng.uniform(0, side_m, size=(n_streets, 2))
+        # 도로 방향 (배치 계산용 수학 각도: 동쪽 0°, 반시계 방향)
+        self.street_angle = rng.uniform(-180, 180, size=n_streets)
+
+        street = np.repeat(np.arange(n_streets), per_street)[:n_images]
+        along = np.tile(np.arange(per_street) * spacing_m, n_streets)[:n_images]
+        theta = np.radians(self.street_angle[street])
+        x = self.street_origin[street, 0] + along * np.cos(theta) + rng.normal(0, 0.5, n_images)
+        y = self.street_origin[street, 1] + along * np.sin(theta) + rng.normal(0, 0.5, n_images)
+
+        self.lons, self.lats = self._to_lonlat(x, y)
+        # 파일명 heading 은 카탈로그 기준(방위각)으로 변환
+        self.headings = (90.0 - self.street_angle[street] + rng.normal(0, 5, n_images)) % 360
+
+    @staticmethod
+    def _to_lonlat(x_m, y_m):
+        lon = _LON0 + np.asarray(x_m) / (_M_PER_DEG * math.cos(math.radians(_LAT0)))
+        lat = _LAT0 + np.asarray(y_m) / _M_PER_DEG
+        return lon, lat
+
+    def filenames(self) -> list[str]:
+        return [f"{lon}, {lat}, {h}.png" for lon, lat, h in zip(self.lons, self.lats, self.headings)]
+
+    def write_folder(self, folder: str) -> None:
+        """
+        빈 파일로 이미지 폴더를 만듭니다 (카탈로그 스캔은 파일명만 읽음).
+        """
+        os.makedirs(folder, exist_ok=True)
+        for name in self.filenames():
+            open(os.path.join(folder, name), "wb").close()
+
+    def tmap_features(self, length_m: float, street: int = 0, vertex_every_m: float = 25.0) -> list:
+        """
+        street 번 도로를 따라 length_m 만큼 걷는 TMap 보행자 경로 응답(features)을 만듭니다.
+        도로 길이를 넘으면 끝에서 90도 꺾어 계속 갑니다.
+        """
+        n = max(2, int(length_m // vertex_every_m) + 1)
+        d = np.arange(n) * vertex_every_m
+        theta = math.radians(self.street_angle[street % len(self.street_angle)])
+        ox, oy = self.street_origin[street % len(self.street_origin)]
+
+        straight = np.minimum(d, self.street_len_m)
+        turned = np.maximum(0.0, d - self.street_len_m)
+        x = ox + straight * math.cos(theta) - turned * math.sin(theta)
+        y = oy + straight * math.sin(theta) + turned * math.cos(theta)
+        lon, lat = self._to_lonlat(x, y)
+        coords = np.column_stack([lon, lat]).tolist()
+
+        # 실제 응답처럼 Point(안내 지점) 와 LineString(구간) 이 번갈아 나온다
+        features = []
+        for k in range(0, len(coords) - 1, 8):
+            seg = coords[k:k + 9]
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": seg[0]},
+                "properties": {"index": len(features), "pointType": "GP"},
+            })
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "LineString", "coordinates": seg},
+                "properties": {"index": len(features), "distance": int(vertex_every_m * (len(seg) - 1))},
+            })
+        return features
+
+
+class FakeTmapSession:
+    """
+    navigate 모듈의 requests 세션 대신 쓰는 스텁. 요청 좌표와 관계없이 준비된 응답을 돌려줍니다.
+    """
+
+    def __init__(self, features: list, latency_s: float = 0.0):
+        self.features = features
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def post(self, url, data=None, timeout=None):
+        self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return types.SimpleNamespace(
+            raise_for_status=lambda: None,
+            json=lambda: {"type": "FeatureCollection", "features": self.features},
+        )
+
+
+class FakeVeo:
+    """
+    Veo(genai 클라이언트)와 GCS 다운로드 스텁.
+
+    generate_videos 는 latency_s 뒤에 끝나는 operation 을 돌려주고, 결과 uri(gs://) 는
+    template_clip 을 복사하는 것으로 "다운로드" 됩니다. interpolate_images 의 실제 제출/폴링/저장
+    경로를 그대로 거칩니다.
+    """
+
+    def __init__(self, template_clip: str, latency_s: float = 0.5):
+        self.template_clip = template_clip
+        self.latency_s = latency_s
+        self.requests = 0
+        self.models = types.SimpleNamespace(generate_videos=self._generate_videos)
+        self.operations = types.SimpleNamespace(get=self._get)
+
+    def _operation(self, name: str, ready_at: float):
+        done = time.monotonic() >= ready_at
+        video = types.SimpleNamespace(uri=f"gs://bench-bucket/{name}.mp4")
+        response = types.SimpleNamespace(generated_videos=[types.SimpleNamespace(video=video)]) if done else None
+        return types.SimpleNamespace(name=name, ready_at=ready_at, done=done, response=response, error=None)
+
+    def _generate_videos(self, model, prompt, image, config):
+        self.requests += 1
+        return self._operation(f"op-{self.requests}", time.monotonic() + self.latency_s)
+
+    def _get(self, operation):
+        return self._operation(operation.name, operation.ready_at)
+
+    def download(self, gcs_uri: str, local_path: str) -> None:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        shutil.copyfile(self.template_clip, local_path)
+
+    def install(self, interpolate_module) -> None:
+        interpolate_module._client = self
+        interpolate_module.download = self.download
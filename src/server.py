@@ -1,32 +1,75 @@
+import asyncio
+import json
+import logging
 import os, dotenv
-import pprint
+from contextlib import asynccontextmanager
 dotenv.load_dotenv()
 
+import numpy as np
 import uvicorn
-import threading
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from pydantic import BaseModel
 
-from utils.navigate import navigate
+from utils.navigate import (
+    close_async_client, configure_local_router, configure_route_cache, navigate, navigate_async, navigate_many,
+)
 from utils.find_matching import find_matching
-from utils.interpolate_images import interpolate_images
+from utils.frame_cache import configure_frame_cache
+from utils.hls_stream import PLAYLIST_NAME, STREAM_HLS, HlsPlaylist
+from utils.image_catalog import ImageCatalog
+from utils.local_router import LOCAL_ROUTING, LocalRouter
+from utils.interpolate_images import generate_transitions, interpolate_images, transition_cache_checker
+from utils.logging_config import configure_logging
+from utils.metrics import CACHE_REQUESTS, CONTENT_TYPE, REGISTRY
+from utils.route_batch import BATCH_MAX_ROUTES, batch_key, distinct_pairs, is_batch_key, match_routes
+from utils.route_keys import RouteAliases, canonical_route_key, quantize_point, raw_route_key
+from utils.state_backend import Lease, open_state_backend
+from utils.transition_planner import plan_transitions
+from utils.video_cache import VideoCache
+from utils.video_serving import prepare_video, serve_video
+from utils.jobs import (
+    ACTIVE_STATES, DONE, FAILED, GENERATING, MATCHING, MERGING, NAVIGATING, QUEUED,
+    JobContext, JobQueue, JobStore,
+)
 
 
 ##############################################################################
 
+configure_logging()
+logger = logging.getLogger("server")
+
 HOST = os.getenv("HOST")
 PORT = os.getenv("PORT")
 DATA_DIR = os.getenv("DATA_DIR")
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
-cache: dict[str, str] = {}
+# TMap 경로 응답은 영상 캐시 옆(cache/routes)에 저장해 폴링/재요청 시 재사용
+configure_route_cache(os.path.join(DATA_DIR, "cache", "routes"))
+# Veo 입력용으로 변환한 프레임(16:9 JPEG)도 캐시 아래에 두고 재시작 후에도 재사용
+configure_frame_cache(os.path.join(DATA_DIR, "cache", "frames"))
+
+# 이미지 카탈로그/공간 인덱스는 서버 시작 시 한 번만 로드하고, 이후에는 변경분만 반영
+image_catalog = ImageCatalog(os.path.join(DATA_DIR, "images")).load()
+image_catalog.get_index()
+# 이미지가 촘촘히 덮고 있는 지역의 경로는 이미지 그래프에서 바로 찾고, 그 밖은 TMap 으로
+if LOCAL_ROUTING:
+    local_router = LocalRouter(image_catalog)
+    local_router.graph()
+    configure_local_router(local_router)
 
 ##############################################################################
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_async_client()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -36,68 +79,430 @@ app.add_middleware(
 )
 
 
-def gen_video(path_segments: list[list[float, float, float]], cache_key: str):
-    global cache
+def _route_payload(result: dict) -> dict:
+    # navigate() 결과의 경로 배열을 JSON 응답용 리스트로 변환
+    return {**result, "path": result["path"].tolist()}
+
+
+def _image_path(name: str) -> str:
+    return os.path.join(DATA_DIR, "images", name)
+
+
+def _video_path(canonical_key: str) -> str:
+    return os.path.join(DATA_DIR, "cache", f"{canonical_key}.mp4")
+
+
+def _video_url(video_path: str) -> str:
+    return f"/videos/{os.path.basename(video_path)}"
+
+
+def _cached_video(cache_key: str) -> str | None:
+    # 좌표 키 → 정규 키(매칭 이미지 순서 해시) → 영상 파일
+    canonical_key = route_aliases.get(cache_key)
+    if not canonical_key:
+        CACHE_REQUESTS.inc(cache="video", result="miss")
+        return None
+    return video_cache.get(canonical_key)
+
+
+def _checkout_video(canonical_key: str) -> str | None:
+    # pin 한 뒤 캐시에서 꺼낸다. 없으면 pin 을 풀고 None
+    video_cache.pin(canonical_key)
+    path = video_cache.get(canonical_key)
+    if path is None:
+        video_cache.unpin(canonical_key)
+    return path
+
+
+async def _serve_cached(request: Request, canonical_key: str, immutable: bool = False):
+    # 전송이 끝날 때까지 pin 해서 보내는 도중 축출되지 않게 한다. 캐시에 없으면 None
+    # (캐시 조회는 SQLite 쓰기 잠금을 기다리거나 파일 해시를 계산할 수 있으므로 이벤트 루프 밖에서)
+    path = await asyncio.to_thread(_checkout_video, canonical_key)
+    if path is None:
+        return None
+    return await serve_video(request, path, immutable, release=lambda: video_cache.unpin(canonical_key))
+
+
+def _hls_dir(cache_key: str) -> str:
+    return os.path.join(DATA_DIR, "hls", cache_key)
+
 
-    matching_images = find_matching(path_segments, os.path.join(DATA_DIR, "images"))
-    pprint.pprint(matching_images)
-    interpolate_images(
-        image_paths=[os.path.join(DATA_DIR, "images", image) for image in matching_images],
-        out_file=f"{cache_key}.mp4",
-        out_dir=os.path.join(DATA_DIR, "cache")
+def _is_cached_pair(cached_pair):
+    # transition_cache_checker 는 이미지 경로를 받으므로 파일명 → 경로로 감싼다
+    return lambda a, b: cached_pair(_image_path(a), _image_path(b))
+
+
+def gen_video(job: JobContext) -> str:
+    # 배치 작업이 미리 매칭해 둔 경로는 경로 탐색/매칭 없이 바로 다음 단계로
+    matching_images = job.payload.get("matched")
+    if matching_images is None:
+        matching_images = _match_route(job)
+
+    # 같은 이미지 순서로 이미 만든 영상이 있으면 생성 없이 재사용.
+    # 정규 키는 transition 계획 전의 전체 매칭 순서로 만든다 (계획은 그때의 클립 캐시 상태에 따라 달라짐).
+    # 작업이 끝날 때까지 pin 해서 재사용/생성 중인 영상이 축출되지 않게 한다
+    canonical_key = canonical_route_key(matching_images)
+    route_aliases.set(job.key, canonical_key)
+    with video_cache.pinned(canonical_key):
+        # 다른 좌표 요청(다른 워커/프로세스일 수도 있음)이 같은 영상을 만드는 중이면 끝날 때까지 기다렸다가 재사용
+        lease = Lease(state, f"video:{canonical_key}")
+        if not lease.acquire():
+            logger.info("⏳ 같은 영상을 다른 작업이 생성 중, 완료를 기다립니다: %s", canonical_key)
+            lease.acquire(blocking=True)
+        try:
+            return _produce_video(job, canonical_key, matching_images)
+        finally:
+            lease.release()
+
+
+def _match_route(job: JobContext) -> list[str]:
+    start_point = tuple(job.payload["start"])
+    end_point = tuple(job.payload["end"])
+
+    path_segments = job.payload.get("path")
+    if path_segments is None:
+        job.set_state(NAVIGATING)
+        path_segments = navigate(start_point, end_point)["path"]
+
+    job.set_state(MATCHING)
+    matching_images = find_matching(
+        np.asarray(path_segments, dtype=np.float64),
+        os.path.join(DATA_DIR, "images"),
+        index=image_catalog.get_index(),
+    )
+    logger.debug("매칭된 이미지 %d장: %s", len(matching_images), matching_images)
+    return matching_images
+
+
+def _plan_transitions(matching_images: list[str]) -> list[str]:
+    # 촘촘한 매칭 이미지 중 transition 을 만들 이미지만 고른다 (간격/최대 구간 수, 캐시된 구간 우선)
+    cached_pair = transition_cache_checker(os.path.join(DATA_DIR, "cache"))
+    return plan_transitions(matching_images, is_cached=_is_cached_pair(cached_pair))
+
+
+def _produce_video(job: JobContext, canonical_key: str, matching_images: list[str]) -> str:
+    video_path = video_cache.get(canonical_key)
+    if video_path:
+        logger.info("♻️ 동일한 이미지 순서의 영상 재사용: %s", canonical_key)
+        if STREAM_HLS:
+            # /gen-video 가 알려준 HLS 주소도 재생되도록 캐시된 영상으로 플레이리스트를 만든다
+            stream = HlsPlaylist(_hls_dir(job.key))
+            try:
+                stream.add_video(video_path)
+            finally:
+                stream.finish()
+        return video_path
+
+    # 배치 작업은 공유 transition 을 만들 때 쓴 계획을 그대로 넘겨준다
+    planned = job.payload.get("images") or _plan_transitions(matching_images)
+    video_path = _video_path(canonical_key)
+    job.set_state(GENERATING)
+    # 구간이 순서대로 끝날 때마다 HLS 세그먼트를 붙여, 병합 전에도 /hls/{key}/index.m3u8 로 재생 가능
+    stream = HlsPlaylist(_hls_dir(job.key)) if STREAM_HLS else None
+    try:
+        interpolate_images(
+            image_paths=[_image_path(image) for image in planned],
+            out_file=f"{canonical_key}.mp4",
+            out_dir=os.path.join(DATA_DIR, "cache"),
+            on_merge=lambda: job.set_state(MERGING),
+            on_clip=stream.add_clip if stream else None,
+        )
+    finally:
+        if stream:
+            stream.finish()
+
+    if not os.path.exists(video_path):
+        raise RuntimeError("영상이 생성되지 않았습니다. (매칭된 이미지가 부족하거나 모든 구간 생성 실패)")
+    # 첫 요청이 해시 계산을 기다리지 않도록 faststart 확인 / ETag 를 미리 준비한 뒤 용량 관리 대상에 등록
+    prepare_video(video_path)
+    video_cache.add(canonical_key)
+    return video_path
+
+
+def gen_batch(job: JobContext) -> str:
+    """
+    여러 경로를 묶어 처리합니다: 경로 탐색을 동시에 하고, 한 번 로드한 인덱스로 모두 매칭한 뒤
+    경로들이 공유하는 transition 을 중복 없이 한 번씩만 생성합니다.
+    이후 경로별 작업(매칭 결과와 이미지 계획 포함)을 제출하며, 그 작업들은 캐시된 클립을 병합만 합니다.
+    """
+    routes = job.payload["routes"]
+    priority = job.payload.get("priority", 0)
+    errors = {}
+
+    job.set_state(NAVIGATING)
+    missing = [route for route in routes if route.get("path") is None]
+    navigated = navigate_many([(tuple(route["start"]), tuple(route["end"])) for route in missing])
+    for route, result in zip(missing, navigated):
+        if isinstance(result, Exception):
+            errors[route["key"]] = f"navigate: {type(result).__name__}: {result}"
+        else:
+            route["path"] = result["path"].tolist()
+
+    job.set_state(MATCHING)
+    usable = [route for route in routes if route["key"] not in errors]
+    matched = match_routes(
+        [route["path"] for route in usable], os.path.join(DATA_DIR, "images"), image_catalog.get_index(),
+    )
+    planned = [None if images is None else _plan_transitions(images) for images in matched]
+    pairs = distinct_pairs(planned)
+    logger.info(
+        "📦 배치 %s: 경로 %d개, transition %d개 (경로별 합 %d개)",
+        job.key, len(usable), len(pairs), sum(max(0, len(images or []) - 1) for images in planned),
     )
 
-    cache[cache_key] = os.path.join(DATA_DIR, "cache", f"{cache_key}.mp4")
+    job.set_state(GENERATING)
+    failed = 0
+    image_pairs = [(_image_path(a), _image_path(b)) for a, b in pairs]
+    for i, _, err in generate_transitions(image_pairs, os.path.join(DATA_DIR, "cache")):
+        if err is not None:
+            failed += 1
+            logger.error("❌ 배치 transition 생성 실패: %s → %s: %r", *pairs[i], err)
+
+    for route, matching_images, images in zip(usable, matched, planned):
+        if not images or len(images) < 2:
+            errors[route["key"]] = "매칭된 이미지가 부족합니다."
+            continue
+        jobs.submit(
+            route["key"],
+            {
+                "start": route["start"], "end": route["end"], "path": route["path"],
+                "matched": matching_images, "images": images,
+            },
+            priority=priority,
+            rerun_done=True,
+        )
+    return json.dumps({"transitions": len(pairs), "failed_transitions": failed, "errors": errors}, ensure_ascii=False)
+
+
+def run_job(job: JobContext) -> str:
+    return gen_batch(job) if is_batch_key(job.key) else gen_video(job)
+
+
+# 작업 기록/경로 별칭은 DATA_DIR 의 SQLite 에 남아, 재시작 시 끝나지 않은 작업을 이어서 처리
+STATE_DB = os.path.join(DATA_DIR, "state.sqlite3")
+# 작업/영상 생성 lease 를 프로세스 사이에 공유해, 여러 워커로 띄워도 같은 경로를 한 번만 생성
+state = open_state_backend(STATE_DB)
+route_aliases = RouteAliases(STATE_DB)
+# 완성 영상 용량 관리 (VIDEO_CACHE_MAX_BYTES). 시작 시 디스크에 남아 있는 영상과 인덱스를 맞춤
+video_cache = VideoCache(os.path.join(DATA_DIR, "cache"), STATE_DB, hls_dir=os.path.join(DATA_DIR, "hls"), state=state)
+video_cache.reconcile()
+jobs = JobQueue(JobStore(STATE_DB), run_job, state=state)
+jobs.start()
 
 
 @app.get("/get-meta")
-def get_meta(startLat: str, startLng: str, endLat: str, endLng: str):
-    cache_key = f"{startLng},{startLat},{endLng},{endLat}"
-    start_point = (startLng, startLat)
-    end_point = (endLng, endLat)
+async def get_meta(startLat: str, startLng: str, endLat: str, endLng: str):
+    start_point = quantize_point((startLng, startLat))
+    end_point = quantize_point((endLng, endLat))
+    cache_key = raw_route_key(start_point, end_point)
 
-    if cache_key in cache and cache[cache_key] != "-1":
+    # SQLite 조회/갱신은 이벤트 루프 밖에서
+    job = await asyncio.to_thread(jobs.store.get, cache_key)
+    video_path = await asyncio.to_thread(_cached_video, cache_key)
+    if video_path:
         return {
             "key": cache_key,
-            "result": navigate(start_point, end_point),
+            "video": _video_url(video_path),
+            "result": _route_payload(await navigate_async(start_point, end_point)),
         }
 
-    if cache_key in cache:
-        raise HTTPException(status_code=201, detail="In Progress")
+    if job and job["state"] in ACTIVE_STATES:
+        raise HTTPException(status_code=201, detail=f"In Progress ({job['state']})")
+
+    if job and job["state"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Failed: {job['error']}")
 
     raise HTTPException(status_code=400, detail="invalid request")
 
 
 @app.get("/gen-video")
-def navigate_endpoint(startLat: str, startLng: str, endLat: str, endLng: str):
-    cache_key = f"{startLng},{startLat},{endLng},{endLat}"
-
-    if cache.get(cache_key):
-        if cache[cache_key] == "-1":
-            raise HTTPException(status_code=201, detail="In progress")
-        else:
-            return FileResponse(cache[cache_key])
+async def navigate_endpoint(
+    request: Request, startLat: str, startLng: str, endLat: str, endLng: str, priority: int = 0
+):
+    start_point = quantize_point((startLng, startLat))
+    end_point = quantize_point((endLng, endLat))
+    cache_key = raw_route_key(start_point, end_point)
 
-    if os.path.exists(os.path.join(DATA_DIR, "cache", f"{cache_key}.mp4")):
-        cache[cache_key] = os.path.join(DATA_DIR, "cache", f"{cache_key}.mp4")
-        return FileResponse(cache[cache_key])
+    canonical_key = await asyncio.to_thread(route_aliases.get, cache_key)
+    if canonical_key:
+        response = await _serve_cached(request, canonical_key)
+        if response is not None:
+            return response
+    else:
+        CACHE_REQUESTS.inc(cache="video", result="miss")
 
-    start_point = (startLng, startLat)
-    end_point = (endLng, endLat)
+    job = await asyncio.to_thread(jobs.store.get, cache_key)
+    if job and job["state"] in ACTIVE_STATES:
+        raise HTTPException(status_code=201, detail=f"In progress ({job['state']})")
 
-    result = navigate(start_point, end_point)
-    path_segments = result["path"]
+    result = await navigate_async(start_point, end_point)
 
-    cache[cache_key] = "-1"
-    threading.Thread(
-        target=gen_video,
-        args=(path_segments, cache_key),
-    ).start()
+    # 완료 기록은 있는데 파일이 없으면(삭제됨) 다시 생성.
+    # SQLite 쓰기 잠금을 기다릴 수 있으므로 이벤트 루프 밖에서 제출
+    await asyncio.to_thread(
+        jobs.submit,
+        cache_key,
+        {
+            "start": start_point,
+            "end": end_point,
+            "path": result["path"].tolist(),
+        },
+        priority=priority,
+        rerun_done=True,
+    )
 
-    return {
+    response = {
         "key": cache_key,
-        "result": result,
+        "result": _route_payload(result),
+    }
+    if STREAM_HLS:
+        response["hls"] = f"/hls/{cache_key}/{PLAYLIST_NAME}"
+    return response
+
+
+class RouteRequest(BaseModel):
+    startLat: str
+    startLng: str
+    endLat: str
+    endLng: str
+
+
+class BatchRequest(BaseModel):
+    routes: list[RouteRequest]
+    priority: int = 0
+
+
+def _ready_video(key: str) -> str | None:
+    # 좌표 키 → 정규 키 → 디스크에 있는 완성 영상 (상태 조회용이라 캐시 사용 기록은 남기지 않음)
+    canonical_key = route_aliases.get(key)
+    if canonical_key and os.path.exists(_video_path(canonical_key)):
+        return _video_path(canonical_key)
+    return None
+
+
+def _route_status(key: str, batch: dict, batch_keys: set[str]) -> dict:
+    # 경로별 상태: 완성 영상 > 진행 중/실패한 경로 작업 > 배치 진행 상태 (경로 작업이 아직 제출되기 전)
+    video_path = _ready_video(key)
+    if video_path:
+        return {"key": key, "state": DONE, "video": _video_url(video_path)}
+
+    job = jobs.store.get(key)
+    batch_active = key in batch_keys and batch["state"] in ACTIVE_STATES
+    if job is not None and (job["state"] in ACTIVE_STATES or (job["state"] == FAILED and not batch_active)):
+        status = {"key": key, "state": job["state"]}
+        if job["state"] == FAILED:
+            status["error"] = job["error"]
+        return status
+
+    if batch_active:
+        return {"key": key, "state": batch["state"]}
+    if key in batch_keys and batch["state"] == FAILED:
+        return {"key": key, "state": FAILED, "error": batch["error"]}
+    error = json.loads(batch["result"] or "{}").get("errors", {}).get(key) if key in batch_keys else None
+    if error:
+        return {"key": key, "state": FAILED, "error": error}
+    return {"key": key, "state": QUEUED}
+
+
+def _batch_status(batch_id: str) -> dict | None:
+    batch = jobs.store.get(batch_id)
+    if batch is None:
+        return None
+    batch_keys = {route["key"] for route in batch["payload"]["routes"]}
+    status = {
+        "batch": batch_id,
+        "state": batch["state"],
+        "routes": [_route_status(key, batch, batch_keys) for key in batch["payload"]["keys"]],
     }
+    if batch["state"] == DONE and batch["result"]:
+        result = json.loads(batch["result"])
+        status["transitions"] = result["transitions"]
+        status["failed_transitions"] = result["failed_transitions"]
+    return status
+
+
+def _submit_batch(request: BatchRequest) -> dict:
+    # 같은 좌표(양자화 후)의 경로는 한 번만
+    points = {}
+    for route in request.routes:
+        start_point = quantize_point((route.startLng, route.startLat))
+        end_point = quantize_point((route.endLng, route.endLat))
+        points.setdefault(raw_route_key(start_point, end_point), (start_point, end_point))
+
+    # 이미 영상이 있거나 다른 요청으로 진행 중인 경로는 배치에서 빼고 그 결과를 따른다
+    pending = []
+    for key, (start_point, end_point) in points.items():
+        job = jobs.store.get(key)
+        if _ready_video(key) or (job is not None and job["state"] in ACTIVE_STATES):
+            continue
+        pending.append({"key": key, "start": start_point, "end": end_point})
+
+    batch_id = batch_key(list(points))
+    jobs.submit(
+        batch_id,
+        {"keys": list(points), "routes": pending, "priority": request.priority},
+        priority=request.priority,
+        rerun_done=True,
+    )
+    return _batch_status(batch_id)
+
+
+@app.post("/gen-videos")
+async def batch_endpoint(request: BatchRequest):
+    if not request.routes:
+        raise HTTPException(status_code=400, detail="routes is empty")
+    if len(request.routes) > BATCH_MAX_ROUTES:
+        raise HTTPException(status_code=400, detail=f"too many routes (max {BATCH_MAX_ROUTES})")
+    # SQLite 쓰기 잠금을 기다릴 수 있으므로 이벤트 루프 밖에서 제출
+    return await asyncio.to_thread(_submit_batch, request)
+
+
+@app.get("/batches/{batch_id}")
+async def batch_status(batch_id: str):
+    status = await asyncio.to_thread(_batch_status, batch_id) if is_batch_key(batch_id) else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return status
+
+
+@app.api_route("/videos/{name}", methods=["GET", "HEAD"])
+async def video_file(request: Request, name: str):
+    # 정규 키(매칭 이미지 순서 해시) 주소는 내용이 바뀌지 않으므로 CDN/브라우저에 오래 캐시 가능
+    canonical_key, ext = os.path.splitext(name)
+    if ext != ".mp4" or len(canonical_key) != 40 or not all(c in "0123456789abcdef" for c in canonical_key):
+        raise HTTPException(status_code=404, detail="not found")
+    response = await _serve_cached(request, canonical_key, immutable=True)
+    if response is None:
+        raise HTTPException(status_code=404, detail="not found")
+    return response
+
+
+_HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+
+
+@app.get("/hls/{key}/{name}")
+async def hls_file(key: str, name: str):
+    media_type = _HLS_MEDIA_TYPES.get(os.path.splitext(name)[1])
+    hls_root = os.path.realpath(os.path.join(DATA_DIR, "hls"))
+    path = os.path.realpath(os.path.join(hls_root, key, name))
+    if media_type is None or name.startswith(".") or os.path.dirname(os.path.dirname(path)) != hls_root:
+        raise HTTPException(status_code=404, detail="not found")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="not found")
+
+    # 플레이리스트는 계속 늘어나므로 캐시하지 않고, 세그먼트는 한 번 쓰이면 바뀌지 않음
+    cache_control = "no-cache" if name == PLAYLIST_NAME else "public, max-age=3600"
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": cache_control})
+
+
+@app.get("/metrics")
+async def metrics():
+    # Prometheus 스크레이프용 (단계별 지연 히스토그램, 캐시 적중, 작업 수 등)
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 
 if __name__ == "__main__":
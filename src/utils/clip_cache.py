@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+TRANSITION_CACHE_DIR = os.getenv("TRANSITION_CACHE_DIR")
+TRANSITION_CACHE_MAX_BYTES = int(os.getenv("TRANSITION_CACHE_MAX_BYTES", str(20 * 1024**3)))
+# file_digest 가 기억해 두는 최대 파일 수 (넘으면 가장 오래 쓰지 않은 것부터 잊음)
+FILE_DIGEST_MEMO_SIZE = int(os.getenv("FILE_DIGEST_MEMO_SIZE", "100000"))
+
+# 최근 이 시간(초) 안에 사용된 클립은 다른 작업이 병합 중일 수 있으므로 축출하지 않는다
+_EVICT_GRACE_SECONDS = 60 * 60
+
+_digest_lock = threading.Lock()
+_digest_memo: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+
+
+def file_digest(path: str) -> str:
+    """
+    파일 내용의 sha256. (경로, 크기, mtime) 이 같으면 다시 읽지 않습니다 (최근 FILE_DIGEST_MEMO_SIZE 개).
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        cached = _digest_memo.get(memo_key)
+        if cached:
+            _digest_memo.move_to_end(memo_key)
+    if cached:
+        return cached
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+        while len(_digest_memo) > FILE_DIGEST_MEMO_SIZE:
+            _digest_memo.popitem(last=False)
+    return digest
+
+
+class TransitionCache:
+    """
+    (이미지 A 내용, 이미지 B 내용, 프롬프트, 모델, 길이, 해상도) 해시로 주소가 정해지는 transition 클립 캐시.
+
+    cache_dir/ab/abcdef....mp4 형태로 저장되며, 모든 경로(route)가 공유합니다.
+    용량이 max_bytes 를 넘으면 가장 오래 사용되지 않은 클립부터 지웁니다 (LRU, mtime 기준).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = TRANSITION_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._approx_bytes = None  # 매 put 마다 디렉토리 전체를 훑지 않도록 유지하는 추정 용량
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(
+        self,
+        img_a: str,
+        img_b: str,
+        prompt: str,
+        model_id: str,
+        duration_seconds: int,
+        resolution: str,
+    ) -> str:
+        payload = json.dumps([
+            file_digest(img_a),
+            file_digest(img_b),
+            prompt,
+            model_id,
+            duration_seconds,
+            resolution,
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp4")
+
+    def temp_path(self) -> str:
+        """
+        생성 중인 클립을 쓸 임시 경로 (같은 파일시스템이라 put 에서 원자적으로 이동 가능).
+        """
+        return os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}.mp4")
+
+    def get(self, key: str) -> str | None:
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # LRU 용 마지막 사용 시각 갱신
+        except FileNotFoundError:
+            CACHE_REQUESTS.inc(cache="transition", result="miss")
+            return None
+        CACHE_REQUESTS.inc(cache="transition", result="hit")
+        return path
+
+    def put(self, key: str, src_path: str) -> str:
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(src_path)
+        os.replace(src_path, path)
+
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            over = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def evict(self) -> None:
+        """
+        전체 용량이 max_bytes 를 넘으면 오래된 클립부터 삭제합니다.
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.cache_dir):
+                for f in files:
+                    if not f.endswith(".mp4") or f.startswith(".tmp-"):
+                        continue
+                    p = os.path.join(root, f)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, p))
+                    total += st.st_size
+
+            self._approx_bytes = total
+            if total <= self.max_bytes:
+                return
+
+            now = time.time()
+            for mtime, size, p in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if now - mtime < _EVICT_GRACE_SECONDS:
+                    break
+                try:
+                    os.remove(p)
+                    total -= size
+                    self._approx_bytes = total
+                    logger.info("🧹 transition 캐시 축출: %s", os.path.basename(p))
+                except FileNotFoundError:
+                    pass
+
+
+_caches_lock = threading.Lock()
+_caches: dict[str, TransitionCache] = {}
+
+
+def transition_cache(cache_dir: str) -> TransitionCache:
+    """
+    cache_dir 의 공용 TransitionCache. 작업마다 새로 만들면 첫 put 마다 용량 추정을 위해
+    디렉토리 전체를 다시 훑게 되므로, 같은 디렉토리는 프로세스에서 한 인스턴스를 씁니다.
+    """
+    cache_dir = os.path.abspath(cache_dir)
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = TransitionCache(cache_dir)
+        return _caches[cache_dir]
@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+# 동시에 받을 클립 수 (Veo 완료 콜백 스레드 수와 같게 맞춘다)
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "4"))
+# 스트리밍 단위. GCS 는 256KiB 의 배수여야 함
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("DOWNLOAD_CHUNK_BYTES", str(1024 * 1024)))
+DOWNLOAD_TIMEOUT = (
+    float(os.getenv("DOWNLOAD_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("DOWNLOAD_READ_TIMEOUT", "60")),
+)
+
+_clients_lock = threading.Lock()
+_gcs_client = None
+_http_session: requests.Session | None = None
+
+
+def _get_gcs_client():
+    """
+    프로세스 전체가 공유하는 GCS 클라이언트 (인증/커넥션 풀을 클립마다 새로 만들지 않음).
+    """
+    global _gcs_client
+    with _clients_lock:
+        if _gcs_client is None:
+            from google.cloud import storage
+
+            _gcs_client = storage.Client()  # ADC 기반 (gcloud auth application-default login 등)
+        return _gcs_client
+
+
+def _get_http_session() -> requests.Session:
+    global _http_session
+    with _clients_lock:
+        if _http_session is None:
+            session = requests.Session()
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS * 2, max_retries=retry)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+@contextmanager
+def atomic_file(local_path: str):
+    """
+    같은 디렉토리의 임시 파일에 쓰고, 끝까지 쓰였을 때만 local_path 로 원자적으로 옮깁니다.
+    (중간에 실패하면 반쯤 받은 파일이 남지 않음)
+    """
+    directory = os.path.dirname(os.path.abspath(local_path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{os.path.basename(local_path)}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, local_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _download_gcs(uri: str, f: BinaryIO) -> None:
+    bucket_name, _, blob_path = uri[len("gs://"):].partition("/")
+    client = _get_gcs_client()
+    # chunk_size 를 주면 한 번에 전부가 아니라 조각 단위로 받아 파일에 쓴다
+    blob = client.bucket(bucket_name).blob(blob_path, chunk_size=DOWNLOAD_CHUNK_BYTES)
+    blob.download_to_file(f, timeout=DOWNLOAD_TIMEOUT)
+
+
+def _download_http(uri: str, f: BinaryIO) -> None:
+    with _get_http_session().get(uri, stream=True, timeout=DOWNLOAD_TIMEOUT) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(DOWNLOAD_CHUNK_BYTES):
+            f.write(chunk)
+
+
+# URI 스킴별 다운로더 (열린 파일에 스트리밍으로 씀)
+DOWNLOADERS: dict[str, Callable[[str, BinaryIO], None]] = {
+    "gs": _download_gcs,
+    "http": _download_http,
+    "https": _download_http,
+}
+
+
+def download(uri: str, local_path: str) -> str:
+    """
+    gs:// 또는 http(s):// URI 를 local_path 로 스트리밍 다운로드합니다 (임시 파일 + 원자적 rename).
+    """
+    scheme = uri.partition("://")[0]
+    downloader = DOWNLOADERS.get(scheme)
+    if downloader is None:
+        raise RuntimeError(f"지원하지 않는 URI 형식입니다: {uri}")
+
+    logger.debug("⬇️ %s → 로컬 다운로드: %s", scheme, local_path)
+    with STAGE_SECONDS.time(stage="transition_download"):
+        with atomic_file(local_path) as f:
+            downloader(uri, f)
+    return local_path
+
+
+def write_bytes(data: bytes | bytearray | memoryview, local_path: str) -> str:
+    """
+    인라인으로 받은 영상 데이터를 원자적으로 씁니다 (복사 없이 memoryview 로 조각내어 씀).
+    """
+    view = memoryview(data)
+    with atomic_file(local_path) as f:
+        for i in range(0, len(view), DOWNLOAD_CHUNK_BYTES):
+            f.write(view[i:i + DOWNLOAD_CHUNK_BYTES])
+    return local_path
+
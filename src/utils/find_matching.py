@@ -1,135 +1,88 @@
+import logging
 import os
 import numpy as np
-import math
 
-# ==========================================
-# 1. 기본 유틸리티 함수들
-# ==========================================
-
-def _haversine_distance(lat1, lon1, lat2, lon2):
-    """
-    두 GPS 좌표 간의 거리를 미터(m) 단위로 계산합니다 (Haversine Formula).
-    """
-    R = 6371000  # 지구 반지름 (미터)
-
-    phi1, phi2 = np.radians(lat1), np.radians(lat2)
-    dphi = np.radians(lat2 - lat1)
-    dlambda = np.radians(lon2 - lon1)
+from utils.image_catalog import ImageCatalog, parse_image_filename
+from utils.match_engine import MATCH_MODE, match_route
+from utils.metrics import MATCHED_POINTS, STAGE_SECONDS
 
-    a = np.sin(dphi / 2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+logger = logging.getLogger(__name__)
 
-    return R * c
+# 경로 지점과 이미지를 매칭할 때 허용하는 최대 거리(m) / 진행 방향 차이(도)
+MATCH_MAX_DIST_M = 10.0
+MATCH_MAX_ANGLE_DEG = 90.0
 
-def _smallest_angle_diff(angle1, angle2):
-    """
-    두 각도 사이의 가장 작은 차이를 계산합니다.
-    """
-    diff = np.abs(angle1 - angle2)
-    return np.minimum(diff, 360 - diff)
+# ==========================================
+# 1. 기본 유틸리티 함수들
+# ==========================================
 
 def _load_image_data(image_folder):
     """
     폴더 내의 png 파일 이름을 파싱하여 데이터베이스를 구축합니다.
+    (카탈로그를 거치지 않는 검증/디버깅용 경로)
     """
     image_db = []
 
     if not os.path.exists(image_folder):
-        print(f"❌ 오류: '{image_folder}' 폴더가 존재하지 않습니다. 경로를 확인해주세요.")
+        logger.error("❌ 오류: '%s' 폴더가 존재하지 않습니다. 경로를 확인해주세요.", image_folder)
         return []
 
     files = [f for f in os.listdir(image_folder) if f.lower().endswith('.png')]
 
-    print(f"📂 '{image_folder}' 폴더에서 {len(files)}개의 이미지 파일을 찾았습니다.")
+    logger.info("📂 '%s' 폴더에서 %d개의 이미지 파일을 찾았습니다.", image_folder, len(files))
 
     for f in files:
-        try:
-            name_part = f.rsplit('.', 1)[0]
-            parts = name_part.replace(',', ' ').split()
-
-            if len(parts) < 3:
-                continue
-
-            lon = float(parts[0])
-            lat = float(parts[1])
-            heading = float(parts[2])
-
-            image_db.append({
-                'filename': f,
-                'lon': lon,
-                'lat': lat,
-                'heading': heading
-            })
-        except ValueError:
+        parsed = parse_image_filename(f)
+        if parsed is None:
             continue
 
+        lon, lat, heading = parsed
+        image_db.append({
+            'filename': f,
+            'lon': lon,
+            'lat': lat,
+            'heading': heading
+        })
+
     return image_db
 
-def _find_best_matches(path_data, image_db, max_dist_m=10.0, max_angle_deg=30.0):
+def load_image_index(image_folder, backend: str | None = None):
     """
-    경로 데이터와 이미지 DB를 비교하여 최적의 매칭 이미지를 찾습니다.
-    * 조건: 한 번 선택된 이미지는 다시 선택되지 않습니다 (중복 방지).
+    이미지 카탈로그를 로드(필요 시 증분 갱신)하고 공간 인덱스를 구축합니다.
     """
-    matches = []
-    used_indices = set()  # 이미 사용된 이미지 인덱스를 저장할 집합
+    return ImageCatalog(image_folder).load().get_index(backend)
 
-    if not image_db:
-        print("⚠️ 매칭할 이미지 데이터가 없습니다.")
+def _find_best_matches(path_data, index, max_dist_m=10.0, max_angle_deg=30.0, mode=None):
+    """
+    경로 데이터와 이미지 인덱스를 비교하여 최적의 매칭 이미지를 찾습니다.
+    * 조건: 한 번 선택된 이미지는 다시 선택되지 않습니다 (중복 방지).
+    * mode: "monotone"(기본, 경로 방향으로 되돌아가지 않는 전역 최적) / "greedy"(기존 방식)
+    """
+    if not len(index):
+        logger.warning("⚠️ 매칭할 이미지 데이터가 없습니다.")
         return [None] * len(path_data)
 
-    # numpy 배열로 변환
-    db_lons = np.array([img['lon'] for img in image_db])
-    db_lats = np.array([img['lat'] for img in image_db])
-    db_headings = np.array([img['heading'] for img in image_db])
-    filenames = [img['filename'] for img in image_db]
-
-    print(f"🚀 매칭 시작 (총 {len(path_data)}개 경로 지점, 중복 허용 X)...")
-
-    for i, (p_lon, p_lat, p_heading) in enumerate(path_data[:-1]):
-        # 1. 거리 계산
-        dists = _haversine_distance(p_lat, p_lon, db_lats, db_lons)
-
-        # 2. 각도 차이 계산
-        angle_diffs = _smallest_angle_diff(p_heading, db_headings)
-
-        # 3. 필터링 (거리 & 각도 조건)
-        valid_mask = (dists <= max_dist_m) & (angle_diffs <= max_angle_deg)
+    # navigate() 가 주는 (N, 3) 배열은 그대로 사용.
+    # 예전 list 형식은 기존 동작대로 마지막 지점을 항상 제외 (마지막 지점에는 heading 이 없던 형식)
+    if isinstance(path_data, np.ndarray):
+        points = path_data
+    else:
+        path_data = path_data[:-1]
+        points = np.asarray(path_data, dtype=np.float64).reshape(-1, 3)
 
-        # === 이미 사용된 이미지는 후보에서 강제로 제외 ===
-        if used_indices:
-            valid_mask[list(used_indices)] = False
+    logger.info("🚀 매칭 시작 (총 %d개 경로 지점, 중복 허용 X, mode=%s)...", len(path_data), mode or MATCH_MODE)
 
-        # 매칭 실패 시 처리
-        if not np.any(valid_mask):
-            # 디버깅 정보 출력
-            nearest_idx = np.argmin(dists)
-            nearest_file = filenames[nearest_idx]
-            nearest_dist = dists[nearest_idx]
-            nearest_angle_diff = angle_diffs[nearest_idx]
+    with STAGE_SECONDS.time(stage="matching"):
+        assignment = match_route(points, index, max_dist_m, max_angle_deg, mode=mode)
 
-            status_msg = ""
-            if nearest_idx in used_indices:
-                status_msg = " (❌ 이미 앞선 경로에서 사용됨)"
+    unmatched = [i for i, img in enumerate(assignment) if img is None]
+    MATCHED_POINTS.inc(len(assignment) - len(unmatched), result="matched")
+    MATCHED_POINTS.inc(len(unmatched), result="unmatched")
+    if unmatched:
+        logger.debug("매칭 실패 지점 %d개: %s%s", len(unmatched), unmatched[:20], " …" if len(unmatched) > 20 else "")
 
-            print(f"[DEBUG] Point {i}: 매칭 실패")
-            print(f"  └─ 가장 가까운 이미지: {nearest_file}{status_msg}")
-            print(f"  └─ 거리: {nearest_dist:.2f}m, 각도차: {nearest_angle_diff:.2f}°")
-            continue
-
-        # 4. 최적 선택 (거리순)
-        valid_indices = np.where(valid_mask)[0]
-        valid_dists = dists[valid_indices]
-
-        best_idx_in_valid = np.argmin(valid_dists)
-        original_idx = valid_indices[best_idx_in_valid]
-
-        matched_file = filenames[original_idx]
-        matches.append(matched_file)
-
-        # 선택된 이미지 인덱스 저장 (중복 방지)
-        used_indices.add(original_idx)
-
-    return matches
+    filenames = index.filenames
+    return [filenames[img] for img in assignment if img is not None]
 
 
 # ==========================================
@@ -137,48 +90,51 @@ def _find_best_matches(path_data, image_db, max_dist_m=10.0, max_angle_deg=30.0)
 # ==========================================
 
 def find_matching(
-    path_segments: list[list[float, float, float]],
+    path_segments: np.ndarray | list[list[float, float, float]],
     image_folder_path: str,
-    max_dist: float = 10.0,
-    max_angle: float = 90.0
+    max_dist: float = MATCH_MAX_DIST_M,
+    max_angle: float = MATCH_MAX_ANGLE_DEG,
+    index=None,
+    backend: str | None = None,
+    mode: str | None = None,
 ) -> list[str]:
     """
     이동 경로(path_points)와 이미지 폴더 경로를 입력받아 매칭 결과를 반환합니다.
 
     Args:
-        path_points (list): [[lon, lat, heading], ...] 형태의 리스트
+        path_segments (ndarray | list): (N, 3) [lon, lat, heading] 배열 또는 [[lon, lat, heading], ...] 리스트
         image_folder_path (str): 이미지가 저장된 폴더 경로
         max_dist (float): 매칭 허용 최대 거리 (미터)
         max_angle (float): 매칭 허용 최대 각도 차이 (도)
+        index: 미리 구축한 공간 인덱스 (없으면 폴더를 읽어 새로 구축)
+        backend (str): index 가 없을 때 사용할 인덱스 백엔드 ("grid", "brute")
+        mode (str): 매칭 모드 ("monotone", "greedy")
 
     Returns:
         list: 매칭된 파일명 리스트 (매칭 실패 시 None)
     """
-    print(f"\n=== 매칭 프로세스 시작 (폴더: {image_folder_path}) ===")
+    logger.info("=== 매칭 프로세스 시작 (폴더: %s) ===", image_folder_path)
 
-    # 1. 이미지 DB 로드
-    loaded_image_db = _load_image_data(image_folder_path)
-    print(loaded_image_db)
+    # 1. 공간 인덱스 준비 (서버에서는 시작 시 구축한 인덱스를 재사용)
+    if index is None:
+        index = load_image_index(image_folder_path, backend=backend)
 
     # 2. 매칭 실행 (중복 방지 로직 포함)
     final_results = _find_best_matches(
         path_segments,
-        loaded_image_db,
+        index,
         max_dist_m=max_dist,
-        max_angle_deg=max_angle
+        max_angle_deg=max_angle,
+        mode=mode,
     )
 
-    # 3. 결과 요약 출력
-    print("\n--- 최종 결과 요약 ---")
-    matched_count = 0
-    for i, filename in enumerate(final_results):
-        if filename:
-            print(f"경로 점 {i}: {filename}")
-            matched_count += 1
-        else:
-            print(f"경로 점 {i}: (매칭 없음)")
+    # 3. 결과 요약 (지점별 결과는 양이 많으므로 DEBUG 레벨에서만)
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, filename in enumerate(final_results):
+            logger.debug("경로 점 %d: %s", i, filename or "(매칭 없음)")
 
-    print(f"\n총 {len(path_segments)}개 지점 중 {matched_count}개 매칭 성공")
+    matched_count = sum(1 for f in final_results if f)
+    logger.info("총 %d개 지점 중 %d개 매칭 성공", len(path_segments), matched_count)
 
     return final_results
 
@@ -188,6 +144,9 @@ def find_matching(
 # ==========================================
 
 if __name__ == "__main__":
+    from utils.logging_config import configure_logging
+
+    configure_logging("DEBUG")
     print("Test for utils.find_matching")
     # 1. 경로 데이터 정의
     my_path = [
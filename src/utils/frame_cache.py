@@ -0,0 +1,153 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from PIL import Image
+
+from utils.clip_cache import file_digest
+from utils.local_interpolator import RESOLUTIONS, fit_frame
+from utils.metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+
+# 결과물이 바뀌면 올려서 캐시 키가 달라지게 한다
+FRAME_CACHE_VERSION = 1
+
+FRAME_CACHE_MEMORY_ENTRIES = int(os.getenv("FRAME_CACHE_MEMORY_ENTRIES", "256"))
+# 16:9 로 맞추는 방식: crop(가운데 잘라 채움) / letterbox(검은 여백)
+FRAME_FIT = os.getenv("FRAME_FIT", "crop")
+FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "90"))
+
+FRAME_MIME_TYPE = "image/jpeg"
+
+
+def _letterbox(path: str, size: tuple[int, int]) -> Image.Image:
+    """
+    이미지를 잘라내지 않고 size 안에 맞춘 뒤 남는 부분을 검은색으로 채웁니다.
+    """
+    w, h = size
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        scale = min(w / img.width, h / img.height)
+        resized = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.BILINEAR)
+    canvas = Image.new("RGB", size)
+    canvas.paste(resized, ((w - resized.width) // 2, (h - resized.height) // 2))
+    return canvas
+
+
+FRAME_FITS = {
+    "crop": fit_frame,
+    "letterbox": _letterbox,
+}
+
+
+class FrameCache:
+    """
+    Veo 입력 프레임 캐시. 원본 이미지(PNG 등)를 16:9 해상도 JPEG 로 한 번만 변환해 재사용합니다.
+
+    키는 원본 내용 해시 + 변환 설정이며, 메모리 LRU + (선택) 디스크(cache_dir/ab/<키>.jpg)에 저장합니다.
+    경로 안의 중간 이미지는 앞 구간의 마지막 프레임이자 다음 구간의 첫 프레임이므로 두 번 쓰이고,
+    다른 경로에서도 같은 이미지를 지나면 다시 쓰입니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        max_entries: int = FRAME_CACHE_MEMORY_ENTRIES,
+        fit: str = FRAME_FIT,
+        quality: int = FRAME_JPEG_QUALITY,
+    ):
+        if fit not in FRAME_FITS:
+            raise ValueError(f"지원하지 않는 프레임 맞춤 방식입니다: {fit} (가능: {list(FRAME_FITS)})")
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.fit = fit
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, path: str, resolution: str) -> str:
+        payload = json.dumps([file_digest(path), resolution, self.fit, self.quality, FRAME_CACHE_VERSION])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def _encode(self, path: str, resolution: str) -> bytes:
+        size = RESOLUTIONS.get(resolution)
+        if size is None:
+            raise ValueError(f"지원하지 않는 해상도입니다: {resolution} (가능: {list(RESOLUTIONS)})")
+        frame = FRAME_FITS[self.fit](path, size)
+        buf = io.BytesIO()
+        frame.save(buf, format="JPEG", quality=self.quality, optimize=True)
+        return buf.getvalue()
+
+    def get(self, path: str, resolution: str) -> bytes:
+        """
+        path 이미지를 resolution(예: "720p") 16:9 JPEG 바이트로 반환합니다. 없으면 변환해 저장합니다.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {path}")
+        key = self.key(path, resolution)
+        data = self._lookup(key)
+        if data is not None:
+            CACHE_REQUESTS.inc(cache="frame", result="hit")
+            return data
+
+        CACHE_REQUESTS.inc(cache="frame", result="miss")
+        with STAGE_SECONDS.time(stage="frame_prepare"):
+            data = self._encode(path, resolution)
+        self._remember(key, data)
+
+        if self.cache_dir:
+            disk_path = self._disk_path(key)
+            os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+            tmp = f"{disk_path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, disk_path)
+        return data
+
+
+# 프로세스 전역 프레임 캐시. 서버는 configure_frame_cache 로 디스크 저장소를 붙인다.
+_frame_cache = FrameCache()
+
+
+def configure_frame_cache(cache_dir: str | None) -> None:
+    """
+    프레임 캐시의 디스크 저장 위치를 설정합니다 (None 이면 메모리만 사용).
+    """
+    global _frame_cache
+    _frame_cache = FrameCache(cache_dir)
+
+
+def prepared_frame(path: str, resolution: str) -> bytes:
+    return _frame_cache.get(path, resolution)
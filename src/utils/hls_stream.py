@@ -0,0 +1,166 @@
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from utils.merge_videos import ClipInfo, run_ffmpeg, cut_clip
+from utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+STREAM_HLS = os.getenv("STREAM_HLS", "1") == "1"
+
+# 세그먼트 목표 길이(초, Veo 최대 길이). 키프레임 간격 때문에 실제 세그먼트가 더 길면
+# 플레이리스트의 TARGETDURATION 은 지금까지 쓴 가장 긴 세그먼트에 맞춰 올라간다
+HLS_TARGET_DURATION = int(os.getenv("HLS_TARGET_DURATION", "8"))
+
+PLAYLIST_NAME = "index.m3u8"
+
+
+def _extinf(line: str) -> float:
+    # "#EXTINF:7.958333," → 7.958333
+    return float(line[len("#EXTINF:"):].split(",", 1)[0])
+
+
+class HlsPlaylist:
+    """
+    transition 클립이 순서대로 완성될 때마다 fMP4 HLS 세그먼트로 바꿔 붙이는 EVENT 플레이리스트.
+
+    out_dir/index.m3u8 은 세그먼트가 추가될 때마다 원자적으로 다시 쓰이고, finish() 에서
+    #EXT-X-ENDLIST 가 붙습니다. 클라이언트는 첫 구간이 끝나자마자 재생을 시작할 수 있습니다.
+
+    각 클립은 최종 병합과 같은 방식(cut_clip)으로 뒤 trim_last_frames 프레임을 잘라내고,
+    조각마다 init 세그먼트가 다를 수 있으므로 #EXT-X-DISCONTINUITY + #EXT-X-MAP 으로 구분합니다.
+    #EXT-X-TARGETDURATION 은 target_duration 과 실제로 쓴 세그먼트 중 가장 긴 것(반올림) 중 큰 값입니다.
+    (MPEG-TS 대신 fMP4 를 쓰는 것은 번들 ffmpeg 가 TS 입력에서 비정상 종료하기 때문이기도 합니다.)
+    """
+
+    def __init__(self, out_dir: str, trim_last_frames: int = 7, target_duration: int = HLS_TARGET_DURATION):
+        self.out_dir = out_dir
+        self.trim_last_frames = trim_last_frames
+        self.target_duration = target_duration
+        self._lock = threading.Lock()
+        self._entries: list[str] = []
+        self._parts = 0
+        self._finished = False
+        # 지금까지 쓴 세그먼트 중 가장 긴 것 (EXTINF, 초)
+        self._longest_segment = 0.0
+
+        # 이전 실행(실패/재생성)의 세그먼트가 섞이지 않도록 비우고 시작
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.makedirs(out_dir, exist_ok=True)
+        self._write_playlist()
+
+    @property
+    def playlist_path(self) -> str:
+        return os.path.join(self.out_dir, PLAYLIST_NAME)
+
+    @property
+    def advertised_target_duration(self) -> int:
+        # 규격상 모든 세그먼트의 EXTINF(반올림) 가 TARGETDURATION 이하여야 한다
+        return max(self.target_duration, math.floor(self._longest_segment + 0.5))
+
+    def _write_playlist(self) -> None:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:7",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.advertised_target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+            *self._entries,
+        ]
+        if self._finished:
+            lines.append("#EXT-X-ENDLIST")
+
+        tmp = os.path.join(self.out_dir, f".{PLAYLIST_NAME}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.playlist_path)
+
+    def _package(self, part_path: str, name: str) -> list[str]:
+        """
+        mp4 조각 하나를 init + 미디어 세그먼트로 리먹싱하고, 플레이리스트에 넣을 줄들을 반환합니다.
+        """
+        tmp_playlist = os.path.join(self.out_dir, f".{name}.m3u8")
+        run_ffmpeg([
+            "-i", part_path, "-map", "0:v:0", "-c", "copy",
+            "-f", "hls", "-hls_segment_type", "fmp4",
+            "-hls_time", str(self.target_duration), "-hls_list_size", "0",
+            "-hls_fmp4_init_filename", f"{name}_init.mp4",
+            "-hls_segment_filename", os.path.join(self.out_dir, f"{name}_%d.m4s"),
+            tmp_playlist,
+        ])
+        try:
+            with open(tmp_playlist, "r", encoding="utf-8") as f:
+                lines = [l.strip() for l in f if l.strip()]
+        finally:
+            os.remove(tmp_playlist)
+
+        # 헤더는 버리고 MAP / EXTINF / 세그먼트 URI 만 가져온다
+        start = next(i for i, l in enumerate(lines) if l.startswith("#EXT-X-MAP"))
+        entries = [l for l in lines[start:] if l != "#EXT-X-ENDLIST"]
+        return ["#EXT-X-DISCONTINUITY", *entries] if self._parts else entries
+
+    def add_clip(self, clip_path: str) -> bool:
+        """
+        완성된 transition 클립을 다음 세그먼트(들)로 추가합니다. 실패하면 건너뛰고 False 를 반환합니다
+        (스트리밍은 보조 경로이므로 영상 생성 작업 자체를 실패시키지 않음).
+        """
+        return self._add(clip_path, self.trim_last_frames)
+
+    def add_video(self, video_path: str) -> bool:
+        """
+        이미 병합된 영상(캐시 재사용)을 자르지 않고 세그먼트로 추가합니다.
+        생성 없이 끝나는 작업도 같은 /hls 주소로 재생할 수 있게 하기 위함입니다.
+        """
+        return self._add(video_path, 0)
+
+    def _add(self, clip_path: str, trim_last_frames: int) -> bool:
+        with self._lock:
+            if self._finished:
+                return False
+            work_dir = tempfile.mkdtemp(prefix=".cut_", dir=self.out_dir)
+            started = time.perf_counter()
+            try:
+                info = ClipInfo(clip_path)
+                keep = info.frame_count - max(0, trim_last_frames)
+                if keep <= 0:
+                    logger.warning("⚠️ %s : 길이가 너무 짧아서 스트림에서 스킵합니다.", clip_path)
+                    return False
+
+                entries = []
+                for part in cut_clip(info, keep, work_dir, "part"):
+                    entries.extend(self._package(part, f"seg{self._parts:04d}"))
+                    self._parts += 1
+            except Exception as e:
+                logger.warning("⚠️ HLS 세그먼트 생성 실패, 스트림에서 건너뜁니다: %s %r", clip_path, e)
+                return False
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="hls_segment")
+            longest = max((_extinf(e) for e in entries if e.startswith("#EXTINF:")), default=0.0)
+            if longest > self.target_duration + 0.5:
+                logger.warning(
+                    "⚠️ HLS 세그먼트가 목표 길이보다 깁니다 (%.2f초 > %d초, 키프레임 간격 확인): %s",
+                    longest, self.target_duration, clip_path,
+                )
+            self._longest_segment = max(self._longest_segment, longest)
+            self._entries.extend(entries)
+            self._write_playlist()
+            return True
+
+    def finish(self) -> None:
+        """
+        #EXT-X-ENDLIST 를 붙여 스트림이 끝났음을 알립니다. (성공/실패와 관계없이 호출)
+        """
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            self._write_playlist()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import argparse
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+from utils.logging_config import configure_logging
+from utils.metrics import STAGE_SECONDS
+from utils.spatial_index import MATCH_INDEX_BACKEND, build_index
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_VERSION = 1
+
+
+def parse_image_filename(filename: str) -> tuple[float, float, float] | None:
+    """
+    "lon, lat, heading.png" 형태의 파일명을 (lon, lat, heading) 으로 파싱합니다.
+    형식이 맞지 않으면 None.
+    """
+    if not filename.lower().endswith('.png'):
+        return None
+
+    parts = filename.rsplit('.', 1)[0].replace(',', ' ').split()
+    if len(parts) < 3:
+        return None
+
+    try:
+        return float(parts[0]), float(parts[1]), float(parts[2])
+    except ValueError:
+        return None
+
+
+class FilenameTable:
+    """
+    파일명들을 하나의 UTF-8 바이트 덩어리 + 오프셋 배열로 보관하는 컴팩트한 테이블.
+    list[str] 처럼 인덱싱할 수 있습니다.
+    """
+
+    def __init__(self, blob, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    @classmethod
+    def from_list(cls, names: list[str]) -> "FilenameTable":
+        encoded = [n.encode("utf-8") for n in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return bytes(self._blob[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def tolist(self) -> list[str]:
+        return list(self)
+
+
+class ImageCatalog:
+    """
+    이미지 폴더의 (lon, lat, heading, filename) 을 디스크에 컬럼 형태로 저장해 두는 카탈로그.
+
+    store_dir/
+        coords.npy     (N, 3) float64 [lon, lat, heading]  - mmap 로드
+        names.bin      파일명 UTF-8 바이트 연결본            - mmap 로드
+        offsets.npy    (N+1,) int64 파일명 오프셋
+        meta.json      폴더 mtime, 개수, 버전
+
+    폴더 mtime 이 바뀐 경우에만 폴더를 다시 스캔하고, 추가/삭제된 파일만 반영합니다.
+    갱신은 스레드 잠금과 store_dir/.lock 파일 잠금(flock) 안에서 하므로 여러 스레드/워커 프로세스가
+    동시에 refresh() 해도 서로 다른 스캔의 파일이 섞이지 않습니다.
+    """
+
+    def __init__(self, image_folder: str, store_dir: str | None = None):
+        self.image_folder = image_folder
+        self.store_dir = store_dir or os.path.join(os.path.dirname(os.path.abspath(image_folder)), "catalog")
+
+        self.coords = np.empty((0, 3), dtype=np.float64)
+        self.filenames = FilenameTable.from_list([])
+        self.folder_mtime_ns = None
+
+        self._index = None
+        self._index_backend = None
+        # get_index() 가 refresh() 를 부르므로 재진입 가능해야 한다
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.filenames)
+
+    # ---------------------------------------------------------------- 저장소
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    @contextmanager
+    def _store_lock(self):
+        # 같은 저장소를 쓰는 다른 프로세스(uvicorn --workers, pregenerate 등)와의 갱신 직렬화
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(self._path(".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_store(self) -> bool:
+        try:
+            with open(self._path("meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != CATALOG_VERSION:
+                return False
+
+            coords = np.load(self._path("coords.npy"), mmap_mode="r")
+            offsets = np.load(self._path("offsets.npy"))
+            if len(coords):
+                blob = np.memmap(self._path("names.bin"), dtype=np.uint8, mode="r")
+            else:
+                blob = b""
+        except (OSError, ValueError):
+            return False
+
+        if len(coords) != meta.get("count") or len(offsets) != len(coords) + 1:
+            return False
+
+        self.coords = coords
+        self.filenames = FilenameTable(blob, offsets)
+        self.folder_mtime_ns = meta.get("folder_mtime_ns")
+        return True
+
+    def _save_store(self, coords: np.ndarray, names: list[str], folder_mtime_ns: int):
+        os.makedirs(self.store_dir, exist_ok=True)
+        table = FilenameTable.from_list(names)
+
+        # 각 파일을 (겹치지 않는 이름의) 임시 파일로 쓴 뒤 원자적으로 교체 (meta.json 을 마지막에 교체)
+        def _replace(name, write):
+            fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=self.store_dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp, self._path(name))
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+
+        _replace("coords.npy", lambda f: np.save(f, np.ascontiguousarray(coords, dtype=np.float64)))
+        _replace("offsets.npy", lambda f: np.save(f, table._offsets))
+        _replace("names.bin", lambda f: f.write(table._blob))
+        _replace("meta.json", lambda f: f.write(json.dumps({
+            "version": CATALOG_VERSION,
+            "count": len(names),
+            "folder_mtime_ns": folder_mtime_ns,
+        }).encode("utf-8")))
+
+    # ---------------------------------------------------------------- 동기화
+
+    def _folder_mtime_ns(self) -> int | None:
+        try:
+            return os.stat(self.image_folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self) -> "ImageCatalog":
+        """
+        디스크 저장소를 로드한 뒤, 폴더가 바뀌었으면 증분 갱신합니다.
+        """
+        self._load_store()
+        self.refresh()
+        return self
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        폴더 mtime 이 저장된 값과 다르면 폴더를 스캔해 추가/삭제분만 반영합니다.
+        force=True 이면 mtime 과 상관없이 스캔합니다.
+
+        Returns:
+            카탈로그 내용이 바뀌었으면 True
+        """
+        mtime_ns = self._folder_mtime_ns()
+        if mtime_ns is None:
+            logger.error("❌ 오류: '%s' 폴더가 존재하지 않습니다. 경로를 확인해주세요.", self.image_folder)
+            return False
+
+        if not force and mtime_ns == self.folder_mtime_ns:
+            return False
+
+        with self._lock, self._store_lock():
+            if not force:
+                # 잠금을 기다리는 동안 다른 스레드/프로세스가 같은 폴더 상태로 갱신해 두었으면 읽기만 한다
+                previous = self.folder_mtime_ns
+                if self._load_store() and self.folder_mtime_ns == mtime_ns:
+                    if previous == mtime_ns:
+                        return False
+                    self._index = None
+                    return True
+            return self._scan(mtime_ns)
+
+    def _scan(self, mtime_ns: int) -> bool:
+        started = time.perf_counter()
+        with os.scandir(self.image_folder) as it:
+            on_disk = {e.name for e in it if e.name.lower().endswith('.png')}
+
+        existing = self.filenames.tolist()
+        existing_set = set(existing)
+
+        removed = existing_set - on_disk
+        added = sorted(on_disk - existing_set)
+
+        if removed:
+            keep = np.fromiter((n not in removed for n in existing), dtype=bool, count=len(existing))
+            coords = np.asarray(self.coords)[keep]
+            names = [n for n, k in zip(existing, keep) if k]
+        else:
+            coords = np.asarray(self.coords)
+            names = existing
+
+        new_rows = []
+        new_names = []
+        for f in added:
+            parsed = parse_image_filename(f)
+            if parsed is None:
+                continue
+            new_rows.append(parsed)
+            new_names.append(f)
+
+        changed = bool(removed or new_names)
+        if new_rows:
+            coords = np.concatenate([coords, np.asarray(new_rows, dtype=np.float64)])
+            names = names + new_names
+
+        self._save_store(coords, names, mtime_ns)
+        self._load_store()
+        if changed:
+            self._index = None
+
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage="catalog_refresh")
+        logger.info(
+            "📂 이미지 카탈로그 갱신: +%d / -%d (총 %d개, %.1fms)",
+            len(new_names), len(removed), len(self), elapsed * 1000,
+        )
+        return changed
+
+    def reindex(self) -> None:
+        """
+        저장소를 무시하고 폴더 전체를 다시 스캔해 카탈로그를 재구축합니다.
+        """
+        with self._lock:
+            self.coords = np.empty((0, 3), dtype=np.float64)
+            self.filenames = FilenameTable.from_list([])
+            self._index = None
+            self.refresh(force=True)
+
+    # ---------------------------------------------------------------- 인덱스
+
+    def get_index(self, backend: str | None = None):
+        """
+        카탈로그로부터 공간 인덱스를 구축하거나, 바뀐 게 없으면 이전 인덱스를 재사용합니다.
+        """
+        # 기본값(None)도 실제 백엔드 이름으로 바꿔서 비교해야 같은 인덱스를 다시 만들지 않는다
+        backend = backend or MATCH_INDEX_BACKEND
+        with self._lock:
+            self.refresh()
+            if self._index is None or backend != self._index_backend:
+                with STAGE_SECONDS.time(stage="index_build"):
+                    self._index = build_index(
+                        self.coords[:, 0],
+                        self.coords[:, 1],
+                        self.coords[:, 2],
+                        self.filenames,
+                        backend=backend,
+                    )
+                self._index_backend = backend
+                logger.info("🗺️ 공간 인덱스 구축 완료 (backend=%s, 이미지 %d개)", self._index.name, len(self._index))
+            return self._index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로드뷰 이미지 카탈로그 관리")
+    parser.add_argument("image_folder", help="이미지 폴더 경로 (예: data/images)")
+    parser.add_argument("--store_dir", default=None, help="카탈로그 저장 경로 (기본: 이미지 폴더 옆 catalog/)")
+    parser.add_argument("--reindex", action="store_true", help="저장소를 무시하고 전체를 다시 스캔")
+    args = parser.parse_args()
+
+    configure_logging()
+    catalog = ImageCatalog(args.image_folder, args.store_dir)
+    if args.reindex:
+        catalog.reindex()
+    else:
+        catalog.load()
+    print(f"✅ 카탈로그 이미지 {len(catalog)}개 ({catalog.store_dir})")
+
+
+if __name__ == "__main__":
+    main()
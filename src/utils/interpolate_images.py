@@ -1,116 +1,141 @@
 #!/usr/bin/env python3
 import argparse
 import glob
+import logging
 import os
-import shutil
 
 from google import genai
 from dotenv import load_dotenv
 
-from typing import List
-from moviepy import VideoFileClip, concatenate_videoclips
-import os
+import threading
 import time
-from google.cloud import storage
+from concurrent.futures import Future
+from typing import Callable, Iterator
 
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
 
+from utils.clip_cache import TRANSITION_CACHE_DIR, TransitionCache, transition_cache
+from utils.downloads import DOWNLOAD_WORKERS, download, write_bytes
+from utils.frame_cache import FRAME_MIME_TYPE, prepared_frame
+from utils.local_interpolator import LOCAL_INTERPOLATOR_VERSION, interpolate_local
+from utils.logging_config import configure_logging
+from utils.merge_videos import merge_videos
+from utils.metrics import STAGE_SECONDS, TRANSITIONS, VEO_OPERATIONS_PENDING
+from utils.transition_scheduler import TransitionScheduler, is_quota_error
+from utils.veo_operations import OperationTracker
+
 load_dotenv()
 
-_api_key = os.getenv("API_KEY")
-_project = os.getenv("GOOGLE_CLOUD_PROJECT")
-_location = os.getenv("GOOGLE_CLOUD_LOCATION")
+logger = logging.getLogger(__name__)
 
-if not _api_key:
-    raise RuntimeError("API_KEY 환경변수가 없습니다.")
-if not _project or not _location:
-    raise RuntimeError("GOOGLE_CLOUD_PROJECT / GOOGLE_CLOUD_LOCATION 이 필요합니다.")
+VIDEO_MODEL_ID = os.getenv("VIDEO_MODEL_ID", "veo-3.1-generate-001")
 
-client = genai.Client()
+# transition 생성 백엔드: veo(Google Veo) / local(CPU 확대+크로스페이드)
+VIDEO_BACKEND = os.getenv("VIDEO_BACKEND", "veo")
+# 기본 백엔드가 쿼터 초과로 실패하면 대신 쓸 백엔드 (기본: 사용 안 함).
+# 대체 클립으로 병합한 영상도 같은 정규 키로 캐시되므로, 품질이 떨어져도 괜찮은 환경에서만 켠다
+VIDEO_FALLBACK_BACKEND = os.getenv("VIDEO_FALLBACK_BACKEND", "")
 
-VIDEO_MODEL_ID = os.getenv("VIDEO_MODEL_ID", "veo-3.1-generate-001")
+DEFAULT_PROMPT = (
+    "A smooth driving roadview video transitioning from the first frame "
+    "to the second frame, as if a camera is moving forward along the road."
+)
+TRANSITION_DURATION_SECONDS = 4
+TRANSITION_RESOLUTION = "720p"
 
 
-def _load_image(path: str) -> types.Image:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"이미지 파일을 찾을 수 없습니다: {path}")
-    return types.Image.from_file(location=path)
+_client_lock = threading.Lock()
+_client: genai.Client | None = None
 
 
-def _download_gcs_uri(gcs_uri: str, local_path: str) -> None:
+def _get_client() -> genai.Client:
     """
-    gs://bucket/path/to/file.mp4 형태의 URI를 로컬 파일로 다운로드.
+    Veo 백엔드를 처음 쓸 때 genai 클라이언트를 만듭니다.
+    (local 백엔드만 쓰는 환경에서는 Google Cloud 설정이 없어도 import/실행 가능)
     """
-    if not gcs_uri.startswith("gs://"):
-        raise ValueError(f"gs:// 로 시작하지 않는 URI 입니다: {gcs_uri}")
-
-    without_scheme = gcs_uri[len("gs://") :]
-    bucket_name, _, blob_path = without_scheme.partition("/")
+    global _client
+    with _client_lock:
+        if _client is None:
+            if not os.getenv("API_KEY"):
+                raise RuntimeError("API_KEY 환경변수가 없습니다.")
+            if not os.getenv("GOOGLE_CLOUD_PROJECT") or not os.getenv("GOOGLE_CLOUD_LOCATION"):
+                raise RuntimeError("GOOGLE_CLOUD_PROJECT / GOOGLE_CLOUD_LOCATION 이 필요합니다.")
+            _client = genai.Client()
+        return _client
 
-    client = storage.Client()  # ADC 기반 (gcloud auth application-default login 등)
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_path)
 
-    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-    blob.download_to_filename(local_path)
+def _load_image(path: str, resolution: str = TRANSITION_RESOLUTION) -> types.Image:
+    # 원본 PNG 대신 생성 해상도(16:9)에 맞춘 JPEG 을 보낸다 (원본 내용 해시로 캐시되어 구간/경로 간 재사용)
+    return types.Image(image_bytes=prepared_frame(path, resolution), mime_type=FRAME_MIME_TYPE)
 
 
-def _generate_transition_vertex(
+def _submit_transition_vertex(
     img_a: str,
     img_b: str,
-    out_path: str,
     prompt: str | None = None,
-    duration_seconds: int = 4,
+    duration_seconds: int = TRANSITION_DURATION_SECONDS,
+    resolution: str = TRANSITION_RESOLUTION,
 ):
     """
-    두 장의 이미지를 이용해 Veo 3.1로 프레임 보간 영상 생성.
+    두 장의 이미지를 이용해 Veo 3.1 프레임 보간 영상 생성을 요청하고, long-running operation 을 반환.
 
     img_a       : 시작 프레임 경로
     img_b       : 마지막 프레임 경로
-    out_path    : 저장할 mp4 경로
     prompt      : 없으면 기본 도로 주행 프롬프트 사용
     duration_seconds : 생성 영상 길이(초). Veo 기본은 8초지만 줄여도 됨.
+    resolution  : 생성 해상도 ("720p" 등)
     """
     if prompt is None:
-        prompt = (
-            "A smooth driving roadview video transitioning from the first frame "
-            "to the second frame, as if a camera is moving forward along the road."
-        )
+        prompt = DEFAULT_PROMPT
 
-    print(f"  ▶ Veo 3.1 요청: {os.path.basename(img_a)} → {os.path.basename(img_b)}")
+    logger.info("▶ Veo 3.1 요청: %s → %s", os.path.basename(img_a), os.path.basename(img_b))
 
     # 1) 로컬 이미지를 Veo용 Image 객체로 변환
-    first_image = _load_image(img_a)
-    last_image = _load_image(img_b)
+    first_image = _load_image(img_a, resolution)
+    last_image = _load_image(img_b, resolution)
 
     # 2) Veo 3.1에 프레임 보간 요청 (첫 프레임 + 마지막 프레임)
-    operation = client.models.generate_videos(
-    model=VIDEO_MODEL_ID,
-    prompt=prompt,
-    image=first_image,
-    config=types.GenerateVideosConfig(
-        last_frame=last_image,
-        duration_seconds=duration_seconds,
-        aspect_ratio="16:9",
-        resolution="720p",
-        number_of_videos=1,
-    ),
-)
+    with STAGE_SECONDS.time(stage="transition_submit"):
+        return _get_client().models.generate_videos(
+            model=VIDEO_MODEL_ID,
+            prompt=prompt,
+            image=first_image,
+            config=types.GenerateVideosConfig(
+                last_frame=last_image,
+                duration_seconds=duration_seconds,
+                aspect_ratio="16:9",
+                resolution=resolution,
+                number_of_videos=1,
+            ),
+        )
 
 
-    # 3) Long-running operation 폴링
-        # 3) Long-running operation 폴링
-    while not operation.done:
-        print("    ⏳ Veo 생성 중… (10초 대기)")
-        # 여기서는 그냥 기다리기만 하고,
-        # operation 객체는 그대로 둔다 (get으로 다시 가져오지 않음)
-        time.sleep(10)
+_tracker_lock = threading.Lock()
+_tracker: OperationTracker | None = None
 
-        # 필요하면 상태를 다시 받아오고 싶을 때는 name 기반으로 가져오는 게 안전함
-        operation = client.operations.get(operation)
 
+def _operation_tracker() -> OperationTracker:
+    """
+    모든 작업이 공유하는 Veo long-running operation 폴러.
+    """
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            # 완료 콜백은 대부분 클립 다운로드이므로 다운로드 동시성에 맞춘다
+            _tracker = OperationTracker(
+                lambda operation: _get_client().operations.get(operation),
+                completion_workers=DOWNLOAD_WORKERS,
+            )
+            VEO_OPERATIONS_PENDING.set_function(_tracker.pending)
+        return _tracker
+
+
+def _save_transition_video(operation, out_path: str) -> None:
+    """
+    완료된 Veo operation 의 결과 영상을 out_path 에 저장.
+    """
     # 4) 작업 결과 / 에러 확인
     if getattr(operation, "response", None) is None:
         op_err = getattr(operation, "error", None)
@@ -126,28 +151,14 @@ def _generate_transition_vertex(
     uri = getattr(video_obj, "uri", None) or getattr(video_obj, "gcs_uri", None)
 
     if uri:
-        print(f"    🎯 Veo video uri: {uri}")
-
-        if uri.startswith("gs://"):
-            print(f"    ⬇️ GCS → 로컬 다운로드: {out_path}")
-            _download_gcs_uri(uri, out_path)
-        elif uri.startswith("http://") or uri.startswith("https://"):
-            import requests
-
-            os.makedirs(os.path.dirname(out_path), exist_ok=True)
-            print(f"    ⬇️ HTTP → 로컬 다운로드: {out_path}")
-            resp = requests.get(uri)
-            resp.raise_for_status()
-            with open(out_path, "wb") as f:
-                f.write(resp.content)
-        else:
-            raise RuntimeError(f"지원하지 않는 URI 형식입니다: {uri}")
-
-        print(f"    ✅ Veo transition saved to {out_path}")
+        logger.debug("🎯 Veo video uri: %s", uri)
+        # 공용 GCS 클라이언트 / HTTP 세션으로 조각 단위 스트리밍 (out_path 는 캐시 임시 경로라 그대로 병합 입력이 됨)
+        download(uri, out_path)
+        logger.info("✅ Veo transition saved to %s", out_path)
         return
 
     # 4-2) uri가 없다면 → 인라인 비디오(video_bytes)로 온 경우 처리
-    print("    ℹ️ URI 없음, 인라인 비디오 데이터(video_bytes)로 처리합니다.")
+    logger.debug("ℹ️ URI 없음, 인라인 비디오 데이터(video_bytes)로 처리합니다.")
 
     data = None
 
@@ -168,112 +179,278 @@ def _generate_transition_vertex(
         # 여기서 다시 타입 확인해보고 싶으면 type(video_obj.video_bytes), dir(...) 찍어보면 됨
         raise RuntimeError(f"지원하지 않는 비디오 응답 형식입니다: {video_obj!r}")
 
-    os.makedirs(os.path.dirname(out_path), exist_ok=True)
-    with open(out_path, "wb") as f:
-        f.write(data)
+    write_bytes(data, out_path)
+    logger.info("✅ Veo transition saved to %s", out_path)
+
 
-    print(f"    ✅ Veo transition saved to {out_path}")
+def _start_transition_veo(
+    img_a: str,
+    img_b: str,
+    out_path: str,
+    prompt: str | None = None,
+    duration_seconds: int = TRANSITION_DURATION_SECONDS,
+    resolution: str = TRANSITION_RESOLUTION,
+) -> Future:
+    # 요청만 보내고 바로 반환. 완료 대기는 공유 폴러가, 다운로드는 완료 콜백이 처리
+    operation = _submit_transition_vertex(img_a, img_b, prompt, duration_seconds, resolution)
 
+    return _operation_tracker().track(operation, lambda op: _save_transition_video(op, out_path))
 
-def _merge_videos(
-    clip_paths: List[str],
-    output_file: str,
-    trim_last_frames: int = 7,
+
+def _start_transition_local(
+    img_a: str,
+    img_b: str,
+    out_path: str,
+    prompt: str | None = None,
+    duration_seconds: int = TRANSITION_DURATION_SECONDS,
+    resolution: str = TRANSITION_RESOLUTION,
 ) -> None:
-    """
-    여러 mp4 클립을 이어 붙여 하나의 영상으로 합친다.
-    각 클립의 마지막 `trim_last_frames` 프레임은 잘라낸다.
+    # 프롬프트는 쓰지 않는다 (확대 + 크로스페이드 고정)
+    interpolate_local(img_a, img_b, out_path, duration_seconds, resolution)
+
+
+# 각 백엔드는 out_path 에 클립을 저장합니다. 바로 끝나면 None, 비동기이면 Future 를 반환합니다.
+VIDEO_BACKENDS: dict[str, Callable[..., Future | None]] = {
+    "veo": _start_transition_veo,
+    "local": _start_transition_local,
+}
+
+
+def _backend_model_id(backend: str) -> str:
+    # 캐시 키에 들어가는 모델 식별자. 로컬 클립이 Veo 클립 자리를 차지하지 않도록 구분한다
+    return VIDEO_MODEL_ID if backend == "veo" else f"{backend}-v{LOCAL_INTERPOLATOR_VERSION}"
+
+
+_scheduler_lock = threading.Lock()
+_scheduler: TransitionScheduler | None = None
 
-    :param clip_paths: 이어 붙일 영상 경로 리스트 (앞에서부터 순서대로)
-    :param output_file: 최종 출력 파일 경로 (예: "roadview.mp4")
-    :param trim_last_frames: 각 클립에서 뒤에서 제거할 프레임 수
+
+def _shared_scheduler() -> TransitionScheduler:
+    """
+    모든 작업이 공유하는 transition 스케줄러.
+    VEO_MAX_IN_FLIGHT 와 쿼터 초과 대기는 경로별이 아니라 프로세스 전체에 걸린다.
     """
-    clips = []
-    used_fps = None
-
-    for path in clip_paths:
-        clip = VideoFileClip(path)
-
-        # fps 가져오기 (첫 번째 클립 기준)
-        fps = getattr(clip, "fps", None) or getattr(clip.reader, "fps", None)
-        if used_fps is None:
-            used_fps = fps
-
-        if trim_last_frames > 0 and fps:
-            trim_sec = trim_last_frames / fps
-        else:
-            trim_sec = 0.0
-
-        # 너무 짧은 클립이면 스킵
-        new_duration = max(0.0, clip.duration - trim_sec)
-        if new_duration <= 0:
-            print(f"⚠️ {path} : 길이가 너무 짧아서 스킵합니다.")
-            clip.close()
-            continue
-
-        # 0 ~ new_duration 구간만 사용
-        trimmed = clip.subclipped(0, new_duration)
-        clips.append(trimmed)
-
-    if not clips:
-        raise RuntimeError("합칠 클립이 없습니다. (모두 스킵되었거나 존재하지 않음)")
-
-    print(f"🧵 {len(clips)}개의 클립을 병합합니다. (클립당 뒤에서 {trim_last_frames}프레임 제거)")
-
-    final_clip = concatenate_videoclips(clips, method="compose")
-    final_clip.write_videofile(
-        output_file,
-        fps=used_fps or 30,  # fps 정보가 없으면 30으로
-        codec="libx264",
-        audio=False,
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TransitionScheduler()
+        return _scheduler
+
+
+def _transition_key(clip_cache: TransitionCache, backend: str, img_a: str, img_b: str) -> str:
+    return clip_cache.key(
+        img_a, img_b, DEFAULT_PROMPT, _backend_model_id(backend),
+        TRANSITION_DURATION_SECONDS, TRANSITION_RESOLUTION,
     )
 
-    # 리소스 정리
-    for c in clips:
-        c.close()
-    final_clip.close()
+
+def transition_cache_checker(
+    out_dir: str,
+    cache_dir: str | None = None,
+    backend: str | None = None,
+) -> Callable[[str, str], bool]:
+    """
+    (이미지 A 경로, 이미지 B 경로) 의 transition 이 이미 캐시에 있는지 확인하는 함수를 반환합니다.
+    interpolate_images 와 같은 캐시 위치/키를 쓰며, 사용 기록(LRU)은 건드리지 않습니다 (transition 계획용).
+    """
+    backend = backend or VIDEO_BACKEND
+    clip_cache = transition_cache(cache_dir or TRANSITION_CACHE_DIR or os.path.join(out_dir, "transitions"))
+
+    def _cached(img_a: str, img_b: str) -> bool:
+        return os.path.exists(clip_cache.path_for(_transition_key(clip_cache, backend, img_a, img_b)))
+
+    return _cached
+
+
+def _generate_transition_vertex(
+    img_a: str,
+    img_b: str,
+    out_path: str,
+    prompt: str | None = None,
+    duration_seconds: int = TRANSITION_DURATION_SECONDS,
+    resolution: str = TRANSITION_RESOLUTION,
+    backend: str | None = None,
+):
+    """
+    두 장의 이미지 사이 transition 을 생성해 out_path 에 저장할 때까지 기다립니다 (동기 버전).
+    """
+    pending = VIDEO_BACKENDS[backend or VIDEO_BACKEND](img_a, img_b, out_path, prompt, duration_seconds, resolution)
+    if isinstance(pending, Future):
+        pending.result()
+
+
+def generate_transitions(
+        pairs: list[tuple[str, str]],
+        out_dir: str,
+        no_resume: bool = False,
+        max_in_flight: int | None = None,
+        cache_dir: str | None = None,
+        backend: str | None = None,
+        scheduler: TransitionScheduler | None = None,
+    ) -> Iterator[tuple[int, str | None, Exception | None]]:
+    """
+    (이미지 A, 이미지 B) 쌍들의 transition 을 생성(또는 캐시에서 재사용)해 캐시에 저장합니다.
+
+    모든 쌍을 한 번에 스케줄러에 제출하고, (순번, 클립 경로, 에러) 를 입력 순서대로 yield 합니다.
+    scheduler 를 주면 그 동시 실행 수/요청 속도 제한을 따릅니다. 없으면 max_in_flight 를 준 경우에만
+    새로 만들고, 그 외에는 프로세스 공용 스케줄러를 씁니다.
+    backend 는 생성 백엔드("veo", "local")이며, VIDEO_FALLBACK_BACKEND 를 설정한 경우에만 쿼터 초과 시 그 백엔드로 대신 생성합니다.
+    """
+    backend = backend or VIDEO_BACKEND
+    fallback = VIDEO_FALLBACK_BACKEND if VIDEO_FALLBACK_BACKEND != backend else None
+    for name in (backend, fallback):
+        if name and name not in VIDEO_BACKENDS:
+            raise ValueError(f"지원하지 않는 생성 백엔드입니다: {name} (가능: {list(VIDEO_BACKENDS)})")
+
+    clip_cache = transition_cache(cache_dir or TRANSITION_CACHE_DIR or os.path.join(out_dir, "transitions"))
+
+    total = len(pairs)
+    tasks = [(i, img_a, img_b) for i, (img_a, img_b) in enumerate(pairs)]
+    if scheduler is None:
+        scheduler = _shared_scheduler() if max_in_flight is None else TransitionScheduler(max_in_flight=max_in_flight)
+
+    def _produce(name: str, i: int, img_a: str, img_b: str) -> str | Future:
+        key = _transition_key(clip_cache, name, img_a, img_b)
+
+        if not no_resume:
+            cached = clip_cache.get(key)
+            if cached:
+                logger.info("⏭  캐시된 transition 재사용: %s → %s", os.path.basename(img_a), os.path.basename(img_b))
+                return cached
+
+        logger.info("🎬 (%d/%d) [%s] %s → %s", i + 1, total, name, os.path.basename(img_a), os.path.basename(img_b))
+        scheduler.throttle()
+        tmp_path = clip_cache.temp_path()
+        started = time.perf_counter()
+
+        def _store(_=None) -> str:
+            try:
+                path = clip_cache.put(key, tmp_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="transition_generate")
+            TRANSITIONS.inc(backend=name, result="ok")
+            return path
+
+        try:
+            pending = VIDEO_BACKENDS[name](img_a, img_b, tmp_path)
+        except BaseException:
+            TRANSITIONS.inc(backend=name, result="failed")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if not isinstance(pending, Future):
+            return _store()
+
+        stored: Future = Future()
+
+        def _done(f: Future):
+            try:
+                f.result()
+                stored.set_result(_store())
+            except BaseException as e:
+                TRANSITIONS.inc(backend=name, result="failed")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                stored.set_exception(e)
+
+        pending.add_done_callback(_done)
+        return stored
+
+    def _fallback(i: int, img_a: str, img_b: str, err: BaseException) -> str:
+        logger.warning("🪫 (%d/%d) %s 쿼터 초과, %s 백엔드로 대신 생성합니다: %r", i + 1, total, backend, fallback, err)
+        result = _produce(fallback, i, img_a, img_b)
+        return result.result() if isinstance(result, Future) else result
+
+    def _generate(pair) -> str | Future:
+        i, img_a, img_b = pair
+        try:
+            result = _produce(backend, i, img_a, img_b)
+        except Exception as e:
+            if fallback and is_quota_error(e):
+                return _fallback(i, img_a, img_b, e)
+            raise
+        if not fallback or not isinstance(result, Future):
+            return result
+
+        # 생성 도중(operation 결과) 쿼터 초과로 끝난 경우에도 대체 백엔드로 넘긴다
+        final: Future = Future()
+
+        def _done(f: Future):
+            try:
+                final.set_result(f.result())
+            except Exception as e:
+                if not is_quota_error(e):
+                    final.set_exception(e)
+                    return
+                try:
+                    final.set_result(_fallback(i, img_a, img_b, e))
+                except Exception as fe:
+                    final.set_exception(fe)
+
+        result.add_done_callback(_done)
+        return final
+
+    yield from scheduler.run(tasks, _generate)
 
 
 def interpolate_images(
         image_paths: str,
         out_file: str,
         out_dir: str,
-        no_resume: bool = False
+        no_resume: bool = False,
+        max_in_flight: int | None = None,
+        cache_dir: str | None = None,
+        on_merge: Callable[[], None] | None = None,
+        on_clip: Callable[[str], None] | None = None,
+        backend: str | None = None,
     ) -> None:
-    clip_dir = os.path.join(out_dir, "clips")
-    os.makedirs(clip_dir, exist_ok=True)
-
-    clip_paths = []
+    """
+    이미지들 사이의 transition 을 생성(또는 캐시에서 재사용)해 하나의 영상으로 병합합니다.
 
-    for i in range(len(image_paths) - 1):
-        img_a = image_paths[i]
-        img_b = image_paths[i + 1]
+    transition 클립은 내용 해시로 주소가 정해지는 공유 캐시(cache_dir, 기본: out_dir/transitions)에
+    저장되므로, 같은 이미지 쌍을 지나는 다른 경로에서도 다시 생성하지 않습니다.
+    no_resume=True 이면 캐시를 무시하고 새로 생성합니다.
+    on_merge 는 병합 단계에 들어갈 때 호출됩니다 (작업 상태 기록용).
+    on_clip 은 클립이 경로 순서대로 준비될 때마다 호출됩니다 (점진적 스트리밍용).
+    backend 는 생성 백엔드("veo", "local")이며, VIDEO_FALLBACK_BACKEND 를 설정한 경우에만 쿼터 초과 시 그 백엔드로 대신 생성합니다.
 
-        clip_name = f"transition_{i+1:03d}.mp4"
-        clip_path = os.path.join(clip_dir, clip_name)
+    재시도 후에도 실패한 구간이 있으면 RuntimeError 를 냅니다. 구간이 빠진 영상이 정규 영상으로
+    캐시되지 않도록 병합하지 않으며, 이미 만든 클립은 캐시에 남아 다시 요청할 때 재사용됩니다.
+    """
+    pairs = list(zip(image_paths, image_paths[1:]))
+    total = len(pairs)
 
-        if not no_resume and os.path.exists(clip_path):
-            print(f"⏭  이미 존재, 스킵: {clip_path}")
+    # 모든 구간을 한 번에 제출하고, 끝나는 대로 순서대로 모은다
+    clip_paths = []
+    results = generate_transitions(pairs, out_dir, no_resume, max_in_flight, cache_dir, backend)
+    try:
+        for i, clip_path, err in results:
+            if err is not None:
+                logger.error("❌ (%d/%d) 구간 생성 실패, 영상 생성을 중단합니다: %r", i + 1, total, err)
+                raise RuntimeError(f"transition {i + 1}/{total} 생성 실패: {err!r}") from err
             clip_paths.append(clip_path)
-            continue
-
-        print(f"🎬 ({i+1}/{len(image_paths)-1}) {os.path.basename(img_a)} → {os.path.basename(img_b)}")
-        _generate_transition_vertex(img_a, img_b, clip_path)
-        clip_paths.append(clip_path)
+            if on_clip:
+                on_clip(clip_path)
+    finally:
+        # 남은 구간 중 아직 시작하지 않은 것은 공용 스케줄러 대기열에서 뺀다
+        results.close()
 
     if not clip_paths:
-        print("❌ 생성된 클립이 없습니다.")
+        logger.error("❌ 생성된 클립이 없습니다.")
         return
 
-    print("🧵 클립 병합 중…")
-    _merge_videos(clip_paths, os.path.join(out_dir, out_file))
-    print("🎉 최종 영상 생성 완료:", os.path.join(out_dir, out_file))
-    print(f"🧹 중간 클립 정리: {clip_dir}")
-    shutil.rmtree(clip_dir)
+    if on_merge:
+        on_merge()
+    logger.info("🧵 클립 병합 중…")
+    merge_videos(clip_paths, os.path.join(out_dir, out_file))
+    logger.info("🎉 최종 영상 생성 완료: %s", os.path.join(out_dir, out_file))
 
 
 def main():
     load_dotenv()  # .env 로드
+    configure_logging()
 
     parser = argparse.ArgumentParser(
         description="Streetview 이미지들을 Veo(구글)로 보간해서 영상으로 만드는 스크립트"
@@ -291,12 +468,12 @@ def main():
     parser.add_argument(
         "--out_dir",
         default="demo_out",
-        help="중간 transition 클립을 저장할 디렉토리 (기본: demo_out)",
+        help="최종 영상과 transition 캐시(transitions/)를 저장할 디렉토리 (기본: demo_out)",
     )
     parser.add_argument(
         "--no_resume",
         action="store_true",
-        help="이미 존재하는 클립이 있어도 무조건 다시 생성",
+        help="캐시된 클립이 있어도 무조건 다시 생성",
     )
 
     args = parser.parse_args()
@@ -0,0 +1,284 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+from utils.metrics import JOBS, JOBS_IN_FLIGHT, JOBS_QUEUED, STAGE_SECONDS
+from utils.state_backend import LEASE_SECONDS, SQLITE_TIMEOUT_SECONDS, Lease, MemoryStateBackend, StateBackend
+
+logger = logging.getLogger(__name__)
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+QUEUED = "queued"
+NAVIGATING = "navigating"
+MATCHING = "matching"
+GENERATING = "generating"
+MERGING = "merging"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATES = (QUEUED, NAVIGATING, MATCHING, GENERATING, MERGING)
+
+
+class JobStore:
+    """
+    영상 생성 작업 기록을 SQLite 에 저장합니다. 서버가 재시작되어도 상태가 유지됩니다.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None, timeout=SQLITE_TIMEOUT_SECONDS,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                key         TEXT PRIMARY KEY,
+                state       TEXT NOT NULL,
+                priority    INTEGER NOT NULL DEFAULT 0,
+                payload     TEXT NOT NULL,
+                result      TEXT,
+                error       TEXT,
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                created_at  REAL NOT NULL,
+                updated_at  REAL NOT NULL
+            )
+        """)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+        return self._to_dict(row)
+
+    def create_or_get(
+        self,
+        key: str,
+        payload: dict,
+        priority: int = 0,
+        replace_states: tuple[str, ...] = (FAILED,),
+    ) -> tuple[dict, bool]:
+        """
+        같은 key 의 작업이 진행 중이거나 완료되었으면 그대로 반환하고(중복 제거),
+        없거나 replace_states(기본: 실패) 상태인 작업이면 새로 queued 상태로 만듭니다.
+
+        Returns:
+            (작업, 새로 큐에 넣어야 하면 True)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+                if row is not None and row["state"] not in replace_states:
+                    self._conn.execute("COMMIT")
+                    return self._to_dict(row), False
+
+                self._conn.execute(
+                    """
+                    INSERT INTO jobs (key, state, priority, payload, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        state = excluded.state, priority = excluded.priority, payload = excluded.payload,
+                        result = NULL, error = NULL, updated_at = excluded.updated_at
+                    """,
+                    (key, QUEUED, priority, json.dumps(payload), now, now),
+                )
+                row = self._conn.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row), True
+
+    def set_state(self, key: str, state: str, result: str | None = None, error: str | None = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, result = COALESCE(?, result), error = ?, updated_at = ? WHERE key = ?",
+                (state, result, error, time.time(), key),
+            )
+
+    def begin_attempt(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+
+    def finished(self, limit: int | None = None) -> list[dict]:
+        """
+        완료된 작업들 (최근 것부터). 오프라인 사전 생성의 요청 기록으로 씁니다.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE state = ? ORDER BY updated_at DESC LIMIT ?",
+                (DONE, -1 if limit is None else limit),
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def unfinished(self) -> list[dict]:
+        placeholders = ",".join("?" * len(ACTIVE_STATES))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY priority DESC, created_at",
+                ACTIVE_STATES,
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+
+class JobContext:
+    """
+    작업 핸들러에 넘겨지는 컨텍스트. 단계가 바뀔 때마다 set_state 로 기록합니다.
+    """
+
+    def __init__(self, store: JobStore, job: dict):
+        self._store = store
+        self.key = job["key"]
+        self.payload = job["payload"]
+
+    def set_state(self, state: str) -> None:
+        self._store.set_state(self.key, state)
+
+
+class JobQueue:
+    """
+    우선순위 큐 + 고정 개수의 워커 스레드로 작업을 처리합니다.
+
+    * 동시에 처리하는 작업은 workers 개로 제한됩니다 (요청이 몰려도 스레드가 늘지 않음).
+    * 같은 key 의 작업은 한 번만 실행됩니다. 실행 전에 state 백엔드의 lease("job:<key>")를 차지하므로
+      같은 JobStore 를 쓰는 여러 프로세스(uvicorn --workers)가 떠 있어도 중복 실행되지 않습니다.
+    * 시작 시, 그리고 LEASE_SECONDS 마다 보유자가 없는 미완료 작업(재시작/프로세스 종료로 중단된 것)을
+      다시 큐에 넣습니다.
+    * 핸들러에서 예외가 나면 failed 상태와 에러 메시지를 남깁니다 (영원히 진행 중으로 남지 않음).
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[JobContext], str | None],
+        workers: int = JOB_WORKERS,
+        state: StateBackend | None = None,
+        lease_seconds: float = LEASE_SECONDS,
+    ):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.state = state or MemoryStateBackend()
+        self.lease_seconds = lease_seconds
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads: list[threading.Thread] = []
+        self._enqueued_lock = threading.Lock()
+        self._enqueued: set[str] = set()
+        JOBS_QUEUED.set_function(self.pending)
+
+    def start(self) -> None:
+        resumed = self._requeue_orphans()
+        if resumed:
+            logger.info("♻️ 중단된 작업 %d개를 다시 큐에 넣었습니다.", resumed)
+
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._reaper, name="job-reaper", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _requeue_orphans(self) -> int:
+        # lease 보유자가 없는 미완료 작업 = 아무도 처리하지 않는 작업 (이 프로세스 큐에 이미 있는 것은 제외)
+        count = 0
+        for job in self.store.unfinished():
+            key = job["key"]
+            with self._enqueued_lock:
+                if key in self._enqueued:
+                    continue
+            if self.state.holder(f"job:{key}") is not None:
+                continue
+            if job["state"] != QUEUED:
+                self.store.set_state(key, QUEUED)
+            self._enqueue(key, job["priority"])
+            count += 1
+        return count
+
+    def _reaper(self) -> None:
+        while True:
+            time.sleep(self.lease_seconds)
+            try:
+                resumed = self._requeue_orphans()
+            except Exception:
+                logger.exception("⚠️ 중단된 작업 확인 실패")
+                continue
+            if resumed:
+                logger.info("♻️ 보유자가 없는 작업 %d개를 넘겨받았습니다.", resumed)
+
+    def _enqueue(self, key: str, priority: int) -> None:
+        with self._enqueued_lock:
+            self._enqueued.add(key)
+        self._queue.put((-priority, next(self._seq), key))
+
+    def submit(self, key: str, payload: dict, priority: int = 0, rerun_done: bool = False) -> dict:
+        """
+        작업을 제출합니다. 이미 진행 중/완료된 같은 key 작업이 있으면 그 작업을 반환합니다.
+        rerun_done=True 이면 완료된 작업도 다시 실행합니다 (결과 파일이 사라진 경우 등).
+        """
+        replace_states = (FAILED, DONE) if rerun_done else (FAILED,)
+        job, created = self.store.create_or_get(key, payload, priority, replace_states)
+        if created:
+            self._enqueue(key, priority)
+        return job
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _worker(self) -> None:
+        while True:
+            _, _, key = self._queue.get()
+            with self._enqueued_lock:
+                self._enqueued.discard(key)
+            job = self.store.get(key)
+            if job is None or job["state"] != QUEUED:
+                continue
+
+            lease = Lease(self.state, f"job:{key}", self.lease_seconds)
+            if not lease.acquire():
+                continue  # 다른 워커/프로세스가 처리 중
+            try:
+                # lease 를 차지하는 사이 다른 워커가 끝냈을 수 있으므로 다시 확인
+                job = self.store.get(key)
+                if job is None or job["state"] != QUEUED:
+                    continue
+                self._run(key, job)
+            finally:
+                lease.release()
+
+    def _run(self, key: str, job: dict) -> None:
+        self.store.begin_attempt(key)
+        started = time.perf_counter()
+        try:
+            with JOBS_IN_FLIGHT.track_inprogress():
+                result = self.handler(JobContext(self.store, job))
+            self.store.set_state(key, DONE, result=result)
+            JOBS.inc(result="done")
+        except Exception as e:
+            logger.exception("❌ 작업 실패: %s", key)
+            self.store.set_state(key, FAILED, error=f"{type(e).__name__}: {e}")
+            JOBS.inc(result="failed")
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="job")
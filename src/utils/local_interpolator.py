@@ -0,0 +1,86 @@
+import os
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+from utils.merge_videos import FFMPEG_BINARY
+
+
+# 결과물이 바뀌면 올려서 transition 캐시 키가 달라지게 한다
+LOCAL_INTERPOLATOR_VERSION = 1
+
+LOCAL_INTERPOLATOR_FPS = int(os.getenv("LOCAL_INTERPOLATOR_FPS", "24"))
+# 시작 프레임을 얼마나 확대하며 다음 프레임으로 넘어갈지 (전진하는 느낌)
+LOCAL_INTERPOLATOR_ZOOM = float(os.getenv("LOCAL_INTERPOLATOR_ZOOM", "1.25"))
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+
+def fit_frame(path: str, size: tuple[int, int]) -> Image.Image:
+    """
+    이미지를 size(16:9)에 맞게 가운데를 잘라 리사이즈합니다.
+    """
+    w, h = size
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        scale = max(w / img.width, h / img.height)
+        cw, ch = w / scale, h / scale
+        x0, y0 = (img.width - cw) / 2, (img.height - ch) / 2
+        return img.resize(size, Image.BILINEAR, box=(x0, y0, x0 + cw, y0 + ch))
+
+
+def _zoomed(img: Image.Image, zoom: float) -> Image.Image:
+    w, h = img.size
+    cw, ch = w / zoom, h / zoom
+    x0, y0 = (w - cw) / 2, (h - ch) / 2
+    return img.resize((w, h), Image.BILINEAR, box=(x0, y0, x0 + cw, y0 + ch))
+
+
+def interpolate_local(
+    img_a: str,
+    img_b: str,
+    out_path: str,
+    duration_seconds: int = 4,
+    resolution: str = "720p",
+    fps: int = LOCAL_INTERPOLATOR_FPS,
+    zoom: float = LOCAL_INTERPOLATOR_ZOOM,
+) -> None:
+    """
+    Veo 없이 CPU 로 두 프레임 사이 transition 을 만듭니다 (확대 + 크로스페이드).
+
+    시작 프레임을 조금씩 확대하면서(전진) 마지막 프레임으로 서서히 섞습니다.
+    결과가 입력에 대해 결정적이므로 벤치마크/부하 테스트용 대체 생성기나,
+    (VIDEO_FALLBACK_BACKEND=local 로 켰을 때) Veo 쿼터 소진 시의 저비용 대체 경로로 씁니다.
+    """
+    size = RESOLUTIONS.get(resolution)
+    if size is None:
+        raise ValueError(f"지원하지 않는 해상도입니다: {resolution} (가능: {list(RESOLUTIONS)})")
+
+    first = fit_frame(img_a, size)
+    last = fit_frame(img_b, size)
+
+    n_frames = max(2, int(round(duration_seconds * fps)))
+    t = np.linspace(0.0, 1.0, n_frames)
+    weights = t * t * (3 - 2 * t)  # smoothstep: 시작/끝에서 부드럽게
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    proc = subprocess.Popen(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+         "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+         "-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-pix_fmt", "yuv420p",
+         "-bf", "0", "-g", str(fps), "-movflags", "+faststart", "-f", "mp4", out_path],
+        stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    try:
+        for ti, w in zip(t, weights):
+            frame = Image.blend(_zoomed(first, 1 + (zoom - 1) * ti), last, float(w))
+            proc.stdin.write(frame.tobytes())
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    if proc.wait() != 0:
+        raise RuntimeError(f"로컬 transition 인코딩 실패: {proc.stderr.read().decode(errors='ignore')}")
@@ -0,0 +1,190 @@
+import heapq
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+from utils.image_catalog import ImageCatalog
+from utils.metrics import STAGE_SECONDS
+from utils.navigate import PATH_SPACING_M, densify
+from utils.spatial_index import EARTH_RADIUS_M, compass_bearing, smallest_angle_diff
+from utils.transition_planner import DUPLICATE_DISTANCE_M
+
+logger = logging.getLogger(__name__)
+
+
+# 1 이면 TMap 대신 이미지 그래프에서 먼저 경로를 찾고, 못 찾으면 TMap 으로 넘어간다
+LOCAL_ROUTING = os.getenv("LOCAL_ROUTING", "0") == "1"
+# 출발/도착 좌표를 그래프의 이미지에 붙일 수 있는 최대 거리 (m). 더 멀면 커버 지역 밖으로 보고 TMap 사용
+LOCAL_ROUTING_SNAP_M = float(os.getenv("LOCAL_ROUTING_SNAP_M", "15"))
+# 이 거리(m) 안의 이미지끼리, 촬영 방향(앞/뒤)을 따라 놓여 있으면 걸어서 이어진 것으로 본다
+LOCAL_ROUTING_EDGE_M = float(os.getenv("LOCAL_ROUTING_EDGE_M", "15"))
+LOCAL_ROUTING_EDGE_ANGLE_DEG = float(os.getenv("LOCAL_ROUTING_EDGE_ANGLE_DEG", "30"))
+# 그래프 경로가 직선 거리의 이 배수보다 길면 그래프에 없는 지름길이 있다고 보고 TMap 사용
+LOCAL_ROUTING_MAX_DETOUR = float(os.getenv("LOCAL_ROUTING_MAX_DETOUR", "2.0"))
+
+
+class ImageGraph:
+    """
+    카탈로그 이미지 위치/방향으로 만든 보행 그래프 (무방향, 간선 가중치 = 거리(m)).
+
+    로드뷰는 길을 따라 촬영되므로, 두 이미지를 잇는 방향이 어느 한쪽의 촬영 방향(앞 또는 뒤)과
+    edge_angle_deg 이내로 맞으면 같은 길 위로 보고 간선을 둡니다. 같은 지점(duplicate_m 이내)에서
+    다른 방향으로 찍은 이미지는 방향과 관계없이 이어서, 교차로에서 방향을 바꿀 수 있게 합니다.
+    """
+
+    def __init__(
+        self,
+        index,
+        edge_m: float = LOCAL_ROUTING_EDGE_M,
+        edge_angle_deg: float = LOCAL_ROUTING_EDGE_ANGLE_DEG,
+        duplicate_m: float = DUPLICATE_DISTANCE_M,
+    ):
+        self.index = index
+        lons, lats, headings = index.lons, index.lats, index.headings
+
+        lat0 = math.radians(float(np.mean(lats))) if len(lats) else 0.0
+        self._scale = np.array([EARTH_RADIUS_M * math.cos(lat0), EARTH_RADIUS_M]) * (math.pi / 180)
+        self.xy = np.column_stack([lons, lats]) * self._scale
+
+        # 방향과 관계없이 반경 안의 모든 쌍 (각도 조건 180도 = 전부 통과)
+        src, dst, dists, _ = index.query_many(lons, lats, headings, edge_m, 180.0)
+        keep = src < dst
+        src, dst, dists = src[keep], dst[keep], dists[keep]
+
+        # 카탈로그 heading 과 같은 방위각 (북쪽 0°, 시계 방향)
+        delta = self.xy[dst] - self.xy[src]
+        bearing = compass_bearing(delta[:, 0], delta[:, 1])
+
+        def _along(heading):
+            # 앞/뒤 어느 쪽으로 걸어도 같은 길
+            return np.minimum(smallest_angle_diff(heading, bearing), smallest_angle_diff(heading, bearing + 180))
+
+        walkable = (
+            (dists <= duplicate_m)
+            | (_along(headings[src]) <= edge_angle_deg)
+            | (_along(headings[dst]) <= edge_angle_deg)
+        )
+        src, dst, dists = src[walkable], dst[walkable], dists[walkable]
+
+        # 양방향 CSR 인접 리스트 (A* 내부 루프는 파이썬 리스트가 빠름)
+        a = np.concatenate([src, dst])
+        b = np.concatenate([dst, src])
+        w = np.concatenate([dists, dists])
+        order = np.argsort(a, kind="stable")
+        counts = np.bincount(a, minlength=len(index))
+        indptr = np.concatenate([[0], np.cumsum(counts)])
+        self._indptr = indptr.tolist()
+        self._neighbors = b[order].tolist()
+        self._weights = w[order].tolist()
+        self._xy = self.xy.tolist()
+        self.edge_count = len(src)
+
+    def project(self, lon: float, lat: float) -> np.ndarray:
+        return np.array([lon, lat]) * self._scale
+
+    def snap(self, lon: float, lat: float, max_dist_m: float) -> int | None:
+        nearest = self.index.nearest(lon, lat, max_dist_m)
+        return nearest[0] if nearest else None
+
+    def shortest_path(self, source: int, target: int) -> tuple[list[int], float] | None:
+        """
+        A* (직선 거리 휴리스틱) 로 source → target 최단 경로. 이어지지 않으면 None.
+        """
+        xy = self._xy
+        tx, ty = xy[target]
+
+        def _h(i: int) -> float:
+            return math.hypot(xy[i][0] - tx, xy[i][1] - ty)
+
+        best = {source: 0.0}
+        prev = {}
+        heap = [(_h(source), 0.0, source)]
+        while heap:
+            _, g, u = heapq.heappop(heap)
+            if u == target:
+                path = [u]
+                while path[-1] != source:
+                    path.append(prev[path[-1]])
+                return path[::-1], g
+            if g > best[u]:
+                continue
+            for k in range(self._indptr[u], self._indptr[u + 1]):
+                v = self._neighbors[k]
+                ng = g + self._weights[k]
+                if ng < best.get(v, math.inf):
+                    best[v] = ng
+                    prev[v] = u
+                    heapq.heappush(heap, (ng + _h(v), ng, v))
+        return None
+
+
+class LocalRouter:
+    """
+    이미지 그래프 위에서 경로를 찾는 navigate() 의 빠른 경로.
+
+    출발/도착이 모두 커버 지역(snap_m 이내에 이미지가 있음)이고 그래프로 이어져 있으며 지나치게
+    돌아가지 않을 때만 경로를 반환하고, 그 외에는 None 을 반환해 TMap 을 쓰게 합니다.
+    경로는 이미지 위치를 따라가므로 매칭 단계에서 이미지와 맞는 것이 보장됩니다.
+    카탈로그가 바뀌면(공간 인덱스가 새로 만들어지면) 그래프를 다시 만듭니다.
+    """
+
+    def __init__(
+        self,
+        catalog: ImageCatalog,
+        snap_m: float = LOCAL_ROUTING_SNAP_M,
+        max_detour: float = LOCAL_ROUTING_MAX_DETOUR,
+    ):
+        self.catalog = catalog
+        self.snap_m = snap_m
+        self.max_detour = max_detour
+        self._lock = threading.Lock()
+        self._graph: ImageGraph | None = None
+
+    def graph(self) -> ImageGraph:
+        index = self.catalog.get_index()
+        with self._lock:
+            if self._graph is None or self._graph.index is not index:
+                with STAGE_SECONDS.time(stage="local_graph_build"):
+                    self._graph = ImageGraph(index)
+                logger.info("🕸 보행 그래프 구축: 이미지 %d개, 간선 %d개", len(index), self._graph.edge_count)
+            return self._graph
+
+    def route(self, start: tuple[str, str], end: tuple[str, str], spacing_m: float = PATH_SPACING_M) -> dict | None:
+        """
+        navigate() 와 같은 형식 {"path": (N, 3) [lon, lat, heading], "raw": features} 을 반환합니다. 못 찾으면 None.
+        """
+        graph = self.graph()
+        if not len(graph.index):
+            return None
+        (start_lon, start_lat), (end_lon, end_lat) = (tuple(map(float, p)) for p in (start, end))
+
+        with STAGE_SECONDS.time(stage="local_route"):
+            source = graph.snap(start_lon, start_lat, self.snap_m)
+            target = graph.snap(end_lon, end_lat, self.snap_m)
+            if source is None or target is None:
+                return None
+            found = graph.shortest_path(source, target)
+            if found is None:
+                return None
+            nodes, length = found
+
+            straight = float(np.hypot(*(graph.project(end_lon, end_lat) - graph.project(start_lon, start_lat))))
+            if length > self.max_detour * straight + 2 * self.snap_m:
+                logger.debug("그래프 경로가 너무 돌아감 (%.0fm, 직선 %.0fm) → TMap 사용", length, straight)
+                return None
+
+            coords = [(start_lon, start_lat)]
+            coords += [(float(graph.index.lons[i]), float(graph.index.lats[i])) for i in nodes]
+            coords.append((end_lon, end_lat))
+            path = densify(coords, spacing_m)
+
+        # TMap 응답처럼 geometry.coordinates 를 가진 feature 하나로 돌려준다 (클라이언트 경로 표시용)
+        raw = [{
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": [list(c) for c in coords]},
+            "properties": {"source": "local", "totalDistance": round(length)},
+        }]
+        return {"path": path, "raw": raw}
@@ -0,0 +1,13 @@
+import logging
+import os
+
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s %(levelname)-5s [%(threadName)s] %(name)s: %(message)s"
+
+
+def configure_logging(level: str | None = None) -> None:
+    """
+    서버/CLI 진입점에서 한 번 호출합니다. 매칭 지점별 결과 같은 대량 로그는 DEBUG 레벨입니다.
+    """
+    logging.basicConfig(level=(level or LOG_LEVEL).upper(), format=LOG_FORMAT)
@@ -0,0 +1,225 @@
+import os
+import math
+import numpy as np
+
+from utils.spatial_index import EARTH_RADIUS_M
+
+
+MATCH_MODE = os.getenv("MATCH_MODE", "monotone")
+
+# 지점당 DP 에 넘길 최대 후보 수 (비용 순 상위 K개)
+MAX_CANDIDATES_PER_POINT = 8
+
+# 매칭 1건당 보상. 비용(거리/각도 정규화 합, 0~2)보다 커야 "매칭하는 편이 항상 이득"이 된다.
+_MATCH_REWARD = 3.0
+
+
+class RouteCandidates:
+    """
+    경로 전체에 대한 후보 (지점, 이미지) 쌍. 지점 순 → 비용 순으로 정렬되어 있습니다.
+    """
+
+    def __init__(self, n_points, points, images, dists, angle_diffs, costs):
+        self.n_points = n_points
+        self.points = points
+        self.images = images
+        self.dists = dists
+        self.angle_diffs = angle_diffs
+        self.costs = costs
+
+        # 지점별 [start, end) 구간 (CSR)
+        self.offsets = np.searchsorted(points, np.arange(n_points + 1))
+
+    def __len__(self):
+        return len(self.points)
+
+    def for_point(self, i: int) -> slice:
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+
+def find_candidates(
+    path: np.ndarray,
+    index,
+    max_dist_m: float,
+    max_angle_deg: float,
+    max_candidates: int = MAX_CANDIDATES_PER_POINT,
+) -> RouteCandidates:
+    """
+    모든 경로 지점의 후보 이미지를 청크 단위 벡터 연산 한 번으로 구합니다.
+    """
+    path = np.asarray(path, dtype=np.float64)
+    points, images, dists, angle_diffs = index.query_many(
+        path[:, 0], path[:, 1], path[:, 2], max_dist_m, max_angle_deg
+    )
+
+    costs = dists / max(max_dist_m, 1e-9) + angle_diffs / max(max_angle_deg, 1e-9)
+
+    # 지점 순, 같은 지점 안에서는 비용(=거리 우선) 순으로 정렬
+    order = np.lexsort((costs, points))
+    points, images, dists, angle_diffs, costs = (
+        a[order] for a in (points, images, dists, angle_diffs, costs)
+    )
+
+    # 지점당 상위 max_candidates 개만 유지
+    if max_candidates and len(points):
+        starts = np.searchsorted(points, points)
+        keep = (np.arange(len(points)) - starts) < max_candidates
+        points, images, dists, angle_diffs, costs = (
+            a[keep] for a in (points, images, dists, angle_diffs, costs)
+        )
+
+    return RouteCandidates(len(path), points, images, dists, angle_diffs, costs)
+
+
+def assign_greedy(cands: RouteCandidates) -> list[int | None]:
+    """
+    기존 방식: 지점 순서대로 아직 쓰이지 않은 가장 가까운 이미지를 고릅니다.
+    """
+    # greedy 는 거리순이 기준이므로 지점 안에서 거리로 다시 정렬
+    order = np.lexsort((cands.dists, cands.points))
+    images = cands.images[order]
+
+    used = set()
+    assignment = []
+    for i in range(cands.n_points):
+        chosen = None
+        for img in images[cands.for_point(i)]:
+            img = int(img)
+            if img not in used:
+                chosen = img
+                break
+        if chosen is not None:
+            used.add(chosen)
+        assignment.append(chosen)
+    return assignment
+
+
+def _route_positions(path: np.ndarray, index, cands: RouteCandidates) -> np.ndarray:
+    """
+    각 후보 이미지를 경로 위에 투영한 누적 거리(m)를 계산합니다.
+    이미지마다 가장 가까운 후보 지점을 기준으로, 그 지점의 진행 방향 성분만큼 보정합니다.
+    """
+    lat0 = math.radians(float(np.mean(path[:, 1])))
+    scale = np.array([EARTH_RADIUS_M * math.cos(lat0), EARTH_RADIUS_M]) * (math.pi / 180)
+
+    xy = path[:, :2] * scale
+    seg = np.diff(xy, axis=0)
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+    cum = np.concatenate([[0.0], np.cumsum(seg_len)])
+
+    # 각 지점의 진행 방향 단위 벡터 (마지막 지점은 직전 구간 방향)
+    if len(seg):
+        dirs = np.vstack([seg, seg[-1:]])
+    else:
+        dirs = np.array([[1.0, 0.0]])
+    norms = np.hypot(dirs[:, 0], dirs[:, 1])
+    norms[norms == 0] = 1.0
+    dirs = dirs / norms[:, None]
+
+    # 이미지별 최단 거리 후보 지점
+    order = np.lexsort((cands.dists, cands.images))
+    imgs_sorted = cands.images[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = imgs_sorted[1:] != imgs_sorted[:-1]
+    nearest_point = np.empty(len(cands), dtype=np.int64)
+    nearest_point_by_img = dict(zip(imgs_sorted[first].tolist(), cands.points[order][first].tolist()))
+    for k, img in enumerate(cands.images.tolist()):
+        nearest_point[k] = nearest_point_by_img[img]
+
+    img_xy = np.column_stack([index.lons[cands.images], index.lats[cands.images]]) * scale
+    offset = np.einsum("ij,ij->i", img_xy - xy[nearest_point], dirs[nearest_point])
+    return cum[nearest_point] + offset
+
+
+def assign_monotone(path: np.ndarray, index, cands: RouteCandidates) -> list[int | None]:
+    """
+    중복 없이, 경로 진행 방향으로 되돌아가지 않는 이미지 순서를 전역 최적으로 고릅니다.
+
+    각 이미지에 경로상 위치(route position)를 부여하고, 선택된 이미지들의 위치가
+    지점 순서대로 엄격히 증가하도록 제약합니다 (같은 이미지는 같은 위치이므로 재사용도 불가).
+    비용 = 매칭 보상(-) + 거리/각도 정규화 비용의 합을 최소화하는 가중 증가 부분열 DP 이며,
+    위치 순위에 대한 펜윅 트리(prefix-min)로 O(N log N) 에 풉니다.
+    """
+    n = len(cands)
+    if n == 0:
+        return [None] * cands.n_points
+
+    positions = _route_positions(np.asarray(path, dtype=np.float64), index, cands)
+
+    # (위치, 이미지) 순위. 같은 이미지는 같은 순위 → 엄격 증가 제약으로 재사용이 막힌다
+    keys = np.unique(np.column_stack([positions, cands.images.astype(np.float64)]), axis=0)
+    rank_of = {(p, int(img)): r + 1 for r, (p, img) in enumerate(keys.tolist())}
+    ranks = [rank_of[(p, img)] for p, img in zip(positions.tolist(), cands.images.tolist())]
+    size = len(keys)
+
+    tree_val = [0.0] * (size + 1)
+    tree_id = [-1] * (size + 1)
+
+    def query(pos):
+        # 순위 1..pos 중 최소 dp (없으면 0 = 여기서 새로 시작)
+        best, best_id = 0.0, -1
+        while pos > 0:
+            if tree_val[pos] < best:
+                best, best_id = tree_val[pos], tree_id[pos]
+            pos -= pos & -pos
+        return best, best_id
+
+    def update(pos, val, state):
+        while pos <= size:
+            if val < tree_val[pos]:
+                tree_val[pos], tree_id[pos] = val, state
+            pos += pos & -pos
+
+    costs = (cands.costs - _MATCH_REWARD).tolist()
+    dp = [0.0] * n
+    prev = [-1] * n
+
+    for i in range(cands.n_points):
+        sl = cands.for_point(i)
+        states = range(sl.start, sl.stop)
+        # 같은 지점의 후보끼리는 이어질 수 없으므로 조회를 모두 끝낸 뒤 갱신
+        for k in states:
+            best, best_id = query(ranks[k] - 1)
+            dp[k] = costs[k] + best
+            prev[k] = best_id
+        for k in states:
+            update(ranks[k], dp[k], k)
+
+    end = min(range(n), key=dp.__getitem__)
+    assignment: list[int | None] = [None] * cands.n_points
+    if dp[end] >= 0:
+        return assignment
+
+    k = end
+    while k != -1:
+        assignment[int(cands.points[k])] = int(cands.images[k])
+        k = prev[k]
+    return assignment
+
+
+ASSIGNERS = {
+    "greedy": lambda path, index, cands: assign_greedy(cands),
+    "monotone": assign_monotone,
+}
+
+
+def match_route(
+    path,
+    index,
+    max_dist_m: float,
+    max_angle_deg: float,
+    mode: str | None = None,
+) -> list[int | None]:
+    """
+    경로 지점별로 매칭된 이미지 인덱스(없으면 None)를 반환합니다.
+    """
+    mode = mode or MATCH_MODE
+    if mode not in ASSIGNERS:
+        raise ValueError(f"지원하지 않는 매칭 모드입니다: {mode} (가능: {list(ASSIGNERS)})")
+
+    path = np.asarray(path, dtype=np.float64)
+    if len(path) == 0 or len(index) == 0:
+        return [None] * len(path)
+
+    cands = find_candidates(path, index, max_dist_m, max_angle_deg)
+    return ASSIGNERS[mode](path, index, cands)
@@ -0,0 +1,320 @@
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from fractions import Fraction
+from typing import List
+
+import imageio_ffmpeg
+from moviepy import VideoFileClip, concatenate_videoclips
+
+from utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+MERGE_ENGINE = os.getenv("MERGE_ENGINE", "ffmpeg")
+
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY") or imageio_ffmpeg.get_ffmpeg_exe()
+
+
+class ClipInfo:
+    """
+    ffmpeg framecrc(스트림 복사, 디코딩 없음)로 얻은 클립 패킷 정보.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.codec = None
+        self.size = None
+        self.time_base = None
+        self.packets: list[tuple[int, int, int, bool]] = []  # (dts, pts, duration, keyframe)
+
+        out = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-i", path,
+             "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"],
+            check=True, capture_output=True, text=True,
+        ).stdout
+
+        for line in out.splitlines():
+            if line.startswith("#tb 0:"):
+                num, den = line.split(":", 1)[1].strip().split("/")
+                self.time_base = Fraction(int(num), int(den))
+            elif line.startswith("#codec_id 0:"):
+                self.codec = line.split(":", 1)[1].strip()
+            elif line.startswith("#dimensions 0:"):
+                self.size = line.split(":", 1)[1].strip()
+            elif line.startswith("0,"):
+                cols = [c.strip() for c in line.split(",")]
+                flags = cols[6] if len(cols) > 6 else ""
+                self.packets.append((int(cols[1]), int(cols[2]), int(cols[3]), "F=0x0" not in flags))
+
+        if not self.packets or self.time_base is None:
+            raise RuntimeError(f"비디오 스트림 정보를 읽을 수 없습니다: {path}")
+
+        self.display_pts = sorted(p[1] for p in self.packets)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.packets)
+
+    @property
+    def fps(self) -> Fraction:
+        return 1 / (self.packets[0][2] * self.time_base)
+
+    @property
+    def reordered(self) -> bool:
+        # 디코딩 순서와 표시 순서가 다르면 B-프레임이 있는 것
+        return any(p[1] != q for p, q in zip(self.packets, self.display_pts))
+
+    def seconds(self, pts: int) -> float:
+        return float((pts - self.display_pts[0]) * self.time_base)
+
+    def copyable_prefix(self, keep: int) -> int:
+        """
+        앞에서부터 keep 프레임 중 스트림 복사만으로 잘라낼 수 있는 프레임 수.
+        (B-프레임이 없으면 keep 전체, 있으면 cut 이전 마지막 키프레임 직전까지)
+        """
+        if not self.reordered:
+            return keep
+
+        cut_pts = self.display_pts[keep] if keep < self.frame_count else None
+        best = 0
+        for decode_idx, (_, pts, _, key) in enumerate(self.packets):
+            if not key or (cut_pts is not None and pts >= cut_pts):
+                continue
+            # closed GOP 여야 키프레임 이전 패킷들이 정확히 "키프레임보다 앞선 프레임들"이 된다
+            if sum(1 for p in self.display_pts if p < pts) == decode_idx:
+                best = max(best, decode_idx)
+        return best
+
+
+def run_ffmpeg(args: list[str]) -> None:
+    """
+    번들 ffmpeg 를 조용히(에러만) 실행합니다. 실패하면 CalledProcessError (stderr 포함).
+    """
+    subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args],
+        check=True, capture_output=True,
+    )
+
+
+def is_faststart(path: str) -> bool:
+    """
+    moov 박스가 mdat 보다 앞에 있는지 (다운로드 완료 전에 재생을 시작할 수 있는지) 확인합니다.
+    최상위 박스 헤더만 읽습니다.
+    """
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            size, box_type = struct.unpack(">I4s", header)
+            if box_type == b"moov":
+                return True
+            if box_type == b"mdat":
+                return False
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0] - 8
+            elif size == 0:
+                return False
+            f.seek(size - 8, os.SEEK_CUR)
+
+
+def ensure_faststart(path: str) -> bool:
+    """
+    moov 가 파일 끝에 있으면 스트림 복사로 앞으로 옮깁니다 (-movflags +faststart, 재인코딩 없음).
+
+    Returns:
+        파일을 다시 썼으면 True
+    """
+    if is_faststart(path):
+        return False
+
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.faststart{ext}"
+    try:
+        run_ffmpeg(["-i", path, "-map", "0", "-c", "copy", "-movflags", "+faststart", tmp])
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return True
+
+
+def cut_clip(info: ClipInfo, keep: int, work_dir: str, prefix: str) -> list[str]:
+    """
+    클립의 앞 keep 프레임을 mp4 조각(들)로 만듭니다.
+    키프레임 경계까지는 스트림 복사, 그 뒤 경계 GOP 만 재인코딩합니다.
+    재인코딩 조각은 SPS/PPS 가 원본과 다르므로 키프레임마다 헤더를 인밴드로 넣어(dump_extra)
+    concat 후에도 디코더가 바뀐 파라미터를 읽을 수 있게 합니다.
+    """
+    segments = []
+    head = info.copyable_prefix(keep)
+
+    if head > 0:
+        out = os.path.join(work_dir, f"{prefix}_copy.mp4")
+        run_ffmpeg([
+            "-i", info.path, "-map", "0:v:0", "-frames:v", str(head),
+            "-c", "copy", out,
+        ])
+        segments.append(out)
+
+    if head < keep:
+        out = os.path.join(work_dir, f"{prefix}_tail.mp4")
+        run_ffmpeg([
+            "-ss", f"{info.seconds(info.display_pts[head]):.6f}", "-i", info.path,
+            "-map", "0:v:0", "-frames:v", str(keep - head),
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            "-pix_fmt", "yuv420p", "-r", str(info.fps),
+            "-bsf:v", "dump_extra", "-an", out,
+        ])
+        segments.append(out)
+
+    return segments
+
+
+def merge_videos_ffmpeg(
+    clip_paths: List[str],
+    output_file: str,
+    trim_last_frames: int = 7,
+) -> None:
+    """
+    ffmpeg concat demuxer + 스트림 복사로 클립들을 이어 붙인다 (전체 재인코딩 없음).
+    각 클립의 마지막 `trim_last_frames` 프레임은 프레임 단위로 정확히 잘라낸다.
+    """
+    infos = [ClipInfo(p) for p in clip_paths]
+
+    codecs = {i.codec for i in infos}
+    sizes = {i.size for i in infos}
+    rates = {i.fps for i in infos}
+    if codecs != {"h264"} or len(sizes) != 1 or len(rates) != 1:
+        raise RuntimeError(f"스트림 복사로 병합할 수 없는 클립 조합입니다: codec={codecs}, size={sizes}, fps={rates}")
+
+    work_dir = tempfile.mkdtemp(prefix="merge_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        segments = []
+        for n, info in enumerate(infos):
+            keep = info.frame_count - max(0, trim_last_frames)
+            if keep <= 0:
+                logger.warning("⚠️ %s : 길이가 너무 짧아서 스킵합니다.", info.path)
+                continue
+            segments.extend(cut_clip(info, keep, work_dir, f"{n:04d}"))
+
+        if not segments:
+            raise RuntimeError("합칠 클립이 없습니다. (모두 스킵되었거나 존재하지 않음)")
+
+        logger.info("🧵 %d개의 클립을 병합합니다. (ffmpeg 스트림 복사, 클립당 뒤에서 %d프레임 제거)", len(infos), trim_last_frames)
+
+        list_file = os.path.join(work_dir, "concat.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for seg in segments:
+                f.write("file '{}'\n".format(seg.replace("'", "'\\''")))
+
+        tmp_out = os.path.join(work_dir, "merged.mp4")
+        run_ffmpeg([
+            "-f", "concat", "-safe", "0", "-i", list_file,
+            "-c", "copy", "-movflags", "+faststart", tmp_out,
+        ])
+        os.replace(tmp_out, output_file)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def merge_videos_moviepy(
+    clip_paths: List[str],
+    output_file: str,
+    trim_last_frames: int = 7,
+) -> None:
+    """
+    여러 mp4 클립을 이어 붙여 하나의 영상으로 합친다.
+    각 클립의 마지막 `trim_last_frames` 프레임은 잘라낸다.
+
+    :param clip_paths: 이어 붙일 영상 경로 리스트 (앞에서부터 순서대로)
+    :param output_file: 최종 출력 파일 경로 (예: "roadview.mp4")
+    :param trim_last_frames: 각 클립에서 뒤에서 제거할 프레임 수
+    """
+    clips = []
+    used_fps = None
+
+    for path in clip_paths:
+        clip = VideoFileClip(path)
+
+        # fps 가져오기 (첫 번째 클립 기준)
+        fps = getattr(clip, "fps", None) or getattr(clip.reader, "fps", None)
+        if used_fps is None:
+            used_fps = fps
+
+        if trim_last_frames > 0 and fps:
+            trim_sec = trim_last_frames / fps
+        else:
+            trim_sec = 0.0
+
+        # 너무 짧은 클립이면 스킵
+        new_duration = max(0.0, clip.duration - trim_sec)
+        if new_duration <= 0:
+            logger.warning("⚠️ %s : 길이가 너무 짧아서 스킵합니다.", path)
+            clip.close()
+            continue
+
+        # 0 ~ new_duration 구간만 사용
+        trimmed = clip.subclipped(0, new_duration)
+        clips.append(trimmed)
+
+    if not clips:
+        raise RuntimeError("합칠 클립이 없습니다. (모두 스킵되었거나 존재하지 않음)")
+
+    logger.info("🧵 %d개의 클립을 병합합니다. (클립당 뒤에서 %d프레임 제거)", len(clips), trim_last_frames)
+
+    final_clip = concatenate_videoclips(clips, method="compose")
+    final_clip.write_videofile(
+        output_file,
+        fps=used_fps or 30,  # fps 정보가 없으면 30으로
+        codec="libx264",
+        audio=False,
+        logger=None,
+    )
+
+    # 리소스 정리
+    for c in clips:
+        c.close()
+    final_clip.close()
+
+
+MERGE_ENGINES = {
+    "ffmpeg": merge_videos_ffmpeg,
+    "moviepy": merge_videos_moviepy,
+}
+
+
+def merge_videos(
+    clip_paths: List[str],
+    output_file: str,
+    trim_last_frames: int = 7,
+    engine: str | None = None,
+) -> None:
+    """
+    engine("ffmpeg", "moviepy")으로 클립을 병합합니다.
+    ffmpeg 스트림 복사 병합이 실패하면 MoviePy 재인코딩으로 대신합니다.
+    """
+    engine = engine or MERGE_ENGINE
+    if engine not in MERGE_ENGINES:
+        raise ValueError(f"지원하지 않는 병합 엔진입니다: {engine} (가능: {list(MERGE_ENGINES)})")
+
+    with STAGE_SECONDS.time(stage="merge"):
+        if engine == "ffmpeg":
+            try:
+                merge_videos_ffmpeg(clip_paths, output_file, trim_last_frames)
+                return
+            except (RuntimeError, subprocess.CalledProcessError, OSError) as e:
+                detail = getattr(e, "stderr", None)
+                logger.warning(
+                    "⚠️ ffmpeg 병합 실패, MoviePy 로 대신합니다: %r %s",
+                    e, detail.decode(errors="ignore") if detail else "",
+                )
+
+        merge_videos_moviepy(clip_paths, output_file, trim_last_frames)
+        # MoviePy 는 moov 를 파일 끝에 쓰므로, 모바일에서 바로 재생되도록 앞으로 옮긴다
+        ensure_faststart(output_file)
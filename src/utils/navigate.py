@@ -1,14 +1,81 @@
+import asyncio
 import math
+from concurrent.futures import ThreadPoolExecutor
 import pprint
+import httpx
+import numpy as np
 import requests, os, dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.metrics import CACHE_REQUESTS, ROUTES, STAGE_SECONDS
+from utils.route_cache import RouteCache
+from utils.route_keys import quantize_point, raw_route_key
+from utils.spatial_index import compass_bearing
 dotenv.load_dotenv()
 
 
 TMAP_APP_KEY = os.getenv("TMAP_APP_KEY")
 
+# 경로 보간 간격 (미터). 이미지 카탈로그 밀도보다 촘촘할 필요는 없다.
+PATH_SPACING_M = float(os.getenv("PATH_SPACING_M", "5.0"))
+
+# TMap 요청 타임아웃 (연결, 응답) 초
+TMAP_TIMEOUT = (
+    float(os.getenv("TMAP_CONNECT_TIMEOUT", "3")),
+    float(os.getenv("TMAP_READ_TIMEOUT", "10")),
+)
+
+# 여러 경로를 한꺼번에 조회할 때(배치 요청) 동시에 보낼 TMap 요청 수 (세션 커넥션 풀 크기 이하)
+NAVIGATE_CONCURRENCY = int(os.getenv("NAVIGATE_CONCURRENCY", "8"))
+
+TMAP_PEDESTRIAN_URL = "https://apis.openapi.sk.com/tmap/routes/pedestrian?version=1&format=json&callback=result"
+
+_EARTH_RADIUS_M = 6371000
+
+
+def _build_session() -> requests.Session:
+    """
+    keep-alive 커넥션을 재사용하고, 일시적 오류(429/5xx, 연결 실패)는 backoff 로 재시도하는 세션.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+    session.mount("https://", adapter)
+    session.headers.update({"appKey": TMAP_APP_KEY or ""})
+    return session
+
+
+_session = _build_session()
+
+# 프로세스 전역 경로 캐시. 서버는 configure_route_cache 로 디스크 저장소를 붙인다.
+_route_cache = RouteCache()
+
+
+def configure_route_cache(cache_dir: str | None) -> None:
+    """
+    경로 캐시의 디스크 저장 위치를 설정합니다 (None 이면 메모리만 사용).
+    """
+    global _route_cache
+    _route_cache = RouteCache(cache_dir)
+
+
+# TMap 보다 먼저 시도하는 로컬 경로 탐색기 (local_router.LocalRouter). 없으면 항상 TMap
+_local_router = None
+
 
-def _get_distance(a: tuple[float, float], b: tuple[float, float]):
-    return math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
+def configure_local_router(router) -> None:
+    """
+    route(start, end, spacing_m) -> 결과 | None 을 가진 경로 탐색기를 TMap 앞단에 붙입니다 (None 이면 해제).
+    """
+    global _local_router
+    _local_router = router
 
 
 def _extract_points(item, result: list[tuple[float, float]]):
@@ -23,61 +90,236 @@ def _extract_points(item, result: list[tuple[float, float]]):
             _extract_points(sub, result)
 
 
-def navigate(start: tuple[str, str], end: tuple[str, str]):
-    res = requests.post(
-        "https://apis.openapi.sk.com/tmap/routes/pedestrian?version=1&format=json&callback=result",
-        headers={
-            "appKey": TMAP_APP_KEY,
-        },
-        data={
-            "startX" : start[0],
-            "startY" : start[1],
-            "endX" : end[0],
-            "endY" : end[1],
-            "reqCoordType" : "WGS84GEO",
-            "resCoordType" : "WGS84GEO",
-            "startName" : "출발지",
-            "endName" : "도착지",
-        }
-    ).json()
+def densify(coords: np.ndarray, spacing_m: float = PATH_SPACING_M) -> np.ndarray:
+    """
+    (lon, lat) 폴리라인을 미터 단위 spacing_m 간격으로 보간하고 진행 방향(heading)을 붙입니다.
 
-    coords = []
-    for path in res.get("features", []):
-        _extract_points(path.get("geometry", {}).get("coordinates", []), coords)
+    경도/위도를 현지 등장방형 투영(미터)으로 환산해 거리와 방향을 계산하므로
+    위도에 따른 경도 방향 왜곡이 없습니다.
+
+    Returns:
+        (N, 3) float64 배열 [lon, lat, heading]. heading 은 카탈로그 이미지와 같은 방위각
+        (북쪽 0°, 시계 방향, 도)이며, 마지막 지점은 직전 구간의 방향을 사용합니다.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+    # 연속으로 중복된 좌표 제거
+    if len(coords) > 1:
+        keep = np.ones(len(coords), dtype=bool)
+        keep[1:] = np.any(np.diff(coords, axis=0) != 0, axis=1)
+        coords = coords[keep]
+
+    if len(coords) == 0:
+        return np.empty((0, 3), dtype=np.float64)
+    if len(coords) == 1:
+        return np.column_stack([coords, [0.0]])
+
+    lat0 = math.radians(float(np.mean(coords[:, 1])))
+    scale = np.array([math.cos(lat0), 1.0]) * (math.pi / 180) * _EARTH_RADIUS_M
+
+    deltas = np.diff(coords, axis=0)
+    seg_m = np.hypot(*(deltas * scale).T)
+
+    # 구간마다 spacing_m 이하가 되도록 나눈 조각 수 (최소 1)
+    pieces = np.maximum(1, np.ceil(seg_m / spacing_m).astype(np.int64))
+    seg_idx = np.repeat(np.arange(len(deltas)), pieces)
+    starts = np.repeat(np.cumsum(pieces) - pieces, pieces)
+    t = (np.arange(len(seg_idx)) - starts) / pieces[seg_idx]
+
+    points = np.empty((len(seg_idx) + 1, 3), dtype=np.float64)
+    points[:-1, :2] = coords[seg_idx] + deltas[seg_idx] * t[:, None]
+    points[-1, :2] = coords[-1]
+
+    # 보간된 점은 같은 구간 위에 있으므로 구간 방향이 곧 진행 방향
+    seg_heading = compass_bearing(deltas[:, 0] * scale[0], deltas[:, 1] * scale[1])
+    points[:-1, 2] = seg_heading[seg_idx]
+    points[-1, 2] = seg_heading[-1]
+
+    return points
+
+
+def _route_request_data(start: tuple[str, str], end: tuple[str, str]) -> dict:
+    return {
+        "startX" : start[0],
+        "startY" : start[1],
+        "endX" : end[0],
+        "endY" : end[1],
+        "reqCoordType" : "WGS84GEO",
+        "resCoordType" : "WGS84GEO",
+        "startName" : "출발지",
+        "endName" : "도착지",
+    }
 
-    result = []
-    for coord in coords:
-        if (
-            result
-            and result[-1][0] == coord[0]
-            and result[-1][1] == coord[1]
-        ): continue
 
-        if len(result) < 2:
-            result.append(list(coord))
+def _fetch_route(start: tuple[str, str], end: tuple[str, str]) -> list:
+    res = _session.post(
+        TMAP_PEDESTRIAN_URL,
+        data=_route_request_data(start, end),
+        timeout=TMAP_TIMEOUT,
+    )
+    res.raise_for_status()
+    return res.json().get("features", [])
+
+
+_async_client: httpx.AsyncClient | None = None
+_async_client_loop = None
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """
+    현재 이벤트 루프에 묶인 keep-alive 비동기 HTTP 클라이언트 (루프가 바뀌면 새로 생성).
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            headers={"appKey": TMAP_APP_KEY or ""},
+            timeout=httpx.Timeout(TMAP_TIMEOUT[1], connect=TMAP_TIMEOUT[0]),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            transport=httpx.AsyncHTTPTransport(retries=2),  # 연결 실패 재시도
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = None
+
+
+async def _fetch_route_async(start: tuple[str, str], end: tuple[str, str], retries: int = 3) -> list:
+    client = _get_async_client()
+    for attempt in range(retries + 1):
+        res = await client.post(TMAP_PEDESTRIAN_URL, data=_route_request_data(start, end))
+        if res.status_code in _RETRY_STATUSES and attempt < retries:
+            await asyncio.sleep(0.5 * (2 ** attempt))
             continue
+        res.raise_for_status()
+        return res.json().get("features", [])
+    return []
 
-        distance = _get_distance(result[-1], coord)
-        if distance > 0.0001:
-            segments = int(distance / 0.0001)
-            for i in range(1, segments):
-                result.append([
-                    result[-1][0] + (coord[0] - result[-1][0]) * i / segments,
-                    result[-1][1] + (coord[1] - result[-1][1]) * i / segments,
-                ])
 
-        result.append(list(coord))
+def _build_route(features: list, spacing_m: float) -> dict:
+    coords = []
+    for path in features:
+        _extract_points(path.get("geometry", {}).get("coordinates", []), coords)
 
-    for i in range(1, len(result)):
-        direction = (result[i][0] - result[i-1][0], result[i][1] - result[i-1][1])
-        degree = math.atan2(direction[1], direction[0]) * 180 / math.pi
-        result[i-1].append(degree)
+    with STAGE_SECONDS.time(stage="densify"):
+        path = densify(coords, spacing_m)
 
     return {
-        "path": result,
-        "raw": res.get("features", []),
+        "path": path,
+        "raw": features,
     }
 
+
+def _cached_features(cache_key: str, use_cache: bool) -> list | None:
+    features = _route_cache.get(cache_key) if use_cache else None
+    CACHE_REQUESTS.inc(cache="route", result="hit" if features is not None else "miss")
+    return features
+
+
+def navigate(
+    start: tuple[str, str],
+    end: tuple[str, str],
+    spacing_m: float = PATH_SPACING_M,
+    use_cache: bool = True,
+):
+    """
+    TMap 보행자 경로를 조회해 spacing_m 간격으로 보간된 경로를 반환합니다.
+    같은 (정규화된) 출발/도착 좌표의 TMap 응답은 캐시에서 재사용합니다.
+
+    Returns:
+        {"path": (N, 3) ndarray [lon, lat, heading], "raw": TMap features}
+    """
+    start = quantize_point(start)
+    end = quantize_point(end)
+    cache_key = raw_route_key(start, end)
+
+    if _local_router is not None:
+        result = _local_router.route(start, end, spacing_m)
+        if result is not None:
+            ROUTES.inc(source="local")
+            return result
+
+    features = _cached_features(cache_key, use_cache)
+    if features is not None:
+        ROUTES.inc(source="cache")
+    else:
+        with STAGE_SECONDS.time(stage="tmap_request"):
+            features = _fetch_route(start, end)
+        ROUTES.inc(source="tmap")
+        # 경로를 못 찾은 응답(에러 등)은 캐시하지 않는다
+        if features:
+            _route_cache.put(cache_key, features)
+
+    return _build_route(features, spacing_m)
+
+
+def navigate_many(
+    routes: list[tuple[tuple[str, str], tuple[str, str]]],
+    spacing_m: float = PATH_SPACING_M,
+    concurrency: int = NAVIGATE_CONCURRENCY,
+) -> list[dict | Exception]:
+    """
+    (출발, 도착) 목록을 최대 concurrency 개씩 동시에 조회합니다 (같은 keep-alive 세션/경로 캐시 공유).
+
+    Returns:
+        입력 순서대로 navigate() 결과. 실패한 경로는 그 예외
+    """
+    if not routes:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(routes))), thread_name_prefix="navigate") as pool:
+        futures = [pool.submit(navigate, start, end, spacing_m) for start, end in routes]
+
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def navigate_async(
+    start: tuple[str, str],
+    end: tuple[str, str],
+    spacing_m: float = PATH_SPACING_M,
+    use_cache: bool = True,
+):
+    """
+    navigate() 의 비동기 버전. 풀링된 비동기 HTTP 클라이언트로 TMap 을 호출하며,
+    캐시는 navigate() 와 공유합니다.
+    """
+    start = quantize_point(start)
+    end = quantize_point(end)
+    cache_key = raw_route_key(start, end)
+
+    if _local_router is not None:
+        # 그래프 탐색은 CPU 작업이므로 이벤트 루프 밖에서
+        result = await asyncio.to_thread(_local_router.route, start, end, spacing_m)
+        if result is not None:
+            ROUTES.inc(source="local")
+            return result
+
+    # 경로 캐시는 디스크 JSON 을 읽고 쓰고, 경로 보간은 NumPy 연산이므로 모두 이벤트 루프 밖에서
+    features = await asyncio.to_thread(_cached_features, cache_key, use_cache)
+    if features is not None:
+        ROUTES.inc(source="cache")
+    else:
+        with STAGE_SECONDS.time(stage="tmap_request"):
+            features = await _fetch_route_async(start, end)
+        ROUTES.inc(source="tmap")
+        if features:
+            await asyncio.to_thread(_route_cache.put, cache_key, features)
+
+    return await asyncio.to_thread(_build_route, features, spacing_m)
+
+
 if __name__ == "__main__":
     print("Test for utils.navigate")
     pprint.pprint(
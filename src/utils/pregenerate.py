@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from utils.find_matching import MATCH_MAX_ANGLE_DEG
+from utils.frame_cache import configure_frame_cache
+from utils.image_catalog import ImageCatalog
+from utils.interpolate_images import (
+    TRANSITION_DURATION_SECONDS, VIDEO_BACKEND, generate_transitions, transition_cache_checker,
+)
+from utils.jobs import JobStore
+from utils.logging_config import configure_logging
+from utils.navigate import configure_route_cache, navigate_many
+from utils.route_batch import is_batch_key, plan_routes
+from utils.spatial_index import EARTH_RADIUS_M, compass_bearing, smallest_angle_diff
+from utils.transition_planner import DUPLICATE_DISTANCE_M, max_hop_m
+from utils.transition_scheduler import VEO_RATE_PER_MINUTE, TransitionScheduler
+
+logger = logging.getLogger(__name__)
+
+
+# Veo 생성 단가 (USD / 생성 영상 1초). 사전 생성 예산(--budget_usd) 계산에만 쓴다
+VEO_PRICE_PER_SECOND = float(os.getenv("VEO_PRICE_PER_SECOND", "0.4"))
+# 요청 기록에서 읽을 최근 완료 작업 수
+PREGEN_HISTORY_LIMIT = int(os.getenv("PREGEN_HISTORY_LIMIT", "1000"))
+
+
+def build_adjacency(
+    catalog: ImageCatalog,
+    max_dist_m: float | None = None,
+    max_angle_deg: float = MATCH_MAX_ANGLE_DEG,
+    min_dist_m: float = DUPLICATE_DISTANCE_M,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    카탈로그 이미지 사이의 인접 그래프 (A → B 로 이어지는 transition 후보).
+
+    B 가 A 에서 transition 한 구간 거리(max_hop_m) 이내이고, 두 이미지의 방향 차이와
+    A 의 진행 방향 대비 B 쪽 방위가 모두 max_angle_deg(매칭 기준과 같음) 이내인 경우 간선을 둡니다.
+    같은 장면(min_dist_m 이내)은 제외합니다.
+
+    Returns:
+        (출발 이미지 인덱스, 도착 이미지 인덱스, 거리(m)) 배열
+    """
+    max_dist_m = max_hop_m() if max_dist_m is None else max_dist_m
+    index = catalog.get_index()
+    coords = np.asarray(catalog.coords)
+    src, dst, dists, _ = index.query_many(coords[:, 0], coords[:, 1], coords[:, 2], max_dist_m, max_angle_deg)
+
+    keep = (src != dst) & (dists > min_dist_m)
+    src, dst, dists = src[keep], dst[keep], dists[keep]
+
+    # 방위는 카탈로그 heading 과 같은 기준 (북쪽 0°, 시계 방향, 도)
+    lat0 = math.radians(float(np.mean(coords[:, 1]))) if len(coords) else 0.0
+    scale = np.array([EARTH_RADIUS_M * math.cos(lat0), EARTH_RADIUS_M]) * (math.pi / 180)
+    delta = (coords[dst, :2] - coords[src, :2]) * scale
+    bearing = compass_bearing(delta[:, 0], delta[:, 1])
+    ahead = smallest_angle_diff(coords[src, 2], bearing) <= max_angle_deg
+    return src[ahead], dst[ahead], dists[ahead]
+
+
+def _load_seed_routes(path: str) -> list[dict]:
+    # [{"start": [lng, lat], "end": [lng, lat], "weight": 1}, ...] ("path" 가 있으면 경로 탐색 생략)
+    with open(path, "r", encoding="utf-8") as f:
+        routes = json.load(f)
+    if not isinstance(routes, list):
+        raise ValueError(f"시드 경로 파일은 경로 목록(JSON 배열)이어야 합니다: {path}")
+    return routes
+
+
+def route_demand(
+    routes: list[dict],
+    image_folder: str,
+    index,
+    is_cached=None,
+) -> Counter:
+    """
+    경로들을 온라인 요청과 같은 방식(매칭 → transition 계획)으로 처리했을 때 필요한
+    (이미지 A, 이미지 B) 쌍별 가중치 합. 경로는 {"start", "end", "path"(선택), "weight"(선택)}.
+    """
+    # 경로가 없는 것만 모아서 동시에 조회
+    missing = [i for i, route in enumerate(routes) if route.get("path") is None]
+    navigated = navigate_many([(tuple(routes[i]["start"]), tuple(routes[i]["end"])) for i in missing])
+    paths = [route.get("path") for route in routes]
+    for i, result in zip(missing, navigated):
+        if isinstance(result, Exception):
+            logger.warning("⚠️ 경로 탐색 실패, 건너뜁니다 (%s → %s): %r", routes[i]["start"], routes[i]["end"], result)
+        else:
+            paths[i] = result["path"]
+
+    usable = [i for i, path in enumerate(paths) if path is not None]
+    planned = plan_routes([paths[i] for i in usable], image_folder, index, is_cached=is_cached)
+
+    demand: Counter = Counter()
+    for i, images in zip(usable, planned):
+        weight = float(routes[i].get("weight", 1))
+        for pair in zip(images or [], (images or [])[1:]):
+            demand[pair] += weight
+    return demand
+
+
+def prioritize(
+    demand: Counter,
+    edges: tuple[np.ndarray, np.ndarray, np.ndarray] | None,
+    filenames,
+) -> list[tuple[str, str]]:
+    """
+    사전 생성 순서. 요청 기록/시드 경로에서 나온 쌍을 가중치 순으로 먼저 두고,
+    edges 가 있으면 나머지 그래프 간선을 (지나간 경로가 많은 이미지, 긴 구간) 순으로 뒤에 붙입니다.
+    """
+    queue = [pair for pair, _ in sorted(demand.items(), key=lambda item: -item[1])]
+    if edges is None:
+        return queue
+
+    popularity: Counter = Counter()
+    for (a, b), weight in demand.items():
+        popularity[a] += weight
+        popularity[b] += weight
+
+    seen = set(queue)
+    rest = []
+    for src, dst, dist in zip(*edges):
+        pair = (filenames[int(src)], filenames[int(dst)])
+        if pair not in seen:
+            rest.append((-(popularity[pair[0]] + popularity[pair[1]]), -float(dist), pair))
+    rest.sort()
+    return queue + [pair for _, _, pair in rest]
+
+
+def pregenerate(
+    data_dir: str,
+    seeds: str | None = None,
+    use_history: bool = True,
+    all_edges: bool = False,
+    max_transitions: int = 0,
+    budget_usd: float = 0.0,
+    rate_per_minute: float = VEO_RATE_PER_MINUTE,
+    backend: str | None = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    자주 지나갈 transition 을 미리 생성해 클립 캐시(data/cache/transitions)에 채워 둡니다.
+
+    이미 캐시에 있는 쌍은 건너뛰므로, 중간에 멈춰도 같은 명령을 다시 실행하면 이어서 진행합니다.
+    max_transitions / budget_usd 는 이번 실행에서 새로 생성할 양의 한도입니다 (0 이면 제한 없음).
+    """
+    backend = backend or VIDEO_BACKEND
+    image_folder = os.path.join(data_dir, "images")
+    cache_dir = os.path.join(data_dir, "cache")
+
+    catalog = ImageCatalog(image_folder).load()
+    index = catalog.get_index()
+    cached_pair = transition_cache_checker(cache_dir, backend=backend)
+
+    def _is_cached(a: str, b: str) -> bool:
+        return cached_pair(os.path.join(image_folder, a), os.path.join(image_folder, b))
+
+    routes = []
+    if use_history:
+        history = JobStore(os.path.join(data_dir, "state.sqlite3")).finished(PREGEN_HISTORY_LIMIT)
+        # 배치 작업 기록은 경로가 아니라 경로 묶음이다 (묶인 경로들은 각자의 작업 기록으로 남음)
+        routes += [job["payload"] for job in history if not is_batch_key(job["key"])]
+    if seeds:
+        routes += _load_seed_routes(seeds)
+    demand = route_demand(routes, image_folder, index, is_cached=_is_cached)
+
+    edges = None
+    if all_edges:
+        started = time.perf_counter()
+        edges = build_adjacency(catalog)
+        logger.info(
+            "🕸 인접 그래프: 이미지 %d개, 간선 %d개 (%.1fs)",
+            len(catalog), len(edges[0]), time.perf_counter() - started,
+        )
+
+    queue = prioritize(demand, edges, catalog.filenames)
+    todo = [pair for pair in queue if not _is_cached(*pair)]
+    cached = len(queue) - len(todo)
+
+    limit = len(todo)
+    if max_transitions > 0:
+        limit = min(limit, max_transitions)
+    clip_cost = VEO_PRICE_PER_SECOND * TRANSITION_DURATION_SECONDS if backend == "veo" else 0.0
+    if budget_usd > 0 and clip_cost > 0:
+        limit = min(limit, int(budget_usd // clip_cost))
+    todo = todo[:limit]
+
+    summary = {
+        "routes": len(routes),
+        "candidates": len(queue),
+        "cached": cached,
+        "planned": len(todo),
+        "estimated_cost_usd": round(len(todo) * clip_cost, 2),
+        "generated": 0,
+        "failed": 0,
+    }
+    logger.info(
+        "📋 사전 생성 계획: 경로 %d개, 후보 %d쌍 중 캐시 %d쌍, 이번에 생성 %d쌍 (예상 $%.2f)",
+        summary["routes"], summary["candidates"], summary["cached"], summary["planned"], summary["estimated_cost_usd"],
+    )
+    if dry_run or not todo:
+        return summary
+
+    scheduler = TransitionScheduler(rate_per_minute=rate_per_minute)
+    pairs = [(os.path.join(image_folder, a), os.path.join(image_folder, b)) for a, b in todo]
+    for i, _, err in generate_transitions(pairs, cache_dir, backend=backend, scheduler=scheduler):
+        if err is not None:
+            summary["failed"] += 1
+            logger.error("❌ (%d/%d) 사전 생성 실패: %s → %s: %r", i + 1, len(todo), *todo[i], err)
+        else:
+            summary["generated"] += 1
+    logger.info("✅ 사전 생성 완료: %d쌍 생성, %d쌍 실패", summary["generated"], summary["failed"])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자주 지나갈 transition 을 오프라인으로 미리 생성")
+    parser.add_argument("--data_dir", default=os.getenv("DATA_DIR"), help="서버와 같은 데이터 디렉토리 (기본: DATA_DIR)")
+    parser.add_argument("--seeds", default=None, help='시드 경로 JSON ([{"start": [lng, lat], "end": [lng, lat], "weight": 1}, ...])')
+    parser.add_argument("--no_history", action="store_true", help="서버의 완료된 작업 기록을 쓰지 않음")
+    parser.add_argument("--all_edges", action="store_true", help="기록/시드에 없는 인접 그래프 간선까지 생성")
+    parser.add_argument("--max_transitions", type=int, default=0, help="이번 실행에서 새로 생성할 최대 개수 (0: 제한 없음)")
+    parser.add_argument("--budget_usd", type=float, default=0.0, help="이번 실행의 Veo 비용 한도 (0: 제한 없음)")
+    parser.add_argument("--rate_per_minute", type=float, default=VEO_RATE_PER_MINUTE, help="분당 최대 생성 요청 수 (0: 제한 없음)")
+    parser.add_argument("--backend", default=None, help="생성 백엔드 (기본: VIDEO_BACKEND)")
+    parser.add_argument("--dry_run", action="store_true", help="생성하지 않고 계획만 출력")
+    args = parser.parse_args()
+
+    if not args.data_dir:
+        parser.error("--data_dir 또는 DATA_DIR 환경변수가 필요합니다.")
+
+    configure_logging()
+    # 서버와 같은 경로/프레임 캐시를 공유
+    configure_route_cache(os.path.join(args.data_dir, "cache", "routes"))
+    configure_frame_cache(os.path.join(args.data_dir, "cache", "frames"))
+
+    summary = pregenerate(
+        args.data_dir,
+        seeds=args.seeds,
+        use_history=not args.no_history,
+        all_edges=args.all_edges,
+        max_transitions=args.max_transitions,
+        budget_usd=args.budget_usd,
+        rate_per_minute=args.rate_per_minute,
+        backend=args.backend,
+        dry_run=args.dry_run,
+    )
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
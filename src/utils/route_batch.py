@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import requests
+
+from utils.find_matching import find_matching
+from utils.jobs import DONE, FAILED
+from utils.logging_config import configure_logging
+from utils.transition_planner import plan_transitions
+
+logger = logging.getLogger(__name__)
+
+
+# 배치 요청 하나에 담을 수 있는 최대 경로 수
+BATCH_MAX_ROUTES = int(os.getenv("BATCH_MAX_ROUTES", "500"))
+
+BATCH_KEY_PREFIX = "batch-"
+
+
+def batch_key(route_keys: list[str]) -> str:
+    """
+    배치 작업 키. 같은 경로 묶음(순서 무관)은 같은 배치가 됩니다.
+    """
+    h = hashlib.sha256()
+    for key in sorted(set(route_keys)):
+        h.update(key.encode("utf-8"))
+        h.update(b"\0")
+    return BATCH_KEY_PREFIX + h.hexdigest()[:24]
+
+
+def is_batch_key(key: str) -> bool:
+    return key.startswith(BATCH_KEY_PREFIX)
+
+
+def match_routes(paths: list, image_folder: str, index) -> list[list[str] | None]:
+    """
+    여러 경로를 하나의 공간 인덱스로 매칭합니다.
+
+    Returns:
+        경로별 매칭된 이미지 파일명 목록 (매칭 중 에러가 난 경로는 None)
+    """
+    matched = []
+    for path in paths:
+        try:
+            matched.append(find_matching(np.asarray(path, dtype=np.float64), image_folder, index=index))
+        except Exception as e:
+            logger.warning("⚠️ 경로 매칭 실패, 건너뜁니다: %r", e)
+            matched.append(None)
+    return matched
+
+
+def plan_routes(paths: list, image_folder: str, index, is_cached=None) -> list[list[str] | None]:
+    """
+    여러 경로를 매칭(match_routes)하고, 온라인 요청과 같은 방식으로 transition 할 이미지를 고릅니다.
+
+    Returns:
+        경로별 선택된 이미지 파일명 목록 (매칭 중 에러가 난 경로는 None)
+    """
+    return [
+        None if images is None else plan_transitions(images, is_cached=is_cached)
+        for images in match_routes(paths, image_folder, index)
+    ]
+
+
+def distinct_pairs(planned: list[list[str] | None]) -> list[tuple[str, str]]:
+    """
+    경로들이 필요로 하는 (이미지 A, 이미지 B) 쌍을 처음 나온 순서대로 중복 없이 모읍니다.
+    """
+    seen = {}
+    for images in planned:
+        for pair in zip(images or [], (images or [])[1:]):
+            seen.setdefault(pair, None)
+    return list(seen)
+
+
+# ---------------------------------------------------------------------- CLI (서버 배치 API 클라이언트)
+
+def _to_request(route: dict) -> dict:
+    # 시드 경로 형식 {"start": [lng, lat], "end": [lng, lat]} → /gen-videos 요청 형식
+    (start_lng, start_lat), (end_lng, end_lat) = route["start"], route["end"]
+    return {"startLat": str(start_lat), "startLng": str(start_lng), "endLat": str(end_lat), "endLng": str(end_lng)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 경로의 영상을 한 번에 요청하고 경로별 상태를 확인")
+    parser.add_argument("routes", help='경로 JSON ([{"start": [lng, lat], "end": [lng, lat]}, ...], pregenerate 시드와 같은 형식)')
+    parser.add_argument("--server", default="http://localhost:8000", help="서버 주소 (기본: http://localhost:8000)")
+    parser.add_argument("--priority", type=int, default=0, help="작업 우선순위")
+    parser.add_argument("--poll_seconds", type=float, default=5.0, help="상태 확인 간격 (초)")
+    parser.add_argument("--no_wait", action="store_true", help="제출만 하고 완료를 기다리지 않음")
+    args = parser.parse_args()
+
+    configure_logging()
+    with open(args.routes, "r", encoding="utf-8") as f:
+        routes = json.load(f)
+
+    res = requests.post(
+        f"{args.server}/gen-videos",
+        json={"routes": [_to_request(r) for r in routes], "priority": args.priority},
+        timeout=60,
+    )
+    res.raise_for_status()
+    status = res.json()
+    logger.info("📦 배치 제출: %s (경로 %d개)", status["batch"], len(status["routes"]))
+
+    while not args.no_wait and any(r["state"] not in (DONE, FAILED) for r in status["routes"]):
+        time.sleep(args.poll_seconds)
+        res = requests.get(f"{args.server}/batches/{status['batch']}", timeout=30)
+        res.raise_for_status()
+        status = res.json()
+        done = sum(1 for r in status["routes"] if r["state"] == DONE)
+        logger.info("⏳ %s: 완료 %d/%d", status["state"], done, len(status["routes"]))
+
+    print(json.dumps(status, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+ROUTE_CACHE_MEMORY_ENTRIES = int(os.getenv("ROUTE_CACHE_MEMORY_ENTRIES", "1024"))
+# 디스크에 보관할 경로 응답 수 (0 이면 제한 없음). 넘으면 오래 안 쓴(mtime) 것부터 지운다
+ROUTE_CACHE_DISK_ENTRIES = int(os.getenv("ROUTE_CACHE_DISK_ENTRIES", "100000"))
+# 한도를 넘었을 때 한도의 이 비율까지 줄인다 (정리 스캔이 저장할 때마다 돌지 않도록)
+_DISK_PRUNE_RATIO = 0.9
+
+
+class RouteCache:
+    """
+    TMap 경로 응답(features) 캐시. 메모리 LRU + (선택) 디스크 JSON 저장소.
+
+    키는 정규화된 출발/도착 좌표 문자열이며, 디스크에는 cache_dir/<sha256>.json 으로 저장합니다.
+    디스크 항목은 max_disk_entries 개를 넘으면 마지막 사용 시각(mtime, 읽을 때 갱신) 순으로 축출합니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        max_entries: int = ROUTE_CACHE_MEMORY_ENTRIES,
+        max_disk_entries: int = ROUTE_CACHE_DISK_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, list] = OrderedDict()
+        # 디스크 항목 수 추정치 (처음 새 항목을 쓸 때 디렉토리를 세고, 이후에는 더해 간다)
+        self._disk_entries: int | None = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _remember(self, key: str, features: list) -> None:
+        with self._lock:
+            self._memory[key] = features
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> list | None:
+        with self._lock:
+            features = self._memory.get(key)
+            if features is not None:
+                self._memory.move_to_end(key)
+                return features
+
+        if not self.cache_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                features = json.load(f)["features"]
+            os.utime(path)  # 축출 순서용 마지막 사용 시각
+        except (OSError, ValueError, KeyError):
+            return None
+
+        self._remember(key, features)
+        return features
+
+    def put(self, key: str, features: list) -> None:
+        self._remember(key, features)
+        if not self.cache_dir:
+            return
+
+        path = self._disk_path(key)
+        is_new = not os.path.exists(path)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "features": features}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        if is_new:
+            self._count_disk_entry()
+
+    def _count_disk_entry(self) -> None:
+        with self._lock:
+            if self._disk_entries is None:
+                self._disk_entries = sum(1 for name in os.listdir(self.cache_dir) if name.endswith(".json"))
+            else:
+                self._disk_entries += 1
+            if not self.max_disk_entries or self._disk_entries <= self.max_disk_entries:
+                return
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        # 다른 프로세스도 같은 디렉토리에 쓰므로 추정치 대신 실제 파일을 세어 정리한다
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.stat(path).st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+
+        excess = len(entries) - int(self.max_disk_entries * _DISK_PRUNE_RATIO)
+        removed = 0
+        for _, path in entries[:max(0, excess)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_entries = len(entries) - removed
+        if removed:
+            logger.info("🧹 경로 캐시 축출: %d개 (남은 항목 %d개)", removed, len(entries) - removed)
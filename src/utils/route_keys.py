@@ -0,0 +1,73 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from utils.state_backend import SQLITE_TIMEOUT_SECONDS
+
+
+# 출발/도착 좌표를 소수점 몇 자리까지 같은 요청으로 볼지 (5자리 ≈ 1m)
+ROUTE_KEY_PRECISION = int(os.getenv("ROUTE_KEY_PRECISION", "5"))
+
+
+def quantize_point(point: tuple[str | float, str | float], precision: int = ROUTE_KEY_PRECISION) -> tuple[str, str]:
+    """
+    (lon, lat) 를 precision 자리로 반올림한 문자열 쌍으로 정규화합니다.
+    "126.9380" 과 "126.93800001" 처럼 표기만 다른 좌표가 같은 값이 됩니다.
+    """
+    return tuple(f"{round(float(v), precision):.{precision}f}" for v in point)
+
+
+def raw_route_key(
+    start: tuple[str | float, str | float],
+    end: tuple[str | float, str | float],
+    precision: int = ROUTE_KEY_PRECISION,
+) -> str:
+    """
+    좌표 기반 요청 키 "startLng,startLat,endLng,endLat" (양자화된 좌표).
+    """
+    return ",".join((*quantize_point(start, precision), *quantize_point(end, precision)))
+
+
+def canonical_route_key(matched_images: list[str]) -> str:
+    """
+    매칭된 이미지 순서열의 해시. 같은 이미지들을 같은 순서로 지나는 경로는 같은 영상을 공유합니다.
+    """
+    h = hashlib.sha256()
+    for name in matched_images:
+        h.update(os.path.basename(name).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:40]
+
+
+class RouteAliases:
+    """
+    좌표 기반 요청 키(alias) → 정규 키(canonical) 매핑을 SQLite 에 저장합니다.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None, timeout=SQLITE_TIMEOUT_SECONDS,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS route_aliases (
+                alias       TEXT PRIMARY KEY,
+                canonical   TEXT NOT NULL,
+                created_at  REAL NOT NULL
+            )
+        """)
+
+    def get(self, alias: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT canonical FROM route_aliases WHERE alias = ?", (alias,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, alias: str, canonical: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO route_aliases (alias, canonical, created_at) VALUES (?, ?, ?)",
+                (alias, canonical, time.time()),
+            )
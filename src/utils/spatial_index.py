@@ -0,0 +1,242 @@
+import os
+import math
+import numpy as np
+
+
+EARTH_RADIUS_M = 6371000
+
+MATCH_INDEX_BACKEND = os.getenv("MATCH_INDEX_BACKEND", "grid")
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+    두 GPS 좌표 간의 거리를 미터(m) 단위로 계산합니다 (Haversine Formula).
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+
+    a = np.sin(dphi / 2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return EARTH_RADIUS_M * c
+
+
+def smallest_angle_diff(angle1, angle2):
+    """
+    두 각도 사이의 가장 작은 차이를 계산합니다.
+    """
+    diff = np.abs(angle1 - angle2) % 360
+    return np.minimum(diff, 360 - diff)
+
+
+def compass_bearing(dx_m, dy_m):
+    """
+    투영 좌표(동쪽 dx_m, 북쪽 dy_m, 미터) 변위의 방위각(도).
+    카탈로그 파일명의 heading 과 같은 기준입니다: 북쪽 0°, 시계 방향, [0, 360).
+    """
+    return np.degrees(np.arctan2(dx_m, dy_m)) % 360
+
+
+class BruteForceIndex:
+    """
+    모든 이미지를 매번 전수 비교하는 기준(검증용) 백엔드.
+    """
+    name = "brute"
+
+    def __init__(self, lons, lats, headings, filenames: list[str]):
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.headings = np.asarray(headings, dtype=np.float64)
+        self.filenames = filenames
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def _candidates(self, lon: float, lat: float, max_dist_m: float) -> np.ndarray:
+        return np.arange(len(self.filenames))
+
+    def query(
+        self,
+        lon: float,
+        lat: float,
+        heading: float,
+        max_dist_m: float,
+        max_angle_deg: float,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (lon, lat) 에서 max_dist_m 이내, heading 차이가 max_angle_deg 이내인 이미지를 찾습니다.
+
+        Returns:
+            (인덱스 배열, 거리 배열(m), 각도 차이 배열(도))
+        """
+        cand = self._candidates(lon, lat, max_dist_m)
+        if len(cand) == 0:
+            empty = np.empty(0, dtype=np.float64)
+            return cand, empty, empty
+
+        dists = haversine_distance(lat, lon, self.lats[cand], self.lons[cand])
+        angle_diffs = smallest_angle_diff(heading, self.headings[cand])
+
+        mask = (dists <= max_dist_m) & (angle_diffs <= max_angle_deg)
+        return cand[mask], dists[mask], angle_diffs[mask]
+
+    def _candidate_pairs(self, lons, lats, max_dist_m: float) -> tuple[np.ndarray, np.ndarray]:
+        n = len(self.filenames)
+        pts = np.repeat(np.arange(len(lons)), n)
+        imgs = np.tile(np.arange(n), len(lons))
+        return pts, imgs
+
+    def query_many(
+        self,
+        lons,
+        lats,
+        headings,
+        max_dist_m: float,
+        max_angle_deg: float,
+        chunk_size: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        여러 경로 지점에 대한 query 를 청크 단위로 한 번에 수행합니다.
+
+        Returns:
+            (지점 인덱스, 이미지 인덱스, 거리(m), 각도 차이(도)) - 지점 순으로 정렬된 평탄 배열
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        headings = np.asarray(headings, dtype=np.float64)
+
+        if chunk_size is None:
+            # (지점 × 후보) 쌍이 한 청크에 약 2M 개를 넘지 않도록
+            chunk_size = max(1, 2_000_000 // max(1, self._pairs_per_point_hint()))
+
+        out = ([], [], [], [])
+        for start in range(0, len(lons), chunk_size):
+            end = min(start + chunk_size, len(lons))
+            pts, imgs = self._candidate_pairs(lons[start:end], lats[start:end], max_dist_m)
+            if not len(pts):
+                continue
+            pts = pts + start
+
+            dists = haversine_distance(lats[pts], lons[pts], self.lats[imgs], self.lons[imgs])
+            angle_diffs = smallest_angle_diff(headings[pts], self.headings[imgs])
+            mask = (dists <= max_dist_m) & (angle_diffs <= max_angle_deg)
+
+            for acc, arr in zip(out, (pts, imgs, dists, angle_diffs)):
+                acc.append(arr[mask])
+
+        if not out[0]:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.float64),
+                np.empty(0, dtype=np.float64),
+            )
+        return tuple(np.concatenate(acc) for acc in out)
+
+    def _pairs_per_point_hint(self) -> int:
+        return len(self.filenames)
+
+    def nearest(self, lon: float, lat: float, max_dist_m: float) -> tuple[int, float] | None:
+        """
+        max_dist_m 반경 내에서 가장 가까운 이미지 (디버깅용). 없으면 None.
+        """
+        cand = self._candidates(lon, lat, max_dist_m)
+        if len(cand) == 0:
+            return None
+
+        dists = haversine_distance(lat, lon, self.lats[cand], self.lons[cand])
+        best = int(np.argmin(dists))
+        if dists[best] > max_dist_m:
+            return None
+        return int(cand[best]), float(dists[best])
+
+
+class GridIndex(BruteForceIndex):
+    """
+    등장방형(equirectangular) 투영 좌표를 cell_size_m 격자로 나눈 버킷 인덱스.
+    질의 시 반경에 걸치는 셀만 후보로 보고, 최종 필터는 haversine 으로 정확히 수행합니다.
+    """
+    name = "grid"
+
+    def __init__(self, lons, lats, headings, filenames: list[str], cell_size_m: float = 10.0):
+        super().__init__(lons, lats, headings, filenames)
+
+        self.cell_size_m = cell_size_m
+        self.lat0 = float(np.mean(self.lats)) if len(self.lats) else 0.0
+        self._cos_lat0 = math.cos(math.radians(self.lat0))
+
+        cx, cy = self._cells(self.lons, self.lats)
+        keys = self._keys(cx, cy)
+
+        # 셀 키로 정렬해 두고, 셀마다 [start, end) 구간을 기록
+        self._order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self._order]
+        uniq, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+        self._buckets = {
+            int(k): (int(s), int(s + c))
+            for k, s, c in zip(uniq, starts, counts)
+        }
+
+    def _project(self, lons, lats):
+        x = np.radians(lons) * EARTH_RADIUS_M * self._cos_lat0
+        y = np.radians(lats) * EARTH_RADIUS_M
+        return x, y
+
+    def _cells(self, lons, lats):
+        x, y = self._project(lons, lats)
+        return (
+            np.floor(x / self.cell_size_m).astype(np.int64),
+            np.floor(y / self.cell_size_m).astype(np.int64),
+        )
+
+    @staticmethod
+    def _keys(cx, cy):
+        return (cx << 32) ^ (cy & 0xFFFFFFFF)
+
+    def _candidates(self, lon: float, lat: float, max_dist_m: float) -> np.ndarray:
+        # 투영 오차를 감안해 반경을 살짝 넉넉하게 잡는다
+        radius = max_dist_m * 1.01 + 1.0
+        x, y = self._project(lon, lat)
+        x0 = math.floor((x - radius) / self.cell_size_m)
+        x1 = math.floor((x + radius) / self.cell_size_m)
+        y0 = math.floor((y - radius) / self.cell_size_m)
+        y1 = math.floor((y + radius) / self.cell_size_m)
+
+        parts = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self._buckets.get(int(self._keys(np.int64(cx), np.int64(cy))))
+                if bucket:
+                    parts.append(self._order[bucket[0]:bucket[1]])
+
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def _candidate_pairs(self, lons, lats, max_dist_m: float) -> tuple[np.ndarray, np.ndarray]:
+        parts = [self._candidates(lon, lat, max_dist_m) for lon, lat in zip(lons, lats)]
+        counts = [len(p) for p in parts]
+        if not sum(counts):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        pts = np.repeat(np.arange(len(parts)), counts)
+        return pts, np.concatenate(parts)
+
+    def _pairs_per_point_hint(self) -> int:
+        return 1000
+
+
+INDEX_BACKENDS = {
+    BruteForceIndex.name: BruteForceIndex,
+    GridIndex.name: GridIndex,
+}
+
+
+def build_index(lons, lats, headings, filenames: list[str], backend: str | None = None, **kwargs):
+    """
+    backend 이름("grid", "brute")에 해당하는 공간 인덱스를 생성합니다.
+    """
+    backend = backend or MATCH_INDEX_BACKEND
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"지원하지 않는 인덱스 백엔드입니다: {backend} (가능: {list(INDEX_BACKENDS)})")
+    return INDEX_BACKENDS[backend](lons, lats, headings, filenames, **kwargs)
@@ -0,0 +1,230 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable
+
+
+# 프로세스/노드 사이에서 공유하는 상태(lease) 저장소: sqlite(단일 노드, 파일 잠금) / memory(단일 프로세스용)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+# lease 유효 시간(초). 보유자는 이 시간의 1/3 마다 갱신하며, 프로세스가 죽으면 이 시간 뒤 다른 워커가 넘겨받는다
+LEASE_SECONDS = float(os.getenv("LEASE_SECONDS", "30"))
+# 공유 SQLite 파일(STATE_DB)을 여러 워커가 함께 쓸 때, 다른 프로세스의 쓰기 잠금을 기다리는 최대 시간(초)
+SQLITE_TIMEOUT_SECONDS = float(os.getenv("SQLITE_TIMEOUT_SECONDS", "30"))
+
+
+class StateBackend:
+    """
+    키 단위 lease(claim-or-join) 인터페이스.
+
+    Redis 로 구현한다면 claim 은 `SET key owner NX PX ttl` 후 GET,
+    renew/release 는 owner 를 비교하는 Lua 스크립트에 해당합니다.
+    """
+
+    def claim(self, key: str, owner: str, ttl_seconds: float) -> str:
+        """
+        비어 있거나 만료된 키면 owner 가 차지합니다. 현재 보유자를 반환합니다 (owner 와 같으면 차지한 것).
+        """
+        raise NotImplementedError
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        owner 가 아직 보유 중이면 만료 시각을 늘리고 True 를 반환합니다.
+        """
+        raise NotImplementedError
+
+    def release(self, key: str, owner: str) -> None:
+        raise NotImplementedError
+
+    def holder(self, key: str) -> str | None:
+        """
+        만료되지 않은 현재 보유자. 없으면 None.
+        """
+        raise NotImplementedError
+
+    def any_held(self, prefix: str) -> bool:
+        """
+        prefix 로 시작하는 키 중 만료되지 않은 lease 가 하나라도 있으면 True.
+        (Redis 라면 SCAN MATCH prefix* 에 해당)
+        """
+        raise NotImplementedError
+
+
+class SqliteStateBackend(StateBackend):
+    """
+    같은 노드의 여러 프로세스(uvicorn --workers 등)가 SQLite 파일 잠금으로 lease 를 공유합니다.
+    """
+
+    def __init__(self, db_path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=SQLITE_TIMEOUT_SECONDS)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                key         TEXT PRIMARY KEY,
+                owner       TEXT NOT NULL,
+                expires_at  REAL NOT NULL
+            )
+        """)
+
+    def claim(self, key: str, owner: str, ttl_seconds: float) -> str:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡아 확인과 기록 사이에 다른 프로세스가 끼어들지 못하게 한다
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT owner, expires_at FROM leases WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now and row[0] != owner:
+                    self._conn.execute("COMMIT")
+                    return row[0]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                    (key, owner, now + ttl_seconds),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return owner
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ? AND expires_at > ?",
+                (now + ttl_seconds, key, owner, now),
+            )
+        return cur.rowcount == 1
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def holder(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def any_held(self, prefix: str) -> bool:
+        # 기본 키 인덱스로 범위 검색
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM leases WHERE key >= ? AND key < ? AND expires_at > ? LIMIT 1",
+                (prefix, prefix + "\uffff", time.time()),
+            ).fetchone()
+        return row is not None
+
+
+class MemoryStateBackend(StateBackend):
+    """
+    프로세스 안에서만 공유되는 Redis 흉내 구현 (SET NX PX 의미). 단일 워커 실행/벤치마크용.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._leases: dict[str, tuple[str, float]] = {}
+
+    def claim(self, key: str, owner: str, ttl_seconds: float) -> str:
+        now = time.monotonic()
+        with self._lock:
+            current = self._leases.get(key)
+            if current is not None and current[1] > now and current[0] != owner:
+                return current[0]
+            self._leases[key] = (owner, now + ttl_seconds)
+        return owner
+
+    def renew(self, key: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            current = self._leases.get(key)
+            if current is None or current[0] != owner or current[1] <= now:
+                return False
+            self._leases[key] = (owner, now + ttl_seconds)
+        return True
+
+    def release(self, key: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(key, (None,))[0] == owner:
+                del self._leases[key]
+
+    def holder(self, key: str) -> str | None:
+        with self._lock:
+            current = self._leases.get(key)
+        return current[0] if current is not None and current[1] > time.monotonic() else None
+
+    def any_held(self, prefix: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(k.startswith(prefix) and expires > now for k, (_, expires) in self._leases.items())
+
+
+STATE_BACKENDS: dict[str, Callable[[str], StateBackend]] = {
+    "sqlite": SqliteStateBackend,
+    "memory": lambda db_path: MemoryStateBackend(),
+}
+
+
+def open_state_backend(db_path: str, name: str = STATE_BACKEND) -> StateBackend:
+    if name not in STATE_BACKENDS:
+        raise ValueError(f"지원하지 않는 상태 저장소입니다: {name} (가능: {list(STATE_BACKENDS)})")
+    return STATE_BACKENDS[name](db_path)
+
+
+def _new_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    """
+    키 하나에 대한 lease. 차지하는 동안 백그라운드 스레드가 주기적으로 갱신합니다.
+
+        lease = Lease(backend, "video:<key>")
+        if lease.acquire():          # 차지 (claim)
+            try: ...
+            finally: lease.release()
+        else: ...                    # 다른 워커가 처리 중 (join)
+    """
+
+    def __init__(self, backend: StateBackend, key: str, ttl_seconds: float = LEASE_SECONDS):
+        self.backend = backend
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.owner = _new_owner()
+        self._stop = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+    def acquire(self, blocking: bool = False, poll_seconds: float = 1.0) -> bool:
+        """
+        차지하면 True. blocking=True 이면 현재 보유자가 놓거나 만료될 때까지 기다렸다가 차지합니다.
+        """
+        while self.backend.claim(self.key, self.owner, self.ttl_seconds) != self.owner:
+            if not blocking:
+                return False
+            time.sleep(poll_seconds)
+
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._renew_loop, name=f"lease-{self.key}", daemon=True)
+        self._heartbeat.start()
+        return True
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.ttl_seconds / 3):
+            if not self.backend.renew(self.key, self.owner, self.ttl_seconds):
+                return
+
+    def release(self) -> None:
+        self._stop.set()
+        self.backend.release(self.key, self.owner)
+
+    def __enter__(self):
+        self.acquire(blocking=True)
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,151 @@
+import logging
+import math
+import os
+from typing import Callable
+
+import numpy as np
+
+from utils.image_catalog import parse_image_filename
+from utils.metrics import STAGE_SECONDS
+from utils.spatial_index import EARTH_RADIUS_M, smallest_angle_diff
+
+logger = logging.getLogger(__name__)
+
+
+# transition 하나가 덮을 최대 거리 (미터). 이보다 촘촘한 매칭 이미지는 건너뛴다 (0 이면 모두 사용)
+TRANSITION_SPACING_M = float(os.getenv("TRANSITION_SPACING_M", "20"))
+# 경로당 최대 transition 수 (0 이면 제한 없음). 넘으면 간격을 넓힌다
+MAX_TRANSITIONS = int(os.getenv("MAX_TRANSITIONS", "0"))
+# 이 거리/각도 안에 있는 연속 이미지는 같은 장면으로 보고 하나만 남긴다
+DUPLICATE_DISTANCE_M = float(os.getenv("DUPLICATE_DISTANCE_M", "1.0"))
+DUPLICATE_HEADING_DEG = float(os.getenv("DUPLICATE_HEADING_DEG", "10"))
+
+# 촬영 위치 오차(수십 cm)로 구간이 간격을 살짝 넘는 것은 허용한다
+_SPACING_TOLERANCE = 1.1
+# 캐시에 이미 있는 transition 의 비용 (새로 생성하는 구간 = 1). 생성 비용은 없고 영상 길이만 늘어난다
+_CACHED_HOP_COST = 0.1
+
+
+def max_hop_m(spacing_m: float = TRANSITION_SPACING_M) -> float:
+    """
+    transition 한 구간이 실제로 덮을 수 있는 최대 거리 (간격 + 위치 오차 허용분).
+    """
+    return spacing_m * _SPACING_TOLERANCE
+
+
+def _positions(images: list[str]) -> tuple[np.ndarray, np.ndarray] | None:
+    parsed = [parse_image_filename(name) for name in images]
+    if any(p is None for p in parsed):
+        return None
+    arr = np.asarray(parsed, dtype=np.float64)
+    lat0 = math.radians(float(np.mean(arr[:, 1])))
+    scale = np.array([EARTH_RADIUS_M * math.cos(lat0), EARTH_RADIUS_M]) * (math.pi / 180)
+    return arr[:, :2] * scale, arr[:, 2]
+
+
+def _thin_duplicates(xy: np.ndarray, headings: np.ndarray, distance_m: float, heading_deg: float) -> list[int]:
+    """
+    직전에 남긴 이미지와 위치/방향이 거의 같은 이미지를 뺀 인덱스 목록. 마지막 이미지는 항상 남깁니다.
+    """
+    kept = [0]
+    for i in range(1, len(xy)):
+        last = kept[-1]
+        same_place = np.hypot(*(xy[i] - xy[last])) <= distance_m
+        if same_place and smallest_angle_diff(headings[i], headings[last]) <= heading_deg:
+            continue
+        kept.append(i)
+    if kept[-1] != len(xy) - 1:
+        # 도착 장면은 마지막 이미지로
+        if len(kept) > 1:
+            kept[-1] = len(xy) - 1
+        else:
+            kept.append(len(xy) - 1)
+    return kept
+
+
+def _select(cum: np.ndarray, spacing_m: float, is_cached: Callable[[int, int], bool]) -> list[int]:
+    """
+    첫/마지막 이미지를 잇는 부분 수열 중 비용(새 구간 1, 캐시된 구간 _CACHED_HOP_COST) 합이 최소인 것.
+
+    한 구간은 spacing_m 을 넘지 않아야 하며, 이웃 이미지끼리 이미 그보다 멀면 그 구간은 그대로 씁니다.
+    """
+    limit = max_hop_m(spacing_m)
+    n = len(cum)
+    cost = np.full(n, np.inf)
+    prev = np.full(n, -1, dtype=np.int64)
+    cost[0] = 0.0
+    for j in range(1, n):
+        i = j - 1
+        while i >= 0 and (i == j - 1 or cum[j] - cum[i] <= limit):
+            c = cost[i] + (_CACHED_HOP_COST if is_cached(i, j) else 1.0)
+            # 비용이 같으면 더 먼 곳에서 오는 (긴) 구간을 고른다
+            if c <= cost[j]:
+                cost[j] = c
+                prev[j] = i
+            i -= 1
+
+    path = [n - 1]
+    while path[-1] != 0:
+        path.append(int(prev[path[-1]]))
+    return path[::-1]
+
+
+def plan_transitions(
+    images: list[str],
+    spacing_m: float = TRANSITION_SPACING_M,
+    max_transitions: int = MAX_TRANSITIONS,
+    is_cached: Callable[[str, str], bool] | None = None,
+    duplicate_m: float = DUPLICATE_DISTANCE_M,
+    duplicate_deg: float = DUPLICATE_HEADING_DEG,
+) -> list[str]:
+    """
+    매칭된 이미지 순서열에서 실제로 transition 을 만들 이미지만 고릅니다.
+
+    1. 위치/방향이 거의 같은 연속 이미지(중복 촬영)를 하나로 줄이고
+    2. 구간 길이가 spacing_m 이하가 되도록 하면서, 새로 생성할 구간 수가 최소가 되는 부분 수열을 고릅니다.
+       is_cached(이미지 A, 이미지 B) 가 True 인 쌍은 생성 비용이 없으므로 우선 사용합니다.
+    3. max_transitions 가 있으면 구간 수가 그 이하가 될 때까지 간격을 넓힙니다.
+
+    그래서 경로 비용/지연은 이미지 밀도가 아니라 경로 길이에 비례합니다. 첫/마지막 이미지는 항상 포함됩니다.
+    """
+    if len(images) < 3:
+        return list(images)
+    positions = _positions(images)
+    if positions is None:
+        logger.warning("⚠️ 좌표를 읽을 수 없는 이미지가 있어 transition 계획을 건너뜁니다.")
+        return list(images)
+
+    with STAGE_SECONDS.time(stage="plan"):
+        xy, headings = positions
+        kept = _thin_duplicates(xy, headings, duplicate_m, duplicate_deg)
+        names = [images[i] for i in kept]
+        xy = xy[kept]
+
+        step = np.hypot(*np.diff(xy, axis=0).T)
+        cum = np.concatenate([[0.0], np.cumsum(step)])
+
+        memo: dict[tuple[int, int], bool] = {}
+
+        def _cached(i: int, j: int) -> bool:
+            if is_cached is None:
+                return False
+            if (i, j) not in memo:
+                memo[(i, j)] = is_cached(names[i], names[j])
+            return memo[(i, j)]
+
+        if max_transitions > 0:
+            spacing_m = max(spacing_m, cum[-1] / max_transitions)
+        if spacing_m > 0:
+            selected = _select(cum, spacing_m, _cached)
+            while max_transitions > 0 and len(selected) - 1 > max_transitions:
+                spacing_m *= 1.25
+                selected = _select(cum, spacing_m, _cached)
+        else:
+            selected = list(range(len(names)))
+
+    reused = sum(1 for a, b in zip(selected, selected[1:]) if _cached(a, b))
+    logger.info(
+        "🗺 transition 계획: 매칭 %d장 → 중복 제거 %d장 → 선택 %d장 (%.0fm, 구간 %d개 중 캐시 %d개)",
+        len(images), len(names), len(selected), cum[-1], len(selected) - 1, reused,
+    )
+    return [names[i] for i in selected]
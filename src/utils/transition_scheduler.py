@@ -0,0 +1,204 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+VEO_MAX_IN_FLIGHT = int(os.getenv("VEO_MAX_IN_FLIGHT", "4"))
+VEO_MAX_RETRIES = int(os.getenv("VEO_MAX_RETRIES", "3"))
+# 요청 제출(및 동기 작업 실행)에 쓰는 스레드 수. 비동기 작업의 대기는 스레드를 쓰지 않는다
+VEO_SUBMIT_WORKERS = int(os.getenv("VEO_SUBMIT_WORKERS", "4"))
+# 분당 최대 생성 요청 수 (0 이면 제한 없음). 오프라인 사전 생성처럼 한꺼번에 많이 보낼 때 쿼터를 나눠 쓰기 위함
+VEO_RATE_PER_MINUTE = float(os.getenv("VEO_RATE_PER_MINUTE", "0"))
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """
+    429 / RESOURCE_EXHAUSTED 계열 (쿼터 초과) 에러인지 판별합니다.
+    """
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code == 429:
+        return True
+    text = str(exc)
+    return "RESOURCE_EXHAUSTED" in text or "quota" in text.lower()
+
+
+class TransitionScheduler:
+    """
+    독립적인 transition 생성 작업들을 한꺼번에 제출하고, 동시에 실행되는 개수를 제한하는 스케줄러.
+
+    * max_in_flight 개까지만 동시에 실행합니다. (Future 를 반환하는 작업은 끝날 때까지 실행 중으로 셈)
+      한 인스턴스를 여러 작업이 함께 쓰면 이 한도와 쿼터 대기는 그 작업들 전체에 걸립니다.
+    * 쿼터 초과 에러가 나면 모든 작업이 공유하는 대기 시간(backoff)을 걸어 새 요청을 잠시 멈춥니다.
+    * 실패한 작업은 그 작업만 개별적으로 max_retries 번까지 재시도합니다.
+    * rate_per_minute 이 있으면 작업이 throttle() 을 호출할 때 요청 간격을 그만큼 벌립니다.
+    * 결과는 입력 순서대로 yield 합니다 (앞 작업이 끝나는 즉시 병합 단계로 넘길 수 있도록).
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = VEO_MAX_IN_FLIGHT,
+        max_retries: int = VEO_MAX_RETRIES,
+        backoff_base: float = 5.0,
+        backoff_max: float = 120.0,
+        workers: int = VEO_SUBMIT_WORKERS,
+        rate_per_minute: float = VEO_RATE_PER_MINUTE,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.workers = max(1, workers)
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_per_minute = rate_per_minute
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._next_slot = 0.0
+        self._quota_strikes = 0
+
+        # 모든 run() 이 공유하는 대기열 / 실행 중 개수 / 스레드 풀
+        self._slots_lock = threading.Lock()
+        self._waiting: deque = deque()
+        self._in_flight = 0
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(self.workers, self.max_in_flight), thread_name_prefix="transition",
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def _wait_for_quota(self):
+        while True:
+            with self._lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def throttle(self) -> None:
+        """
+        rate_per_minute 을 넘지 않도록 다음 요청 차례까지 기다립니다. (캐시 재사용은 호출하지 않음)
+        """
+        if self.rate_per_minute <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 60.0 / self.rate_per_minute
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _on_quota_error(self):
+        with self._lock:
+            self._quota_strikes += 1
+            delay = self._backoff(self._quota_strikes)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning("🚦 쿼터 초과 감지, 새 요청을 %.0f초간 보류합니다.", delay)
+
+    def _on_success(self):
+        with self._lock:
+            self._quota_strikes = max(0, self._quota_strikes - 1)
+
+    def _attempt(self, i: int, task: T, fn: Callable, out: Future, attempt: int) -> None:
+        self._wait_for_quota()
+        try:
+            result = fn(task)
+        except Exception as e:
+            self._retry_or_fail(i, task, fn, out, attempt, e)
+            return
+
+        if not isinstance(result, Future):
+            self._on_success()
+            out.set_result(result)
+            return
+
+        # 비동기 작업(예: Veo operation 추적)은 스레드를 붙잡지 않고 완료 콜백으로 이어서 처리
+        def _done(f: Future):
+            try:
+                value = f.result()
+            except Exception as e:
+                self._retry_or_fail(i, task, fn, out, attempt, e)
+                return
+            self._on_success()
+            out.set_result(value)
+
+        result.add_done_callback(_done)
+
+    def _retry_or_fail(self, i: int, task: T, fn: Callable, out: Future, attempt: int, e: Exception) -> None:
+        if attempt >= self.max_retries:
+            out.set_exception(e)
+            return
+
+        if is_quota_error(e):
+            self._on_quota_error()
+            delay = 0.0  # 다음 시도가 _wait_for_quota 에서 공유 대기 시간만큼 기다린다
+        else:
+            delay = self._backoff(attempt)
+
+        logger.warning("🔁 작업 %d 재시도 (%d/%d): %r", i + 1, attempt + 1, self.max_retries, e)
+        timer = threading.Timer(delay, self._resubmit, (i, task, fn, out, attempt + 1))
+        timer.daemon = True
+        timer.start()
+
+    def _resubmit(self, i: int, task: T, fn: Callable, out: Future, attempt: int) -> None:
+        try:
+            self._pool.submit(self._attempt, i, task, fn, out, attempt)
+        except RuntimeError as e:  # 인터프리터 종료로 풀이 닫힌 경우
+            out.set_exception(e)
+
+    def _launch(self) -> None:
+        # 빈 자리만큼 대기열 앞에서부터 실행. 끝난 작업이 자리를 돌려주면 다시 호출된다
+        while True:
+            with self._slots_lock:
+                if self._in_flight >= self.max_in_flight or not self._waiting:
+                    return
+                self._in_flight += 1
+                i, task, fn, out = self._waiting.popleft()
+            out.add_done_callback(self._release)
+            self._pool.submit(self._attempt, i, task, fn, out, 0)
+
+    def _release(self, _=None) -> None:
+        with self._slots_lock:
+            self._in_flight -= 1
+        self._launch()
+
+    def run(
+        self,
+        tasks: list[T],
+        fn: Callable[[T], R | Future],
+    ) -> Iterator[tuple[int, R | None, Exception | None]]:
+        """
+        모든 작업을 한 번에 제출하고, (순번, 결과, 에러) 를 입력 순서대로 yield 합니다.
+        재시도 후에도 실패한 작업은 결과 대신 에러가 채워집니다.
+
+        fn 이 Future 를 반환하면 그 Future 가 끝날 때까지를 "실행 중"으로 세며, 그동안 스레드는
+        점유하지 않습니다. 따라서 max_in_flight 를 늘려도 스레드 수는 제출에 필요한 만큼만 늘어납니다.
+        """
+        if not tasks:
+            return
+
+        outs = [Future() for _ in tasks]
+        with self._slots_lock:
+            self._waiting.extend((i, task, fn, out) for i, (task, out) in enumerate(zip(tasks, outs)))
+        self._launch()
+
+        try:
+            for i, out in enumerate(outs):
+                try:
+                    yield i, out.result(), None
+                except Exception as e:
+                    yield i, None, e
+        finally:
+            # 호출한 쪽이 중간에 그만두면 아직 시작하지 않은 작업은 대기열에서 뺀다 (실행 중인 작업은 끝까지 진행)
+            mine = {id(out) for out in outs}
+            with self._slots_lock:
+                self._waiting = deque(item for item in self._waiting if id(item[3]) not in mine)
@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+R = TypeVar("R")
+
+VEO_POLL_MIN_SECONDS = float(os.getenv("VEO_POLL_MIN_SECONDS", "2"))
+VEO_POLL_MAX_SECONDS = float(os.getenv("VEO_POLL_MAX_SECONDS", "30"))
+# 관측값이 쌓이기 전의 예상 생성 시간 (초)
+VEO_EXPECTED_SECONDS = float(os.getenv("VEO_EXPECTED_SECONDS", "60"))
+
+# 상태 조회 자체가 이만큼 연속으로 실패하면 해당 작업을 실패 처리
+_MAX_POLL_ERRORS = 5
+_EMA_ALPHA = 0.3
+
+
+class _Tracked:
+    def __init__(self, operation: Any, finish: Callable[[Any], Any]):
+        self.operation = operation
+        self.finish = finish
+        self.future: Future = Future()
+        self.started = time.monotonic()
+        self.errors = 0
+
+
+class OperationTracker:
+    """
+    Veo long-running operation 들을 스레드 하나로 모아서 폴링하는 추적기.
+
+    * track() 은 작업을 등록하고 Future 를 바로 반환합니다. 작업이 끝나면 finish(operation) 의
+      반환값(또는 예외)이 Future 에 채워집니다. finish(다운로드 등)는 폴링 스레드가 아닌
+      별도의 완료 처리 스레드에서 실행되므로 폴링을 막지 않습니다.
+    * 폴링 간격은 고정 10초가 아니라, 지금까지 관측한 생성 시간(지수 이동 평균)을 기준으로
+      완료 예상 시각에 가까워질수록 촘촘하게(min_interval), 예상보다 늦어지면 점점 느슨하게 잡습니다.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[Any], Any],
+        min_interval: float = VEO_POLL_MIN_SECONDS,
+        max_interval: float = VEO_POLL_MAX_SECONDS,
+        expected_seconds: float = VEO_EXPECTED_SECONDS,
+        completion_workers: int = 4,
+    ):
+        self.refresh = refresh
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.expected_seconds = expected_seconds
+
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, int, _Tracked]] = []
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+        self._completions = ThreadPoolExecutor(max_workers=completion_workers, thread_name_prefix="veo-complete")
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def track(self, operation: Any, finish: Callable[[Any], R]) -> "Future[R]":
+        entry = _Tracked(operation, finish)
+        if getattr(operation, "done", False):
+            self._completions.submit(self._complete, entry)
+            return entry.future
+
+        with self._cond:
+            self._schedule(entry, self._next_delay(0.0))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="veo-poller", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry.future
+
+    def _next_delay(self, elapsed: float) -> float:
+        remaining = self.expected_seconds - elapsed
+        if remaining > 0:
+            # 예상 완료 시각까지 남은 시간의 절반씩 다가간다 (30s → 15s → … → min_interval)
+            delay = remaining / 2
+        else:
+            # 예상보다 늦어진 작업은 늦어진 만큼 간격을 늘린다
+            delay = self.min_interval + (-remaining) / 4
+        return min(self.max_interval, max(self.min_interval, delay))
+
+    def _schedule(self, entry: _Tracked, delay: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), entry))
+
+    def _observe(self, seconds: float) -> None:
+        with self._cond:
+            self.expected_seconds = (1 - _EMA_ALPHA) * self.expected_seconds + _EMA_ALPHA * seconds
+
+    def _complete(self, entry: _Tracked) -> None:
+        try:
+            entry.future.set_result(entry.finish(entry.operation))
+        except BaseException as e:
+            entry.future.set_exception(e)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._cond.wait(None if not self._heap else self._heap[0][0] - now)
+
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+
+            for entry in due:
+                elapsed = time.monotonic() - entry.started
+                try:
+                    entry.operation = self.refresh(entry.operation)
+                    entry.errors = 0
+                except Exception as e:
+                    entry.errors += 1
+                    if entry.errors >= _MAX_POLL_ERRORS:
+                        entry.future.set_exception(e)
+                        continue
+                    logger.warning("⚠️ Veo 상태 조회 실패 (%d/%d): %r", entry.errors, _MAX_POLL_ERRORS, e)
+                    with self._cond:
+                        self._schedule(entry, min(self.max_interval, self.min_interval * 2 ** entry.errors))
+                    continue
+
+                if entry.operation.done:
+                    self._observe(elapsed)
+                    STAGE_SECONDS.observe(elapsed, stage="transition_poll")
+                    self._completions.submit(self._complete, entry)
+                else:
+                    with self._cond:
+                        self._schedule(entry, self._next_delay(elapsed))
@@ -0,0 +1,321 @@
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from utils.clip_cache import file_digest
+from utils.metrics import CACHE_REQUESTS
+from utils.state_backend import LEASE_SECONDS, SQLITE_TIMEOUT_SECONDS, Lease, MemoryStateBackend, StateBackend
+from utils.video_serving import forget_video
+
+logger = logging.getLogger(__name__)
+
+
+# 완성 영상(data/cache/<정규 키>.mp4) 전체 용량 한도. 넘으면 EVICTION_POLICIES 순서대로 지운다
+VIDEO_CACHE_MAX_BYTES = int(os.getenv("VIDEO_CACHE_MAX_BYTES", str(50 * 1024**3)))
+VIDEO_CACHE_POLICY = os.getenv("VIDEO_CACHE_POLICY", "lru")
+# 마지막 사용 후 이 시간(초)이 지나면 용량과 관계없이 만료 (0 이면 사용 안 함)
+VIDEO_CACHE_TTL_SECONDS = float(os.getenv("VIDEO_CACHE_TTL_SECONDS", "0"))
+# 작업이 끝난 HLS 스트림 디렉토리(data/hls/<키>)를 보관할 시간(초)
+HLS_RETENTION_SECONDS = float(os.getenv("HLS_RETENTION_SECONDS", str(24 * 60 * 60)))
+
+# 축출 순서 (먼저 오는 것부터 지움)
+EVICTION_POLICIES = {
+    "lru": "last_access",
+    "lfu": "hits, last_access",
+}
+
+_ETAG_SUFFIX = ".etag"
+_FASTSTART_SUFFIX = ".faststart.mp4"
+# 다른 프로세스가 아직 쓰고 있을 수 있는 파일(병합/faststart 중)은 이 시간(초) 동안 건드리지 않는다
+_IN_PROGRESS_GRACE_SECONDS = 60 * 60
+# pin lease 키: "video-pin:<정규 키>:<VideoCache 인스턴스>"
+_PIN_PREFIX = "video-pin:"
+
+
+def _sidecar_digest(path: str, st: os.stat_result) -> str | None:
+    # 서빙 시 만들어 둔 .etag 사이드카("크기 mtime_ns 해시")가 최신이면 다시 해시하지 않고 쓴다
+    try:
+        with open(path + _ETAG_SUFFIX, "r", encoding="utf-8") as f:
+            size, mtime_ns, digest = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if int(size) != st.st_size or int(mtime_ns) != st.st_mtime_ns:
+        return None
+    return digest
+
+
+class VideoCache:
+    """
+    완성 영상 캐시의 인덱스(크기, 마지막 사용 시각, 사용 횟수, 내용 해시)를 SQLite 에 두고 용량을 관리합니다.
+
+    * 전체 크기가 max_bytes 를 넘으면 policy(lru / lfu) 순서대로 지웁니다.
+    * ttl_seconds 가 있으면 그 시간 동안 쓰이지 않은 영상은 용량과 관계없이 만료됩니다.
+    * 서빙 중이거나 진행 중인 작업이 참조하는 영상은 pin 으로 축출에서 제외됩니다.
+      pin 은 state(공유 lease 저장소)에 남으므로 다른 워커 프로세스의 축출에서도 제외됩니다.
+    * 시작 시 reconcile() 로 디스크에 이미 있는 파일과 인덱스를 맞춥니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        db_path: str,
+        max_bytes: int = VIDEO_CACHE_MAX_BYTES,
+        policy: str = VIDEO_CACHE_POLICY,
+        ttl_seconds: float = VIDEO_CACHE_TTL_SECONDS,
+        hls_dir: str | None = None,
+        hls_retention_seconds: float = HLS_RETENTION_SECONDS,
+        state: StateBackend | None = None,
+        lease_seconds: float = LEASE_SECONDS,
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"지원하지 않는 축출 정책입니다: {policy} (가능: {list(EVICTION_POLICIES)})")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttl_seconds = ttl_seconds
+        self.hls_dir = hls_dir
+        self.hls_retention_seconds = hls_retention_seconds
+        self.state = state or MemoryStateBackend()
+        self.lease_seconds = lease_seconds
+
+        self._lock = threading.Lock()
+        # 이 프로세스의 pin 수. 키마다 처음 pin 할 때 lease 하나를 잡고 마지막 unpin 에서 놓는다
+        self._pin_lock = threading.Lock()
+        self._pins: Counter[str] = Counter()
+        self._pin_leases: dict[str, Lease] = {}
+        self._instance = uuid.uuid4().hex[:8]
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None, timeout=SQLITE_TIMEOUT_SECONDS,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                key         TEXT PRIMARY KEY,
+                size        INTEGER NOT NULL,
+                digest      TEXT,
+                hits        INTEGER NOT NULL DEFAULT 0,
+                created_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    # ------------------------------------------------------------------ 조회 / 등록
+
+    def get(self, key: str) -> str | None:
+        """
+        영상 경로를 반환하고 사용 기록(마지막 사용 시각, 횟수)을 갱신합니다. 없거나 만료되었으면 None.
+        """
+        path = self.path_for(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT last_access FROM videos WHERE key = ?", (key,)).fetchone()
+        expired = row is not None and self._expired(row[0], now) and not self._is_pinned(key)
+        if row is not None and not expired and os.path.exists(path):
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE videos SET hits = hits + 1, last_access = ? WHERE key = ?",
+                    (now, key),
+                )
+            CACHE_REQUESTS.inc(cache="video", result="hit")
+            return path
+
+        if expired:
+            self._remove(key)
+        elif row is None and os.path.exists(path) and time.time() - os.path.getmtime(path) >= _IN_PROGRESS_GRACE_SECONDS:
+            # 인덱스 밖에서 생긴 파일 (reconcile 이전 등) 은 등록하고 사용. 최근 파일은 아직 병합 중일 수 있음
+            self.add(key)
+            CACHE_REQUESTS.inc(cache="video", result="hit")
+            return path
+        elif row is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM videos WHERE key = ?", (key,))
+        CACHE_REQUESTS.inc(cache="video", result="miss")
+        return None
+
+    def add(self, key: str) -> None:
+        """
+        새로 만든 영상을 인덱스에 등록하고, 필요하면 다른 영상을 축출합니다.
+        (생성 요청 자체를 한 번의 사용으로 세어, lfu 에서 새 영상이 바로 축출되지 않게 함)
+        """
+        path = self.path_for(key)
+        size = os.path.getsize(path)
+        digest = file_digest(path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO videos (key, size, digest, hits, created_at, last_access)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    size = excluded.size, digest = excluded.digest, last_access = excluded.last_access
+                """,
+                (key, size, digest, now, now),
+            )
+        self.evict()
+
+    # ------------------------------------------------------------------ pin
+
+    def pin(self, key: str) -> None:
+        with self._pin_lock:
+            self._pins[key] += 1
+            if self._pins[key] == 1:
+                lease = Lease(self.state, f"{_PIN_PREFIX}{key}:{self._instance}", self.lease_seconds)
+                lease.acquire()
+                self._pin_leases[key] = lease
+
+    def unpin(self, key: str) -> None:
+        with self._pin_lock:
+            self._pins[key] -= 1
+            if self._pins[key] <= 0:
+                del self._pins[key]
+                self._pin_leases.pop(key).release()
+
+    def _is_pinned(self, key: str) -> bool:
+        # 다른 프로세스의 pin 은 heartbeat 가 끊기면 lease_seconds 뒤 풀린다
+        with self._pin_lock:
+            if self._pins[key]:
+                return True
+        return self.state.any_held(f"{_PIN_PREFIX}{key}:")
+
+    @contextmanager
+    def pinned(self, key: str):
+        self.pin(key)
+        try:
+            yield
+        finally:
+            self.unpin(key)
+
+    # ------------------------------------------------------------------ 용량 관리
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - last_access > self.ttl_seconds
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM videos").fetchone()[0]
+
+    def _remove(self, key: str) -> bool:
+        path = self.path_for(key)
+        if self._is_pinned(key):
+            return False
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM videos WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("DELETE FROM videos WHERE key = ?", (key,))
+        # pin 은 get() 보다 먼저 잡히므로, 인덱스에서 뺀 뒤 다시 확인하면 그 사이 get() 으로
+        # 경로를 받아 간 요청이 있는지 알 수 있다. 있으면 항목을 되돌리고 파일은 남긴다
+        if self._is_pinned(key):
+            if row is not None:
+                with self._lock:
+                    self._conn.execute("INSERT OR IGNORE INTO videos VALUES (?, ?, ?, ?, ?, ?)", row)
+            return False
+        for p in (path, path + _ETAG_SUFFIX):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+        forget_video(path)
+        return True
+
+    def evict(self) -> list[str]:
+        """
+        만료된 영상과, 용량 한도를 넘는 만큼의 영상을 policy 순서대로 지웁니다. pin 된 영상은 건너뜁니다.
+
+        Returns:
+            지운 키 목록
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, size, last_access FROM videos ORDER BY {EVICTION_POLICIES[self.policy]}"
+            ).fetchall()
+        total = sum(size for _, size, _ in rows)
+
+        evicted = []
+        for key, size, last_access in rows:
+            if total <= self.max_bytes and not self._expired(last_access, now):
+                continue
+            if self._remove(key):
+                total -= size
+                evicted.append(key)
+                logger.info("🧹 영상 캐시 축출: %s (%.1fMB)", key, size / 1024**2)
+
+        self._sweep_hls(now)
+        return evicted
+
+    def _sweep_hls(self, now: float) -> None:
+        # 작업이 끝난 뒤 보관 기간이 지난 HLS 스트림은 완성 영상으로 대체되었으므로 지운다
+        if not self.hls_dir or not os.path.isdir(self.hls_dir):
+            return
+        for name in os.listdir(self.hls_dir):
+            d = os.path.join(self.hls_dir, name)
+            try:
+                if now - os.stat(d).st_mtime > self.hls_retention_seconds:
+                    shutil.rmtree(d)
+            except OSError:
+                continue
+
+    def reconcile(self) -> None:
+        """
+        시작 시 디스크와 인덱스를 맞춥니다.
+
+        디스크에만 있는 영상은 등록하고(마지막 사용 시각 = mtime), 파일이 사라진 항목과
+        짝이 없는 .etag 사이드카, 중단된 faststart 임시 파일은 지운 뒤 용량 한도를 적용합니다.
+        여러 워커 프로세스가 동시에 시작해도 되도록, 최근에 쓰인 파일은 다른 프로세스가 만드는 중으로 보고 건너뜁니다.
+        """
+        now = time.time()
+        on_disk = {}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+                recent = now - st.st_mtime < _IN_PROGRESS_GRACE_SECONDS
+                if name.endswith(_FASTSTART_SUFFIX):
+                    if not recent:
+                        os.remove(path)
+                elif name.endswith(".mp4") and os.path.isfile(path):
+                    on_disk[name[:-len(".mp4")]] = st
+                elif name.endswith(_ETAG_SUFFIX) and not os.path.exists(path[:-len(_ETAG_SUFFIX)]):
+                    os.remove(path)
+            except FileNotFoundError:
+                continue
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                indexed = dict(self._conn.execute("SELECT key, size FROM videos").fetchall())
+                for key in indexed.keys() - on_disk.keys():
+                    self._conn.execute("DELETE FROM videos WHERE key = ?", (key,))
+                for key, st in on_disk.items():
+                    if key not in indexed and now - st.st_mtime < _IN_PROGRESS_GRACE_SECONDS:
+                        continue  # 병합 중일 수 있음. 끝나면 add() 로 등록된다
+                    if key not in indexed:
+                        self._conn.execute(
+                            """
+                            INSERT INTO videos (key, size, digest, hits, created_at, last_access)
+                            VALUES (?, ?, ?, 0, ?, ?)
+                            """,
+                            (key, st.st_size, _sidecar_digest(self.path_for(key), st), st.st_mtime, st.st_mtime),
+                        )
+                    elif indexed[key] != st.st_size:
+                        self._conn.execute("UPDATE videos SET size = ? WHERE key = ?", (st.st_size, key))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        added = sum(1 for k, st in on_disk.items() if k not in indexed and now - st.st_mtime >= _IN_PROGRESS_GRACE_SECONDS)
+        removed = len(indexed.keys() - on_disk.keys())
+        if added or removed:
+            logger.info("🗂 영상 캐시 인덱스 정리: %d개 등록, %d개 제거", added, removed)
+        self.evict()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+
+from typing import Callable
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from utils.clip_cache import file_digest
+from utils.merge_videos import ensure_faststart
+
+logger = logging.getLogger(__name__)
+
+
+# 좌표 키 URL(/gen-video)은 재인덱싱 등으로 가리키는 영상이 바뀔 수 있어 짧게,
+# 정규 키 URL(/videos/<hash>.mp4)은 내용이 바뀌지 않으므로 immutable 로 캐시
+VIDEO_CACHE_MAX_AGE = int(os.getenv("VIDEO_CACHE_MAX_AGE", "3600"))
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 설정하면 본문 대신 X-Accel-Redirect 헤더만 보내 nginx 가 직접(sendfile) 전송하게 함.
+# 예: VIDEO_ACCEL_REDIRECT=/internal-videos/ (nginx 의 internal location 이 data/cache 를 가리켜야 함)
+VIDEO_ACCEL_REDIRECT = os.getenv("VIDEO_ACCEL_REDIRECT")
+
+_ETAG_SUFFIX = ".etag"
+
+_prepared_lock = threading.Lock()
+_prepared: dict[tuple[str, int, int], str] = {}
+
+
+class VideoFileResponse(FileResponse):
+    # 큰 영상 파일은 64KiB 대신 1MiB 단위로 보내 이벤트 루프 왕복을 줄인다.
+    # (서버가 http.response.pathsend 를 지원하면 Starlette 가 알아서 zero-copy 로 보냄)
+    chunk_size = 1024 * 1024
+
+    def __init__(self, *args, release: Callable[[], None] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # 전송이 끝나거나 클라이언트가 끊겨도 release 를 호출 (영상 캐시 pin 해제용, 이벤트 루프 밖에서)
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.release is not None:
+                await asyncio.to_thread(self.release)
+
+
+def prepare_video(path: str) -> tuple[str, os.stat_result]:
+    """
+    영상을 서빙할 수 있는 상태로 만들고 (faststart 보장) 내용 해시 기반 강한 ETag 를 반환합니다.
+
+    해시는 <영상>.etag 사이드카에 (크기, mtime) 와 함께 저장되므로 재시작 후에도 다시 계산하지 않습니다.
+    사이드카가 있다는 것은 이미 faststart 처리가 끝났다는 뜻이기도 합니다.
+    """
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _prepared_lock:
+        etag = _prepared.get(memo_key)
+    if etag:
+        return etag, st
+
+    sidecar = path + _ETAG_SUFFIX
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            size, mtime_ns, digest = f.read().split()
+        if int(size) != st.st_size or int(mtime_ns) != st.st_mtime_ns:
+            raise ValueError("stale")
+    except (OSError, ValueError):
+        if ensure_faststart(path):
+            logger.info("🚀 faststart 적용: %s", os.path.basename(path))
+            st = os.stat(path)
+        digest = file_digest(path)
+        tmp = f"{sidecar}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{st.st_size} {st.st_mtime_ns} {digest}")
+        os.replace(tmp, sidecar)
+
+    etag = f'"{digest[:32]}"'
+    with _prepared_lock:
+        _prepared[(os.path.abspath(path), st.st_size, st.st_mtime_ns)] = etag
+    return etag, st
+
+
+def forget_video(path: str) -> None:
+    """
+    지워진 영상의 ETag 메모를 버립니다 (영상 캐시 축출 시 호출).
+    """
+    abspath = os.path.abspath(path)
+    with _prepared_lock:
+        for key in [k for k in _prepared if k[0] == abspath]:
+            del _prepared[key]
+
+
+def _not_modified(request: Request, etag: str, st: os.stat_result) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(st.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def serve_video(
+    request: Request,
+    path: str,
+    immutable: bool = False,
+    release: Callable[[], None] | None = None,
+) -> Response:
+    """
+    data/cache 영상 응답. 강한 ETag / Last-Modified / Cache-Control 을 붙이고,
+    조건부 요청(If-None-Match, If-Modified-Since)에는 304, Range 요청에는 206 으로 응답합니다.
+    release 는 본문 전송이 끝났을 때(본문이 없으면 바로) 이벤트 루프 밖 스레드에서 한 번 호출됩니다.
+    """
+    try:
+        etag, st = await asyncio.to_thread(prepare_video, path)
+    except BaseException:
+        if release is not None:
+            await asyncio.to_thread(release)
+        raise
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else f"public, max-age={VIDEO_CACHE_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, st):
+        response = Response(status_code=304, headers=headers)
+    elif VIDEO_ACCEL_REDIRECT:
+        response = Response(
+            media_type="video/mp4",
+            headers={**headers, "X-Accel-Redirect": VIDEO_ACCEL_REDIRECT + os.path.basename(path)},
+        )
+    else:
+        return VideoFileResponse(path, media_type="video/mp4", headers=headers, stat_result=st, release=release)
+
+    if release is not None:
+        await asyncio.to_thread(release)
+    return response
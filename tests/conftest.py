@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+IMAGE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "images")
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """
+    data/images 를 복사한 임시 DATA_DIR 로 import 한 server 모듈 (작업 큐 워커도 떠 있음).
+    """
+    data_dir = tmp_path_factory.mktemp("data")
+    shutil.copytree(IMAGE_FOLDER, data_dir / "images")
+    os.environ["DATA_DIR"] = str(data_dir)
+    import server
+
+    return server
+
+
+@pytest.fixture
+def fake_generation(server, monkeypatch):
+    """
+    Veo 대신 빈 영상 파일을 쓰는 interpolate_images. 호출마다 transition 이미지 목록을 기록합니다.
+    """
+    calls = []
+
+    def _interpolate(image_paths, out_file, out_dir, on_merge=None, on_clip=None):
+        calls.append([os.path.basename(p) for p in image_paths])
+        with open(os.path.join(out_dir, out_file), "wb") as f:
+            f.write(b"video")
+
+    monkeypatch.setattr(server, "interpolate_images", _interpolate)
+    monkeypatch.setattr(server, "prepare_video", lambda path: None)
+    monkeypatch.setattr(server, "STREAM_HLS", False)
+    return calls
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.find_matching import find_matching  # noqa: E402
+from utils.image_catalog import ImageCatalog  # noqa: E402
+
+IMAGE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "images")
+
+
+def _street_path(index) -> np.ndarray:
+    # data/images 의 동서 방향 도로 이미지 위치를 그대로 경로 지점으로 사용
+    on_street = np.isclose(index.headings, 87.45, atol=0.1)
+    points = np.column_stack([index.lons, index.lats, index.headings])[on_street]
+    return points[np.argsort(points[:, 0])]
+
+
+def test_list_input_drops_last_point(tmp_path):
+    index = ImageCatalog(IMAGE_FOLDER, str(tmp_path)).get_index()
+    path = _street_path(index)
+
+    from_array = find_matching(path, IMAGE_FOLDER, index=index)
+    from_list = find_matching(path.tolist(), IMAGE_FOLDER, index=index)
+
+    # 배열은 모든 지점을, 예전 list 형식은 마지막 지점을 빼고 매칭 (기존 동작)
+    assert len(from_array) == len(path)
+    assert from_list == from_array[:-1]
+
+
+def test_list_input_without_last_heading(tmp_path):
+    index = ImageCatalog(IMAGE_FOLDER, str(tmp_path)).get_index()
+    path = _street_path(index).tolist()
+
+    # 마지막 지점에 heading 이 없는 기존 navigate 형식
+    legacy = path[:-1] + [path[-1][:2]]
+    assert find_matching(legacy, IMAGE_FOLDER, index=index) == find_matching(path, IMAGE_FOLDER, index=index)
@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.jobs import DONE, FAILED, GENERATING, QUEUED, JobQueue, JobStore  # noqa: E402
+from utils.state_backend import SqliteStateBackend  # noqa: E402
+
+
+def _wait_for(store: JobStore, key: str, states=(DONE, FAILED), timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(key)
+        if job is not None and job["state"] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"{key} 가 {states} 상태가 되지 않음: {store.get(key)}")
+
+
+def test_resumes_unfinished_jobs_after_restart(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    # 이전 프로세스가 생성 도중에 죽은 작업과, 큐에만 들어간 작업
+    crashed = JobStore(db)
+    crashed.create_or_get("a", {"n": 1})
+    crashed.set_state("a", GENERATING)
+    crashed.create_or_get("b", {"n": 2})
+
+    ran = []
+    store = JobStore(db)
+    jobs = JobQueue(store, lambda job: ran.append(job.key) or f"out-{job.payload['n']}",
+                    state=SqliteStateBackend(db))
+    jobs.start()
+
+    assert _wait_for(store, "a")["result"] == "out-1"
+    assert _wait_for(store, "b")["result"] == "out-2"
+    assert sorted(ran) == ["a", "b"]
+
+
+def test_does_not_take_over_jobs_with_a_live_lease(tmp_path):
+    db = str(tmp_path / "state.sqlite3")
+    state = SqliteStateBackend(db)
+    store = JobStore(db)
+    store.create_or_get("busy", {})
+    store.set_state("busy", GENERATING)
+    # 다른 워커 프로세스가 아직 처리 중 (heartbeat 로 갱신 중인 lease)
+    state.claim("job:busy", "other-worker", 60)
+
+    ran = []
+    JobQueue(store, lambda job: ran.append(job.key), state=state).start()
+    time.sleep(0.2)
+
+    assert ran == []
+    assert store.get("busy")["state"] == GENERATING
+
+
+def test_submit_deduplicates_and_records_failures(tmp_path):
+    store = JobStore(str(tmp_path / "state.sqlite3"))
+    release = threading.Event()
+    calls = []
+
+    def handler(job):
+        calls.append(job.key)
+        release.wait(5)
+        if job.payload.get("fail"):
+            raise RuntimeError("생성 실패")
+        return "ok"
+
+    jobs = JobQueue(store, handler, workers=2)
+    jobs.start()
+
+    first = jobs.submit("same", {})
+    second = jobs.submit("same", {"ignored": True})
+    jobs.submit("bad", {"fail": True})
+    release.set()
+
+    assert first["state"] == QUEUED and second["payload"] == {}
+    assert _wait_for(store, "same")["state"] == DONE
+    failed = _wait_for(store, "bad")
+    assert failed["state"] == FAILED and "생성 실패" in failed["error"]
+    assert sorted(calls) == ["bad", "same"]
+
+    # 실패한 작업은 다시 제출하면 새로 실행된다
+    jobs.submit("bad", {})
+    assert _wait_for(store, "bad", states=(DONE,))["result"] == "ok"
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.image_catalog import ImageCatalog  # noqa: E402
+from utils.local_router import LocalRouter  # noqa: E402
+from utils.spatial_index import smallest_angle_diff  # noqa: E402
+
+IMAGE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "images")
+
+# data/images 의 동서 방향 도로 (lat≈37.5517, 동쪽으로 찍은 heading 87.45°)
+EAST_HEADING = 87.45
+
+
+def _east_street(router: LocalRouter) -> tuple[np.ndarray, np.ndarray]:
+    index = router.graph().index
+    on_street = np.isclose(index.headings, EAST_HEADING, atol=0.1)
+    assert on_street.sum() >= 10
+    return index.lons[on_street], index.lats[on_street]
+
+
+def test_routes_along_east_west_street(tmp_path):
+    router = LocalRouter(ImageCatalog(IMAGE_FOLDER, str(tmp_path)))
+    lons, lats = _east_street(router)
+    west, east = np.argmin(lons), np.argmax(lons)
+
+    route = router.route((str(lons[west]), str(lats[west])), (str(lons[east]), str(lats[east])))
+
+    assert route is not None
+    path = route["path"]
+    # 도로를 벗어나지 않고, 진행 방향(동쪽 90°)이 카탈로그 heading 과 맞아야 함
+    assert np.all(np.abs(path[:, 1] - np.mean(lats)) < 1e-4)
+    assert np.all(smallest_angle_diff(path[:-1, 2], EAST_HEADING) <= 30)
+
+
+def test_routes_east_west_street_in_reverse(tmp_path):
+    router = LocalRouter(ImageCatalog(IMAGE_FOLDER, str(tmp_path)))
+    lons, lats = _east_street(router)
+    west, east = np.argmin(lons), np.argmax(lons)
+
+    route = router.route((str(lons[east]), str(lats[east])), (str(lons[west]), str(lats[west])))
+
+    assert route is not None
+    assert np.all(smallest_angle_diff(route["path"][:-1, 2], (EAST_HEADING + 180) % 360) <= 30)
@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.image_catalog import ImageCatalog  # noqa: E402
+from utils.jobs import DONE, JobStore  # noqa: E402
+from utils.pregenerate import pregenerate  # noqa: E402
+from utils.route_batch import batch_key  # noqa: E402
+
+IMAGE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "images")
+
+
+def _street_path(image_folder: str, store_dir: str) -> list:
+    index = ImageCatalog(image_folder, store_dir).get_index()
+    on_street = np.isclose(index.headings, 87.45, atol=0.1)
+    points = np.column_stack([index.lons, index.lats, index.headings])[on_street]
+    return points[np.argsort(points[:, 0])].tolist()
+
+
+def _finish(store: JobStore, key: str, payload: dict) -> None:
+    store.create_or_get(key, payload)
+    store.set_state(key, DONE, result="{}")
+
+
+def test_history_skips_finished_batch_jobs(tmp_path):
+    shutil.copytree(IMAGE_FOLDER, tmp_path / "images")
+    path = _street_path(str(tmp_path / "images"), str(tmp_path / "catalog"))
+
+    store = JobStore(str(tmp_path / "state.sqlite3"))
+    route = {"start": path[0][:2], "end": path[-1][:2], "path": path}
+    _finish(store, "route", route)
+    # 배치 작업도 같은 jobs 테이블에 완료 기록으로 남는다 (payload 에 start/end 가 없음)
+    _finish(store, batch_key(["route"]), {"keys": ["route"], "routes": [{"key": "route", **route}], "priority": 0})
+
+    summary = pregenerate(str(tmp_path), backend="local", dry_run=True)
+
+    assert summary["routes"] == 1
+    assert summary["candidates"] > 0 and summary["planned"] == summary["candidates"]
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.route_cache import RouteCache  # noqa: E402
+
+
+def _disk_entries(cache_dir) -> int:
+    return sum(1 for name in os.listdir(cache_dir) if name.endswith(".json"))
+
+
+def test_disk_store_is_bounded_and_keeps_recently_used(tmp_path):
+    cache = RouteCache(str(tmp_path), max_entries=1, max_disk_entries=10)
+    for i in range(10):
+        cache.put(f"route-{i}", [i])
+        time.sleep(0.01)  # mtime 순서가 구분되도록
+
+    # 새 프로세스(메모리 비어 있음)에서 route-0 을 읽으면 최근 사용으로 갱신된다
+    assert RouteCache(str(tmp_path)).get("route-0") == [0]
+    cache.put("route-10", [10])
+
+    assert _disk_entries(tmp_path) == 9
+    fresh = RouteCache(str(tmp_path))
+    assert fresh.get("route-0") == [0]
+    assert fresh.get("route-10") == [10]
+    assert fresh.get("route-1") is None and fresh.get("route-2") is None
+
+
+def test_overwriting_an_entry_does_not_count_twice(tmp_path):
+    cache = RouteCache(str(tmp_path), max_disk_entries=2)
+    for _ in range(5):
+        cache.put("same", [1])
+    cache.put("other", [2])
+
+    assert _disk_entries(tmp_path) == 2
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from utils.jobs import DONE, FAILED, JobContext
+from utils.transition_planner import plan_transitions
+
+
+def _street_path(server, heading: float) -> np.ndarray:
+    # data/images 의 한 도로(같은 heading 으로 찍은 이미지들)를 따라가는 경로
+    index = server.image_catalog.get_index()
+    on_street = np.isclose(index.headings, heading, atol=0.1)
+    points = np.column_stack([index.lons, index.lats, index.headings])[on_street]
+    return points[np.argsort(points[:, 0])]
+
+
+def _payload(path: np.ndarray) -> dict:
+    return {"start": path[0, :2].tolist(), "end": path[-1, :2].tolist(), "path": path.tolist()}
+
+
+def test_video_key_does_not_depend_on_clip_cache(server, fake_generation, monkeypatch):
+    path = _street_path(server, 87.45)
+    matched = server.find_matching(path, server.image_catalog.image_folder, index=server.image_catalog.get_index())
+    neighbours = set(zip(matched, matched[1:]))
+
+    def _neighbours_cached(a, b):
+        return (os.path.basename(a), os.path.basename(b)) in neighbours
+
+    # 이웃 이미지 사이 클립만 캐시되어 있으면 transition 계획(부분 수열)이 달라진다
+    assert plan_transitions(matched) != plan_transitions(matched, is_cached=lambda a, b: (a, b) in neighbours)
+
+    monkeypatch.setattr(server, "transition_cache_checker", lambda cache_dir: lambda a, b: False)
+    first = server.gen_video(JobContext(server.jobs.store, {"key": "route-a", "payload": _payload(path)}))
+    monkeypatch.setattr(server, "transition_cache_checker", lambda cache_dir: _neighbours_cached)
+    second = server.gen_video(JobContext(server.jobs.store, {"key": "route-b", "payload": _payload(path)}))
+
+    # 같은 매칭 이미지 순서 → 같은 정규 키 → 한 번만 생성하고 재사용
+    assert first == second
+    assert len(fake_generation) == 1
+    assert server.route_aliases.get("route-a") == server.route_aliases.get("route-b")
+
+
+def _wait_done(store, keys, timeout: float = 10.0) -> list[dict]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = [store.get(key) for key in keys]
+        if all(job is not None and job["state"] in (DONE, FAILED) for job in jobs):
+            return jobs
+        time.sleep(0.02)
+    raise AssertionError(f"작업이 끝나지 않음: {[store.get(key) for key in keys]}")
+
+
+def test_batch_submits_child_jobs_for_each_route(server, fake_generation, monkeypatch):
+    index = server.image_catalog.get_index()
+    diagonal = np.column_stack([index.lons, index.lats, index.headings])[(index.headings > 30) & (index.headings < 50)]
+    paths = [diagonal[np.argsort(diagonal[:, 0])], _street_path(server, 87.45)[:8]]
+
+    def _navigate_many(pairs):
+        # TMap 대신 출발 좌표가 맞는 준비된 경로를 돌려준다
+        found = []
+        for start, _ in pairs:
+            path = next(p for p in paths if np.allclose(p[0, :2], np.asarray(start, dtype=float), atol=1e-4))
+            found.append({"path": path})
+        return found
+
+    generated = []
+
+    def _generate_transitions(image_pairs, cache_dir):
+        generated.extend((os.path.basename(a), os.path.basename(b)) for a, b in image_pairs)
+        return ((i, None, None) for i in range(len(image_pairs)))
+
+    monkeypatch.setattr(server, "navigate_many", _navigate_many)
+    monkeypatch.setattr(server, "generate_transitions", _generate_transitions)
+
+    client = TestClient(server.app)
+    routes = [
+        {"startLng": str(p[0, 0]), "startLat": str(p[0, 1]), "endLng": str(p[-1, 0]), "endLat": str(p[-1, 1])}
+        for p in paths
+    ]
+    submitted = client.post("/gen-videos", json={"routes": routes + routes[:1]}).json()
+    keys = [route["key"] for route in submitted["routes"]]
+    assert len(keys) == 2  # 같은 좌표의 경로는 한 번만
+
+    [batch] = _wait_done(server.jobs.store, [submitted["batch"]])
+    assert batch["state"] == DONE and json.loads(batch["result"])["errors"] == {}
+    children = _wait_done(server.jobs.store, keys)
+
+    # 경로마다 매칭 결과와 계획을 가진 작업이 하나씩 제출되고, 공유 transition 은 배치에서 한 번씩만 생성
+    assert all(child["state"] == DONE for child in children)
+    planned = [child["payload"]["images"] for child in children]
+    for child, images in zip(children, planned):
+        assert len(child["payload"]["matched"]) >= len(images) >= 2
+    assert sorted(generated) == sorted({pair for images in planned for pair in zip(images, images[1:])})
+    for images in planned:
+        assert images in fake_generation
+
+    status = client.get(f"/batches/{submitted['batch']}").json()
+    assert [route["state"] for route in status["routes"]] == [DONE, DONE]
+    assert all(route["video"].startswith("/videos/") for route in status["routes"])
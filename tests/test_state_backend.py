@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.state_backend import Lease, MemoryStateBackend, SqliteStateBackend  # noqa: E402
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backends(request, tmp_path):
+    # 같은 저장소를 보는 두 "프로세스" (sqlite 는 연결을 따로 연다)
+    if request.param == "sqlite":
+        db = str(tmp_path / "state.sqlite3")
+        return SqliteStateBackend(db), SqliteStateBackend(db)
+    backend = MemoryStateBackend()
+    return backend, backend
+
+
+def test_claim_or_join(backends):
+    a, b = backends
+
+    assert a.claim("video:k", "worker-a", 30) == "worker-a"
+    # 두 번째 요청자는 차지하지 못하고 현재 보유자를 받아 기다린다 (join)
+    assert b.claim("video:k", "worker-b", 30) == "worker-a"
+    assert b.holder("video:k") == "worker-a"
+    # 보유자는 다시 claim 해도 그대로
+    assert a.claim("video:k", "worker-a", 30) == "worker-a"
+
+    a.release("video:k", "worker-a")
+    assert b.holder("video:k") is None
+    assert b.claim("video:k", "worker-b", 30) == "worker-b"
+
+
+def test_expired_lease_is_taken_over(backends):
+    a, b = backends
+
+    a.claim("job:k", "dead-worker", 0.05)
+    time.sleep(0.1)
+
+    assert b.holder("job:k") is None
+    assert b.claim("job:k", "worker-b", 30) == "worker-b"
+    # 만료 후 넘겨진 lease 는 이전 보유자가 갱신/해제할 수 없다
+    assert not a.renew("job:k", "dead-worker", 30)
+    a.release("job:k", "dead-worker")
+    assert b.holder("job:k") == "worker-b"
+
+
+def test_any_held_matches_prefix(backends):
+    a, b = backends
+
+    a.claim("video-pin:k1:p1", "p1", 30)
+    assert b.any_held("video-pin:k1:")
+    assert not b.any_held("video-pin:k2:")
+    assert not b.any_held("video-pin:k10:")  # 다른 키의 접두어가 아님
+
+    a.release("video-pin:k1:p1", "p1")
+    assert not b.any_held("video-pin:k1:")
+
+
+def test_lease_heartbeat_keeps_it_alive(backends):
+    a, b = backends
+
+    lease = Lease(a, "job:long", ttl_seconds=0.15)
+    assert lease.acquire()
+    time.sleep(0.4)  # ttl 보다 오래 걸리는 작업
+    assert b.holder("job:long") == lease.owner
+    assert not Lease(b, "job:long").acquire()
+
+    lease.release()
+    assert b.holder("job:long") is None
+
+
+def test_blocking_acquire_waits_for_release(backends):
+    a, b = backends
+    first = Lease(a, "video:k", ttl_seconds=30)
+    assert first.acquire()
+
+    acquired = threading.Event()
+    second = Lease(b, "video:k", ttl_seconds=30)
+    waiter = threading.Thread(target=lambda: second.acquire(blocking=True, poll_seconds=0.01) and acquired.set())
+    waiter.start()
+    time.sleep(0.1)
+    assert not acquired.is_set()
+
+    first.release()
+    waiter.join(2)
+    assert acquired.is_set()
+    assert a.holder("video:k") == second.owner
+    second.release()
@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.transition_scheduler import TransitionScheduler, is_quota_error  # noqa: E402
+
+
+class _Quota(Exception):
+    code = 429
+
+
+def test_yields_in_input_order_and_retries_failures():
+    scheduler = TransitionScheduler(max_in_flight=3, max_retries=2, backoff_base=0.0)
+    attempts = {}
+
+    def fn(task):
+        attempts[task] = attempts.get(task, 0) + 1
+        if task % 2 and attempts[task] == 1:
+            raise RuntimeError("일시적 실패")
+        time.sleep(0.01 * (5 - task))  # 뒤 작업이 먼저 끝나도 순서대로 나와야 함
+        return task * 10
+
+    results = list(scheduler.run(list(range(5)), fn))
+
+    assert [(i, value, err) for i, value, err in results] == [(i, i * 10, None) for i in range(5)]
+    assert attempts == {0: 1, 1: 2, 2: 1, 3: 2, 4: 1}
+
+
+def test_gives_up_after_max_retries():
+    scheduler = TransitionScheduler(max_in_flight=1, max_retries=2, backoff_base=0.0)
+    calls = []
+
+    def fn(task):
+        calls.append(task)
+        raise RuntimeError("항상 실패")
+
+    [(i, value, err)] = list(scheduler.run(["a"], fn))
+
+    assert value is None and isinstance(err, RuntimeError)
+    assert len(calls) == 3  # 첫 시도 + 재시도 2번
+
+
+def test_in_flight_limit_is_shared_between_runs():
+    scheduler = TransitionScheduler(max_in_flight=2, workers=4)
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def fn(task):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return task
+
+    outputs = [None, None]
+
+    def _job(slot):
+        outputs[slot] = [value for _, value, _ in scheduler.run(list(range(6)), fn)]
+
+    threads = [threading.Thread(target=_job, args=(slot,)) for slot in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert outputs == [list(range(6)), list(range(6))]
+    assert peak == 2
+
+
+def test_future_tasks_hold_a_slot_until_done():
+    scheduler = TransitionScheduler(max_in_flight=1)
+    pending: list[Future] = []
+
+    def fn(task):
+        f = Future()
+        pending.append(f)
+        return f
+
+    results = []
+    consumer = threading.Thread(target=lambda: results.extend(scheduler.run(["a", "b"], fn)))
+    consumer.start()
+    time.sleep(0.05)
+    # 첫 작업의 Future 가 끝나기 전에는 두 번째 작업이 시작되지 않는다
+    assert len(pending) == 1
+    pending[0].set_result("A")
+    time.sleep(0.05)
+    assert len(pending) == 2
+    pending[1].set_result("B")
+    consumer.join()
+    assert results == [(0, "A", None), (1, "B", None)]
+
+
+def test_quota_error_pauses_new_requests():
+    scheduler = TransitionScheduler(max_in_flight=1, max_retries=1, backoff_base=0.1, backoff_max=0.1)
+    started = []
+
+    def fn(task):
+        started.append(time.monotonic())
+        if len(started) == 1:
+            raise _Quota("RESOURCE_EXHAUSTED")
+        return task
+
+    assert is_quota_error(_Quota())
+    assert list(scheduler.run(["a"], fn)) == [(0, "a", None)]
+    # 재시도는 공유 대기 시간(0.05~0.1초) 뒤에 나간다
+    assert started[1] - started[0] >= 0.05
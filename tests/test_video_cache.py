@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.state_backend import SqliteStateBackend  # noqa: E402
+from utils.video_cache import VideoCache  # noqa: E402
+
+
+def _workers(tmp_path, max_bytes: int) -> tuple[VideoCache, VideoCache]:
+    # 같은 캐시 디렉토리 / state DB 를 쓰는 두 워커 프로세스
+    db = str(tmp_path / "state.sqlite3")
+    cache_dir = str(tmp_path / "cache")
+    return (
+        VideoCache(cache_dir, db, max_bytes=max_bytes, state=SqliteStateBackend(db)),
+        VideoCache(cache_dir, db, max_bytes=max_bytes, state=SqliteStateBackend(db)),
+    )
+
+
+def _write(cache: VideoCache, key: str, size: int) -> None:
+    with open(cache.path_for(key), "wb") as f:
+        f.write(b"\0" * size)
+
+
+def test_pin_in_another_worker_blocks_eviction(tmp_path):
+    serving, evicting = _workers(tmp_path, max_bytes=10)
+    _write(evicting, "video", 8)
+    evicting.add("video")
+
+    serving.pin("video")
+    assert serving.get("video") is not None
+    evicting.max_bytes = 0  # 용량 초과 → 지워야 하지만 다른 워커가 서빙 중
+
+    assert evicting.evict() == []
+    assert os.path.exists(evicting.path_for("video"))
+    assert evicting.total_bytes() == 8  # 인덱스 항목도 남아 있음
+
+    serving.unpin("video")
+    assert evicting.evict() == ["video"]
+    assert not os.path.exists(evicting.path_for("video"))
+
+
+def test_nested_pins_hold_until_last_unpin(tmp_path):
+    serving, evicting = _workers(tmp_path, max_bytes=0)
+    _write(serving, "k", 4)
+
+    with serving.pinned("k"):
+        serving.add("k")
+        with serving.pinned("k"):
+            pass
+        assert evicting.evict() == []
+
+    assert evicting.evict() == ["k"]